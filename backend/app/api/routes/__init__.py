@@ -2,7 +2,11 @@ from fastapi import APIRouter
 
 from app.api.routes.files import router as files_router
 from app.api.routes.graphs import router as graphs_router
+from app.api.routes.jobs import router as jobs_router
+from app.api.routes.metrics import router as metrics_router
 from app.api.routes.nodes import router as nodes_router
+from app.api.routes.s3 import router as s3_router
+from app.api.routes.transform import router as transform_router
 
 # Create a parent router that combines all route modules
 api_router = APIRouter()
@@ -11,6 +15,9 @@ api_router = APIRouter()
 api_router.include_router(nodes_router, prefix="/nodes", tags=["nodes"])
 api_router.include_router(files_router, prefix="/files", tags=["files"])
 api_router.include_router(graphs_router, prefix="/graphs", tags=["graphs"])
+api_router.include_router(s3_router, prefix="/s3", tags=["s3"])
+api_router.include_router(jobs_router, prefix="/jobs", tags=["jobs"])
+api_router.include_router(metrics_router, tags=["metrics"])
 
 
 # Health check endpoint for the entire API
@@ -24,3 +31,8 @@ async def api_health_check():
         "message": "TransformatAPI is operational",
         "version": "2.0",
     }
+
+
+# Transform routes live at the root; included last so the API health check above
+# takes precedence over the transform service's own /health.
+api_router.include_router(transform_router, tags=["transform"])
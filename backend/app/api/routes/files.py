@@ -1,14 +1,25 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, status
-from typing import List
+import asyncio
+
+from fastapi import APIRouter, UploadFile, File, Header, HTTPException, Query, Response, status
+from typing import List, Optional
 
 from app.api.schemas.files import (
+    FilePinResponse,
+    FileStatusResponse,
     FileUploadResponse,
     GenerateNodeTemplateRequest,
     GenerateNodeTemplateResponse,
     CSVPreviewRequest,
     CSVPreviewResponse,
+    StorageUsage,
 )
 from app.services.file_service import file_service
+from app.services.result_encoding import (
+    ARROW_MEDIA_TYPES,
+    JSON,
+    encode_frame,
+    negotiate_media_type,
+)
 from app.logger import get_logger
 
 logger = get_logger("api.files")
@@ -19,7 +30,8 @@ router = APIRouter()
     "/upload",
     response_model=FileUploadResponse,
     summary="Upload CSV file",
-    description="Upload a CSV file and extract column information for node generation",
+    description="Upload a CSV file and extract column information for node generation. "
+    "The file is profiled in the background; poll /files/{file_id}/status for progress.",
 )
 async def upload_csv_file(file: UploadFile = File(...)):
     """
@@ -41,32 +53,116 @@ async def generate_node_template(request: GenerateNodeTemplateRequest):
     This creates outputs for each column in the CSV.
     """
     logger.info(f"Generating node template for file: {request.file_id}")
-    return file_service.generate_node_template_file(
+    operator = file_service.generate_node_template_file(
         request.file_id, request.node_title, request.node_description
     )
+    file_info = file_service.get_file_info(request.file_id)
+    return GenerateNodeTemplateResponse(
+        operator=operator, file_info=file_info.model_dump()
+    )
 
 
 @router.post(
     "/preview",
     response_model=CSVPreviewResponse,
     summary="Preview CSV file contents",
-    description="Get a preview of CSV file contents with specified row limit",
+    description="Get a preview of CSV file contents with specified row limit. "
+    "Send Accept: application/vnd.apache.arrow.stream or application/vnd.apache.parquet "
+    "to get the page in that format instead of JSON",
 )
-async def preview_csv_file(request: CSVPreviewRequest):
+async def preview_csv_file(
+    request: CSVPreviewRequest, accept: Optional[str] = Header(None)
+):
     """
     Preview the contents of an uploaded CSV file.
     """
-    logger.info(f"Previewing file: {request.file_id} with limit: {request.limit}")
+    logger.info(
+        f"Previewing file: {request.file_id} with offset: {request.offset}, limit: {request.limit}"
+    )
 
-    headers, rows, total_rows = file_service.preview_csv(request.file_id, request.limit)
+    media_type = negotiate_media_type(accept, [JSON, *ARROW_MEDIA_TYPES])
+    if media_type != JSON:
+        df, total_rows = file_service.preview_frame(
+            request.file_id, request.limit, request.offset
+        )
+        headers = {"X-Total-Rows": str(total_rows)} if total_rows is not None else None
+        return Response(
+            content=encode_frame(df, media_type), media_type=media_type, headers=headers
+        )
+
+    headers, rows, total_rows = file_service.preview_csv(
+        request.file_id, request.limit, request.offset
+    )
 
     return CSVPreviewResponse(
-        headers=headers, rows=rows, total_rows=total_rows, preview_limit=request.limit
+        headers=headers,
+        rows=rows,
+        total_rows=total_rows,
+        offset=request.offset,
+        preview_limit=request.limit,
     )
 
 
+@router.get(
+    "/",
+    response_model=List[FileUploadResponse],
+    summary="Find uploaded files",
+    description="Find uploaded files by filename and/or content hash",
+)
+async def find_files(
+    filename: Optional[str] = Query(None, description="Original filename"),
+    content_hash: Optional[str] = Query(None, description="SHA-256 of the contents"),
+):
+    """
+    Find uploaded files by filename and/or content hash.
+    """
+    return file_service.find_files(filename=filename, content_hash=content_hash)
+
+
+@router.get(
+    "/storage/usage",
+    response_model=StorageUsage,
+    summary="Get storage usage",
+    description="Get the disk usage of uploads and their derived caches",
+)
+async def get_storage_usage():
+    """
+    Get the disk usage of the upload directory.
+    """
+    return await asyncio.to_thread(file_service.storage_manager.usage)
+
+
+@router.put(
+    "/{file_id}/pin",
+    response_model=FilePinResponse,
+    summary="Pin a file",
+    description="Protect an uploaded file from eviction",
+)
+async def pin_file(file_id: str):
+    """
+    Pin an uploaded file so it is never evicted.
+    """
+    file_service.set_pinned(file_id, True)
+    return FilePinResponse(file_id=file_id, pinned=True)
+
+
+@router.delete(
+    "/{file_id}/pin",
+    response_model=FilePinResponse,
+    summary="Unpin a file",
+    description="Allow an uploaded file to be evicted again",
+)
+async def unpin_file(file_id: str):
+    """
+    Unpin an uploaded file.
+    """
+    file_service.set_pinned(file_id, False)
+    return FilePinResponse(file_id=file_id, pinned=False)
+
+
 @router.get(
     "/{file_id}/info",
+    response_model=FileUploadResponse,
     summary="Get file information",
     description="Get information about an uploaded file",
 )
@@ -75,3 +171,23 @@ async def get_file_info(file_id: str):
     Get information about an uploaded file.
     """
     logger.info(f"Getting file info for: {file_id}")
+    return file_service.get_file_info(file_id)
+
+
+@router.get(
+    "/{file_id}/status",
+    response_model=FileStatusResponse,
+    summary="Get file profiling status",
+    description="Get the progress of the background profiling of an uploaded file",
+)
+async def get_file_status(file_id: str):
+    """
+    Get the profiling status of an uploaded file.
+    """
+    file_info = file_service.get_file_info(file_id)
+    return FileStatusResponse(
+        file_id=file_id,
+        status=file_info.status,
+        progress=file_info.progress,
+        error=file_info.error,
+    )
@@ -1,3 +1,5 @@
+import asyncio
+
 from fastapi import APIRouter, HTTPException, status
 
 from app.api.schemas.graphs import (
@@ -6,7 +8,9 @@ from app.api.schemas.graphs import (
     PreviewGraphRequest,
     PreviewGraphResponse
 )
-from app.services.graph_service import GraphService
+from app.services.execution_pool import interactive_pool
+from app.services.graph_service import GraphService, preview_graph, preview_key
+from app.services.single_flight import preview_flights
 from app.logger import get_logger
 
 logger = get_logger("api.graphs")
@@ -62,7 +66,23 @@ async def preview_graph_execution(request: PreviewGraphRequest):
     logger.info(f"Creating preview for graph with {len(request.graph.nodes)} nodes, limit: {request.preview_limit}")
     
     try:
-        return GraphService(request.graph).preview_graph(request.preview_limit)
+        # Reading and executing runs in a worker, off the event loop;
+        # identical previews in flight share one execution
+        key = await asyncio.to_thread(
+            preview_key, request.graph, request.preview_limit, request.profile
+        )
+        result = await preview_flights.run(
+            key,
+            lambda: interactive_pool.run(
+                preview_graph,
+                request.graph.model_dump_json(),
+                request.preview_limit,
+                request.profile,
+            ),
+        )
+        return PreviewGraphResponse.model_validate_json(result)
+    except HTTPException:
+        raise
     except ValueError as e:
         logger.error(f"Graph preview error: {str(e)}")
         raise HTTPException(
@@ -0,0 +1,81 @@
+import posixpath
+import uuid
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, status
+
+from app.api.routes.transform import check_output_file, resolve_config, resolve_source_file
+from app.api.schemas.jobs import JobInfo, JobListResponse, JobPlan, JobRequest
+from app.api.schemas.transform import TransformationConfig
+from app.logger import get_logger
+from app.services.job_queue import get_job_queue
+from app.services.storage import get_object_store
+
+logger = get_logger("api.jobs")
+router = APIRouter()
+
+
+def resolve_output_file(
+    config: TransformationConfig, output_file: Optional[str], job_id: str
+) -> str:
+    """
+    Determine the key a job writes its result to.
+
+    Raises:
+        HTTPException: If the requested key isn't a file under the config's
+            output prefix (see check_output_file)
+    """
+    if not output_file:
+        return posixpath.join(config.output_file_prefix_path, f"{job_id}.csv")
+    return check_output_file(config.output_file_prefix_path, output_file)
+
+
+@router.post(
+    "",
+    response_model=JobInfo,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Enqueue a transform job",
+    description="Resolve a transformation and queue it for a job worker. "
+    "Poll the returned job for progress and the result location",
+)
+async def create_job(request: JobRequest):
+    config = resolve_config(request.config_id, request.config)
+    store = get_object_store(request.storage)
+    source_file = resolve_source_file(config, request.source_file, store)
+
+    job_id = str(uuid.uuid4())
+    plan = JobPlan(
+        config=config,
+        evaluate_node_id=request.evaluate_node_id,
+        storage=store.name,
+        source_file=source_file,
+        output_file=resolve_output_file(config, request.output_file, job_id),
+    )
+    return get_job_queue().enqueue(plan, job_id)
+
+
+@router.get(
+    "",
+    response_model=JobListResponse,
+    summary="List jobs",
+    description="List the most recently created jobs, newest first",
+)
+async def list_jobs(limit: int = Query(50, ge=1, le=1000)):
+    jobs = get_job_queue().list_jobs(limit)
+    return JobListResponse(jobs=jobs, count=len(jobs))
+
+
+@router.get(
+    "/{job_id}",
+    response_model=JobInfo,
+    summary="Get job status",
+    description="Get the status, progress and result location of a job",
+)
+async def get_job(job_id: str):
+    job = get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job with ID {job_id} not found",
+        )
+    return job
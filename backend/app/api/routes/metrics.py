@@ -0,0 +1,19 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.services.metrics import metrics
+
+router = APIRouter()
+
+# Version of the Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get(
+    "/metrics",
+    summary="Prometheus metrics",
+    description="Metrics of every worker process of this server, in the Prometheus text format",
+    response_class=PlainTextResponse,
+)
+async def get_metrics():
+    return PlainTextResponse(metrics.collect(), media_type=CONTENT_TYPE)
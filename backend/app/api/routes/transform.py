@@ -1,28 +1,57 @@
-from typing import Optional
+from typing import AsyncIterator, Optional
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
 from datetime import datetime, UTC
-import os
-import io
+import asyncio
 import base64
+import hashlib
+import io
+import itertools
+import os
+import posixpath
+import shutil
+import socket
+import tempfile
+import time
+from pathlib import Path
 
-import boto3
-import pandas as pd
-from botocore.exceptions import ClientError
-from fastapi import APIRouter, HTTPException, status
-from fastapi.responses import JSONResponse
-from dotenv import load_dotenv
+from fastapi import APIRouter, Header, HTTPException, status
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 
 from app.api.schemas.transform import (
+    BatchFileResult,
+    BatchTransformRequest,
+    BatchTransformResponse,
     GraphNode,
     NodeType,
+    TransformationConfig,
     TransformDataResponse,
     TransformRequest,
 )
 from app.logger import get_logger
 from app.config import settings
 from app.core.dag import map_node_id_to_node, select_subtree, topological_sort
+from app.core.lazy import lazy_import
+from app.services.admission import EXECUTION, PREVIEW, admission, estimate_memory
+from app.services.dataset_cache import dataset_cache
+from app.services.execution_pool import execution_pool, from_arrow, interactive_pool
+from app.services.job_queue import ClaimedJob, JobQueue, LeaseLost
+from app.services.metrics import OPERATOR_DURATION, OPERATOR_ROWS
+from app.services.result_encoding import (
+    ARROW_MEDIA_TYPES,
+    ARROW_STREAM,
+    JSON,
+    encode_frame,
+    iter_ipc_stream,
+    negotiate_media_type,
+)
+from app.services.single_flight import canonical_hash, preview_flights
+from app.services.storage import ObjectInfo, ObjectStore, get_object_store
+from app.services.tracing import span
+from app.services.warm_cache import plan_cache
 
-# Load environment variables
-load_dotenv()
+pa = lazy_import("pyarrow")
+pl = lazy_import("polars")
 
 # Set up logger
 logger = get_logger("api.transform")
@@ -30,59 +59,59 @@ logger = get_logger("api.transform")
 # Create router
 router = APIRouter()
 
+# Keys the file service stores uploads under, which results must never write to
+RESERVED_PREFIXES = ("blobs/",)
+
 # Mock database for demo purposes
 # In a real application, use a proper database
 MOCK_DB = {
     "configs": {},
 }
 
-# Initialize S3 client
-s3_client = boto3.client(
-    "s3",
-    aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-    aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-    aws_session_token=os.getenv("AWS_SESSION_TOKEN"),
-    region_name=os.getenv("AWS_REGION", "us-east-1"),
-)
-
-S3_BUCKET = os.getenv("S3_BUCKET")
+# Estimated in-memory size of a compiled plan relative to its JSON
+PLAN_SIZE_FACTOR = 8
 
 
-def read_csv_from_s3(file_path: str, limit: Optional[int] = None) -> pd.DataFrame:
+def read_csv_from_store(
+    file_path: str,
+    limit: Optional[int] = None,
+    store: Optional[ObjectStore] = None,
+    columns: Optional[list[str]] = None,
+    info: Optional[ObjectInfo] = None,
+) -> "pl.DataFrame":
     """
-    Read CSV data from S3 bucket into a pandas DataFrame.
+    Read CSV data from an object store into a Polars DataFrame.
+
+    Full reads go through the shared dataset cache, so every worker process
+    of the host reads the same decoded copy; limited reads use it when it's
+    there. Otherwise the read is a lazy scan (through the columnar copy for
+    ingested local files), so the column projection and row limit are pushed
+    into the reader.
 
     Args:
-        file_path: Path to the file in S3
+        file_path: Key of the file in the store
         limit: Maximum number of rows to read
+        store: Store to read from, defaults to the configured backend
+        columns: Only read these columns (those missing from the file are ignored)
+        info: Metadata of the file if already known, saves a HEAD request
 
     Returns:
-        Pandas DataFrame containing the CSV data
+        DataFrame containing the CSV data as strings
 
     Raises:
         HTTPException: If the file cannot be read or doesn't exist
     """
-    try:
-        # Get the object from S3
-        response = s3_client.get_object(Bucket=S3_BUCKET, Key=file_path)
-
-        # Try reading with default settings first
-        df = pd.read_csv(
-            io.BytesIO(response["Body"].read()),
-            nrows=limit if limit else None,
-            encoding="utf-8",
-            on_bad_lines="warn",
-            low_memory=False,
-            dtype=str,
+    store = store or get_object_store()
+    if dataset_cache is not None:
+        frame = dataset_cache.attach(
+            store, file_path, columns=columns, limit=limit, create=limit is None, info=info
         )
-        return df
+        if frame is not None:
+            return frame
+    lf = store.scan_csv(file_path)
+    try:
+        return project_scan(lf, columns, limit).collect()
 
-    except ClientError as e:
-        logger.error("Error reading from S3", error=str(e))
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"File {file_path} not found in S3 or cannot be read",
-        )
     except Exception as e:
         logger.error("Error processing CSV file", error=str(e))
         raise HTTPException(
@@ -91,73 +120,230 @@ def read_csv_from_s3(file_path: str, limit: Optional[int] = None) -> pd.DataFram
         )
 
 
-def get_latest_file_from_s3(prefix: str) -> str:
+def project_scan(
+    lf: "pl.LazyFrame", columns: Optional[list[str]], limit: Optional[int]
+) -> "pl.LazyFrame":
+    """
+    Push a column projection and row limit into a source scan.
+
+    Args:
+        lf: Scan of a source file
+        columns: Only read these columns (those missing from the file are ignored)
+        limit: Maximum number of rows to read
+
+    Returns:
+        The narrowed scan
+    """
+    if columns is not None:
+        lf = lf.select([c for c in lf.collect_schema().names() if c in columns])
+    if limit:
+        lf = lf.head(limit)
+    return lf
+
+
+def required_input_columns(
+    nodes: list[GraphNode], evaluate_node_id: Optional[str]
+) -> Optional[list[str]]:
+    """
+    Get the source columns needed to evaluate a node.
+
+    Only output nodes drop unmapped columns, so a projection is only possible
+    when evaluating one; otherwise every column is needed.
+
+    Returns:
+        Column names to read, or None to read all columns
+    """
+    evaluate_node = map_node_id_to_node(nodes).get(evaluate_node_id)
+    if evaluate_node is None or evaluate_node.type != NodeType.OUTPUT:
+        return None
+    return sorted(
+        {
+            column
+            for node in nodes
+            if node.type == NodeType.INPUT
+            for column in getattr(node.manual_values, "column_names", [])
+        }
+    )
+
+
+@dataclass(frozen=True)
+class CompiledPlan:
+    """A transformation configuration ready to evaluate one of its nodes."""
+
+    config: TransformationConfig
+    # Nodes the evaluated node depends on, in execution order
+    nodes: list[GraphNode]
+    # Source columns to read, or None for all
+    columns: Optional[list[str]]
+
+
+def compile_plan(config_json: str, evaluate_node_id: Optional[str]) -> CompiledPlan:
+    """
+    Parse a configuration and order the nodes needed to evaluate a node.
+
+    Plans are kept per process by the digest of their JSON, so repeated
+    transforms of a configuration, e.g. warm Lambda invocations, skip parsing
+    and planning. Cached plans are shared and must not be modified.
+
+    Raises:
+        HTTPException: If the node is not part of the configuration
+        ValueError: If the configuration contains a cycle
     """
-    Get the latest file from S3 that starts with the given prefix.
+    key = (hashlib.sha256(config_json.encode()).hexdigest(), evaluate_node_id)
+    plan = plan_cache.get(key)
+    if plan is None:
+        with span("parse_config"):
+            config = TransformationConfig.model_validate_json(config_json)
+        plan = CompiledPlan(
+            config=config,
+            nodes=plan_nodes(config.nodes, evaluate_node_id),
+            columns=required_input_columns(config.nodes, evaluate_node_id),
+        )
+        plan_cache.put(key, plan, len(config_json) * PLAN_SIZE_FACTOR)
+    return plan
+
 
-    Note: This implementation only looks at the first page of results from list_objects_v2.
-    Since S3 list operations are paginated and ordered lexicographically, we would need to
-    use the continuation token to scan all pages to definitively find the most recent file.
+def get_latest_file(prefix: str, store: Optional[ObjectStore] = None) -> str:
+    """
+    Get the latest file from an object store that starts with the given prefix.
 
     Args:
-        prefix: Prefix to filter S3 objects by
+        prefix: Prefix to filter objects by
+        store: Store to list, defaults to the configured backend
 
     Returns:
-        Key of the latest file in S3
+        Key of the latest file
 
     Raises:
-        HTTPException: If no files are found or S3 access fails
+        HTTPException: If no files are found or the store cannot be accessed
     """
-    try:
-        # List objects with the given prefix
-        response = s3_client.list_objects_v2(Bucket=S3_BUCKET, Prefix=prefix)
+    store = store or get_object_store()
+    objects = store.list_objects(prefix)
+
+    # Check if any files were found
+    if not objects:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No files found with prefix {prefix}",
+        )
+
+    # Sort by last modified date and get the most recent
+    return max(objects, key=lambda o: o.last_modified).key
 
-        # Check if any files were found
-        if "Contents" not in response or not response["Contents"]:
+
+def resolve_config(
+    config_id: Optional[str], config: Optional[TransformationConfig]
+) -> TransformationConfig:
+    """
+    Get the configuration either from the request or the mock DB.
+
+    Raises:
+        HTTPException: If the config ID is unknown or neither is provided
+    """
+    if config_id:
+        if config_id not in MOCK_DB["configs"]:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"No files found with prefix {prefix}",
+                detail=f"Configuration with ID {config_id} not found",
             )
+        return MOCK_DB["configs"][config_id]
+    if config:
+        return config
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Either config_id or config must be provided",
+    )
+
+
+def resolve_source_file(
+    config: TransformationConfig, source_file: Optional[str], store: ObjectStore
+) -> str:
+    """
+    Determine which input file to transform.
+
+    As long as we have only one input file per integration, we can just use
+    the source file. Precedence:
+    1. Request source_file
+    2. Config input_file_example_path
+    3. Latest file from input_file_prefix_path
+    """
+    if source_file:
+        return source_file
+    if config.input_file_example_path:
+        return config.input_file_example_path
+    return get_latest_file(config.input_file_prefix_path, store)
+
 
-        # Sort by last modified date and get the most recent
-        latest_file = max(response["Contents"], key=lambda x: x["LastModified"])
-        return latest_file["Key"]
+def check_output_file(output_prefix: str, output_file: str) -> str:
+    """
+    Check that a result key is a file under an output prefix.
+
+    The key must sit under the prefix, without empty, "." or ".." components
+    or hidden names, and outside RESERVED_PREFIXES, so a result can't
+    overwrite files the service keeps in the same store (file registry, job
+    queue, uploads).
 
-    except ClientError as e:
-        logger.error("Error accessing S3", error=str(e))
+    Raises:
+        HTTPException: If the key isn't allowed
+    """
+    prefix = output_prefix.rstrip("/") + "/" if output_prefix else ""
+    parts = output_file[len(prefix):].split("/")
+    if (
+        not output_file.startswith(prefix)
+        or any(part in ("", ".", "..") or part.startswith(".") for part in parts)
+        or output_file.lstrip("/").startswith(RESERVED_PREFIXES)
+    ):
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error accessing S3: {str(e)}",
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Output file must be a file under {prefix or 'the store root'}: "
+            f"{output_file}",
         )
+    return output_file
 
 
-def convert_to_csv(df: pd.DataFrame) -> str:
+def check_batch_prefixes(input_prefix: str, output_prefix: str) -> None:
     """
-    Convert data to CSV format using pandas.
+    Check that a batch can write under its output prefix.
+
+    The output prefix must be a plain directory outside RESERVED_PREFIXES,
+    and must neither contain nor sit under the input prefix: outputs would
+    overwrite the inputs, or be picked up as inputs by the next batch.
+
+    Raises:
+        HTTPException: If the prefixes aren't allowed
+    """
+    output_dir = output_prefix.rstrip("/") + "/" if output_prefix else ""
+    if any(
+        part in (".", "..") or part.startswith(".")
+        for part in output_dir.split("/")[:-1]
+    ) or output_dir.lstrip("/").startswith(RESERVED_PREFIXES):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Batch outputs can't be written under {output_prefix}",
+        )
+    if output_dir.startswith(input_prefix) or input_prefix.startswith(output_dir):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Output prefix {output_prefix or '(store root)'} overlaps "
+            f"input prefix {input_prefix or '(store root)'}",
+        )
+
+
+def convert_to_csv(df: "pl.DataFrame") -> str:
+    """
+    Convert data to CSV format with every field quoted.
 
     Args:
-        data: List of dictionaries to convert
+        df: Data to convert
 
     Returns:
-        Base64 encoded CSV string
+        CSV string, empty if there are no rows
     """
-    if not df:
+    if df.is_empty():
         return base64.b64encode("".encode()).decode()
 
     try:
-
-        # Convert to CSV string
-        csv_buffer = io.StringIO()
-        df.to_csv(
-            csv_buffer,
-            index=False,
-            quoting=1,  # Quote all non-numeric fields
-            encoding="utf-8",
-        )
-
-        # Get the CSV string and encode it
-        csv_string = csv_buffer.getvalue()
-        return csv_string
+        return df.write_csv(quote_style="always")
 
     except Exception as e:
         logger.error("Error converting data to CSV", error=str(e))
@@ -171,63 +357,511 @@ def convert_to_csv(df: pd.DataFrame) -> str:
     "/transform",
     response_model=TransformDataResponse,
     summary="Transform data using a configuration",
-    description="Apply a saved transformation configuration to input data from S3",
+    description="Apply a saved transformation configuration to input data from S3 or local storage. "
+    "Send Accept: application/vnd.apache.arrow.stream or application/vnd.apache.parquet "
+    "to get the result in that format instead of JSON",
 )
-async def transform_data(request: TransformRequest):
-    # Get the configuration either from request or mock DB
-    if request.config_id:
-        if request.config_id not in MOCK_DB["configs"]:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Configuration with ID {request.config_id} not found",
+async def transform_data(request: TransformRequest, accept: Optional[str] = Header(None)):
+    media_type = negotiate_media_type(accept, [JSON, *ARROW_MEDIA_TYPES])
+    config = resolve_config(request.config_id, request.config)
+
+    store = get_object_store(request.storage)
+    source_file = resolve_source_file(config, request.source_file, store)
+
+    # Read and transform in a worker process; previews get their own pool
+    # so they don't queue behind full transforms
+    pool = interactive_pool if request.preview else execution_pool
+    limit = request.limit if request.preview else None
+    worker_media_type = ARROW_STREAM if media_type == JSON else media_type
+    # The preview key, the memory estimate and the read all need the size and
+    # version of the source; one HEAD request serves them all
+    source = await asyncio.to_thread(store.head, source_file)
+
+    async def run():
+        async with admit_transform(config, request, store, source_file, source):
+            return await pool.run(
+                execute_transform,
+                config.model_dump_json(),
+                request.evaluate_node_id,
+                store,
+                source_file,
+                limit,
+                worker_media_type,
+                source,
             )
-        config = MOCK_DB["configs"][request.config_id]
-    elif request.config:
-        config = request.config
+
+    if request.preview:
+        # Identical previews in flight share one execution; the key includes
+        # the stored version of the source
+        key = await asyncio.to_thread(
+            preview_key,
+            config,
+            request.evaluate_node_id,
+            store,
+            source_file,
+            limit,
+            worker_media_type,
+            source,
+        )
+        result = await preview_flights.run(key, run)
     else:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Either config_id or config must be provided",
+        result = await run()
+    if media_type != JSON:
+        # Encoded by the worker; passed through as is
+        return Response(content=result, media_type=media_type)
+
+    with span("serialize_response", media_type=media_type):
+        transformed_data = from_arrow(result)
+
+        # If this is a preview request, convert the result to CSV
+        preview_csv_data = None
+        if request.preview:
+            preview_csv_data = convert_to_csv(transformed_data)
+        return TransformDataResponse(
+            transformed_data=transformed_data.write_csv(),
+            preview_csv_data=preview_csv_data,
         )
 
-    # As long as we have only one input file per integration, we can just use the source file
-    # Determine which input file to use based on precedence:
-    # 1. Request source_file
-    # 2. Config input_file_example_path
-    # 3. Latest file from input_file_prefix_path
-    source_file = request.source_file
-    if not source_file:
-        if config.input_file_example_path:
-            source_file = config.input_file_example_path
-        else:
-            # TODO: Implement logic to get latest file from prefix path
-            source_file = config.input_file_prefix_path
 
-    # Get the input data
-    input_data = read_csv_from_s3(
-        source_file, limit=request.limit if request.preview else None
+@asynccontextmanager
+async def admit_transform(
+    config: TransformationConfig,
+    request: TransformRequest,
+    store: ObjectStore,
+    source_file: str,
+    info: Optional[ObjectInfo] = None,
+) -> AsyncIterator[None]:
+    """
+    Reserve memory for executing a transform request.
+
+    The footprint is estimated from the source size, the columns the plan
+    reads and, for previews, the row limit. Previews use the preview lane.
+    The estimate reads from the store, so it runs on a thread to keep the
+    event loop serving other requests.
+    """
+    estimate = await asyncio.to_thread(
+        estimate_memory,
+        store,
+        source_file,
+        columns=required_input_columns(config.nodes, request.evaluate_node_id),
+        limit=request.limit if request.preview else None,
+        info=info,
+    )
+    async with admission.admit(estimate, PREVIEW if request.preview else EXECUTION):
+        yield
+
+
+def preview_key(
+    config: TransformationConfig,
+    evaluate_node_id: Optional[str],
+    store: ObjectStore,
+    source_file: str,
+    limit: Optional[int],
+    media_type: str,
+    info: Optional[ObjectInfo] = None,
+) -> str:
+    """
+    Identify a transform preview by its plan and the version of its source.
+
+    Node positions don't affect the result and are left out. The source is
+    identified by its key and stored version (`info`, fetched if not given),
+    so previews of an overwritten file are never joined with those of the
+    old contents.
+    """
+    source = info or store.head(source_file)
+    return canonical_hash(
+        {
+            "config": config.model_dump(
+                mode="json", exclude={"nodes": {"__all__": {"position"}}}
+            ),
+            "evaluate_node_id": evaluate_node_id,
+            "source": [store.name, source.key, source.size, source.last_modified, source.etag],
+            "limit": limit,
+            "media_type": media_type,
+        }
     )
 
-    # Apply the transformation
-    transformed_data = apply_transformation(
-        config.nodes, input_data, request.evaluate_node_id
+
+def execute_transform(
+    config_json: str,
+    evaluate_node_id: Optional[str],
+    store: ObjectStore,
+    source_file: str,
+    limit: Optional[int] = None,
+    media_type: str = ARROW_STREAM,
+    info: Optional[ObjectInfo] = None,
+) -> bytes:
+    """
+    Read a stored file and transform it.
+
+    Runs in an execution pool worker: the config arrives as JSON and the
+    result is returned encoded, by default as an Arrow IPC stream. `info`,
+    the metadata of the source if the caller already fetched it, saves the
+    read a HEAD request.
+    """
+    df = _transform_source(config_json, evaluate_node_id, store, source_file, limit, info)
+    with span("serialize_response", media_type=media_type):
+        return encode_frame(df, media_type)
+
+
+def execute_transform_to_stream(
+    config_json: str,
+    evaluate_node_id: Optional[str],
+    store: ObjectStore,
+    source_file: str,
+    limit: Optional[int],
+    socket_path: str,
+    batch_rows: int,
+) -> int:
+    """
+    Read a stored file, transform it and stream the result to a Unix socket.
+
+    Runs in an execution pool worker. The source is scanned in chunks of
+    `batch_rows` rows like a job, and every transformed chunk is written to
+    the socket as a record batch of an Arrow IPC stream right away, so the
+    caller starts sending the result while the rest is being computed and
+    neither side holds it whole. The worker connects once the first chunk is
+    ready, so errors up to then are raised as usual.
+
+    Returns:
+        Number of rows in the result
+    """
+    plan = compile_plan(config_json, evaluate_node_id)
+    with span("fetch", source_file=source_file, storage=store.name):
+        lf = project_scan(store.scan_csv(source_file), plan.columns, limit)
+    chunks = (run_plan(plan.nodes, chunk) for chunk in lf.collect_batches(chunk_size=batch_rows))
+    first = next(chunks, None)
+    if first is None:
+        # No rows; the stream still carries the schema of the result
+        first = run_plan(plan.nodes, lf.head(0).collect())
+
+    rows = 0
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        with sock.makefile("wb") as sink:
+            with pa.ipc.new_stream(sink, first.head(0).to_arrow().schema) as writer:
+                for df in itertools.chain([first], chunks):
+                    writer.write_table(df.to_arrow())
+                    sink.flush()
+                    rows += df.height
+    return rows
+
+
+def _transform_source(
+    config_json: str,
+    evaluate_node_id: Optional[str],
+    store: ObjectStore,
+    source_file: str,
+    limit: Optional[int],
+    info: Optional[ObjectInfo] = None,
+) -> "pl.DataFrame":
+    plan = compile_plan(config_json, evaluate_node_id)
+    with span("fetch", source_file=source_file, storage=store.name):
+        input_data = read_csv_from_store(
+            source_file, limit=limit, store=store, columns=plan.columns, info=info
+        )
+    return run_plan(plan.nodes, input_data)
+
+
+@router.post(
+    "/transform/stream",
+    summary="Transform data and stream the result",
+    description="Apply a transformation configuration and stream the result as CSV, NDJSON, "
+    "Arrow IPC stream or Parquet, chosen with the Accept header",
+    response_class=StreamingResponse,
+)
+async def transform_data_stream(
+    request: TransformRequest, accept: Optional[str] = Header(None)
+):
+    media_type = negotiate_media_type(accept)
+    config = resolve_config(request.config_id, request.config)
+    store = get_object_store(request.storage)
+    source_file = resolve_source_file(config, request.source_file, store)
+
+    # The worker writes the result to a socket as it computes it, and the
+    # response encodes and sends every batch as soon as it arrives
+    socket_dir = tempfile.mkdtemp(prefix="transformat-stream-")
+    socket_path = os.path.join(socket_dir, "result.sock")
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    listener.listen(1)
+    listener.setblocking(False)
+
+    def close() -> None:
+        listener.close()
+        shutil.rmtree(socket_dir, ignore_errors=True)
+
+    pool = interactive_pool if request.preview else execution_pool
+
+    async def run() -> int:
+        # Memory stays reserved until the worker is done, however soon the
+        # client stops reading
+        async with admit_transform(config, request, store, source_file):
+            return await pool.run(
+                execute_transform_to_stream,
+                config.model_dump_json(),
+                request.evaluate_node_id,
+                store,
+                source_file,
+                request.limit if request.preview else None,
+                socket_path,
+                settings.STREAM_BATCH_ROWS,
+            )
+
+    worker = asyncio.ensure_future(run())
+    accepted = asyncio.ensure_future(asyncio.get_running_loop().sock_accept(listener))
+    try:
+        await asyncio.wait([worker, accepted], return_when=asyncio.FIRST_COMPLETED)
+        if not accepted.done():
+            # The worker finished without connecting, i.e. it failed
+            accepted.cancel()
+            worker.result()
+        connection, _ = accepted.result()
+    except BaseException:
+        accepted.cancel()
+        if not worker.done():
+            worker.add_done_callback(_log_stream_failure)
+        close()
+        raise
+    worker.add_done_callback(_log_stream_failure)
+    connection.setblocking(True)
+    source = connection.makefile("rb")
+
+    def stream():
+        try:
+            yield from iter_ipc_stream(source, media_type)
+        finally:
+            # Closing the socket stops a worker whose client went away
+            source.close()
+            connection.close()
+            close()
+
+    return StreamingResponse(stream(), media_type=media_type)
+
+
+def _log_stream_failure(worker: "asyncio.Future[int]") -> None:
+    # Errors after the response started (or was abandoned) can only end the
+    # stream early
+    if not worker.cancelled() and worker.exception() is not None:
+        logger.error("Streaming transform failed", error=str(worker.exception()))
+
+
+def transform_file(
+    config_json: str,
+    evaluate_node_id: Optional[str],
+    store: ObjectStore,
+    source_file: str,
+    output_file: str,
+) -> BatchFileResult:
+    """
+    Transform one stored file and write the result back to the store.
+
+    Runs in an execution pool worker, so the config travels as JSON and every
+    failure is reported in the result instead of raised.
+    """
+    start = time.perf_counter()
+    try:
+        plan = compile_plan(config_json, evaluate_node_id)
+        input_data = read_csv_from_store(source_file, store=store, columns=plan.columns)
+        transformed_data = run_plan(plan.nodes, input_data)
+        buffer = io.BytesIO()
+        transformed_data.write_csv(buffer)
+        store.put_bytes(output_file, buffer.getvalue())
+        return BatchFileResult(
+            source_file=source_file,
+            output_file=output_file,
+            status="succeeded",
+            row_count=transformed_data.height,
+            duration_ms=(time.perf_counter() - start) * 1000,
+        )
+    except Exception as e:
+        error = e.detail if isinstance(e, HTTPException) else str(e)
+        return BatchFileResult(
+            source_file=source_file,
+            status="failed",
+            error=error,
+            duration_ms=(time.perf_counter() - start) * 1000,
+        )
+
+
+def execute_job(queue: JobQueue, job: ClaimedJob, batch_rows: int) -> None:
+    """
+    Run a queued transform job chunk by chunk.
+
+    Runs in a job worker process. The source is scanned in chunks of
+    `batch_rows` rows; every chunk is transformed, appended to a local result
+    file and reported as progress, so memory stays flat however large the
+    source is. The result is then stored under the job's output key. Failures
+    are recorded on the job instead of raised.
+
+    The lease is renewed while the source is fetched and the result uploaded,
+    and the job is dropped as soon as an update shows another worker took it
+    over, so it never writes over the newer run.
+    """
+    plan = job.plan
+    store = get_object_store(plan.storage)
+
+    def report(rows_processed: int, bytes_processed: int, **kwargs) -> None:
+        if not queue.update_progress(
+            job.job_id, job.worker_id, rows_processed, bytes_processed, **kwargs
+        ):
+            raise LeaseLost(job.job_id)
+
+    fd, result_path = tempfile.mkstemp(suffix=".csv")
+    try:
+        with queue.renewing_lease(job):
+            source_bytes = store.head(plan.source_file).size
+            columns = required_input_columns(plan.config.nodes, plan.evaluate_node_id)
+            lf = project_scan(store.scan_csv(plan.source_file), columns, None)
+        report(0, 0, source_bytes=source_bytes)
+
+        nodes = plan_nodes(plan.config.nodes, plan.evaluate_node_id)
+        rows_processed = bytes_processed = 0
+        with os.fdopen(fd, "wb") as result_file:
+            for chunk in lf.collect_batches(chunk_size=batch_rows):
+                transformed_data = run_plan(nodes, chunk)
+                buffer = io.BytesIO()
+                transformed_data.write_csv(buffer, include_header=bytes_processed == 0)
+                data = buffer.getvalue()
+                result_file.write(data)
+                rows_processed += chunk.height
+                bytes_processed += len(data)
+                report(rows_processed, bytes_processed)
+
+        with queue.renewing_lease(job):
+            store.put_file(plan.output_file, Path(result_path))
+        if not queue.complete(job.job_id, job.worker_id, store.location(plan.output_file)):
+            raise LeaseLost(job.job_id)
+    except LeaseLost:
+        logger.warning("Lost job to another worker", job_id=job.job_id)
+    except Exception as e:
+        queue.fail(
+            job.job_id, job.worker_id, e.detail if isinstance(e, HTTPException) else str(e)
+        )
+    finally:
+        Path(result_path).unlink(missing_ok=True)
+
+
+async def run_batch_transform(
+    config: TransformationConfig,
+    evaluate_node_id: Optional[str],
+    store: ObjectStore,
+    input_prefix: str,
+    max_workers: int,
+) -> list[BatchFileResult]:
+    """
+    Transform every CSV file under a prefix on the execution pool.
+
+    Each input `<input_prefix>/<path>.csv` is written to
+    `<output_file_prefix_path>/<path>.csv`, subdirectories included. Inputs
+    whose output key isn't allowed fail without being transformed.
+
+    Args:
+        config: Transformation configuration to apply to each file
+        evaluate_node_id: ID of the node whose output is written
+        store: Store holding both inputs and outputs
+        input_prefix: Prefix to list input files from
+        max_workers: Maximum number of files transformed concurrently
+
+    Returns:
+        One result per input file, in key order
+
+    Raises:
+        HTTPException: If the output prefix overlaps the input prefix or is
+            not allowed
+    """
+    check_batch_prefixes(input_prefix, config.output_file_prefix_path)
+    objects = await asyncio.to_thread(store.list_objects, input_prefix)
+    sources = [o for o in objects if o.key.lower().endswith(".csv")]
+    if not sources:
+        return []
+    source_files = [o.key for o in sources]
+
+    config_json = config.model_dump_json()
+    workers = min(max_workers, len(source_files))
+    # Any `workers` files may run at once; use fewer workers when the
+    # largest ones wouldn't fit in the memory budget together
+    columns = required_input_columns(config.nodes, evaluate_node_id)
+    estimates = await asyncio.to_thread(
+        lambda: [
+            estimate_memory(store, o.key, columns=columns, info=o)
+            for o in sorted(sources, key=lambda o: o.size, reverse=True)[:workers]
+        ]
+    )
+    while workers > 1 and sum(estimates[:workers]) > admission.limit(EXECUTION):
+        workers -= 1
+    logger.info(
+        "Starting batch transform",
+        prefix=input_prefix,
+        files=len(source_files),
+        workers=workers,
     )
+    # The shared execution pool runs the files; at most `workers` at a time
+    slots = asyncio.Semaphore(workers)
 
-    # If this is a preview request, convert the result to CSV
-    preview_csv_data = None
-    if request.preview:
-        preview_csv_data = convert_to_csv(transformed_data)
-    return TransformDataResponse(
-        transformed_data=transformed_data.to_csv(index=False),
-        preview_csv_data=preview_csv_data,
+    async def run(source_file: str) -> BatchFileResult:
+        output_file = posixpath.join(
+            config.output_file_prefix_path, batch_output_key(input_prefix, source_file)
+        )
+        try:
+            check_output_file(config.output_file_prefix_path, output_file)
+        except HTTPException as e:
+            return BatchFileResult(
+                source_file=source_file, status="failed", error=e.detail, duration_ms=0
+            )
+        async with slots:
+            return await execution_pool.run(
+                transform_file, config_json, evaluate_node_id, store, source_file, output_file
+            )
+
+    async with admission.admit(sum(estimates[:workers]), EXECUTION):
+        return await asyncio.gather(*[run(source_file) for source_file in source_files])
+
+
+def batch_output_key(input_prefix: str, source_file: str) -> str:
+    """
+    Get the key of a batch input relative to the directory of the prefix.
+
+    Nested inputs keep their subdirectories, so `in/a/x.csv` and `in/b/x.csv`
+    don't write to the same output. A prefix that doesn't end in "/" may end
+    within a name (`in/2024-01` lists `in/2024-01-02.csv`), so keys are taken
+    relative to the directory holding it, never to part of a name.
+    """
+    directory = input_prefix[: input_prefix.rfind("/") + 1]
+    return source_file[len(directory):]
+
+
+@router.post(
+    "/transform/batch",
+    response_model=BatchTransformResponse,
+    summary="Transform all files under a prefix",
+    description="Apply a transformation configuration to every CSV file under the input prefix in parallel",
+)
+async def transform_batch(request: BatchTransformRequest):
+    config = resolve_config(request.config_id, request.config)
+    store = get_object_store(request.storage)
+    max_workers = min(
+        request.max_workers or settings.BATCH_MAX_WORKERS, settings.BATCH_MAX_WORKERS
+    )
+
+    results = await run_batch_transform(
+        config,
+        request.evaluate_node_id,
+        store,
+        request.input_prefix or config.input_file_prefix_path,
+        max_workers,
+    )
+    succeeded = sum(1 for r in results if r.status == "succeeded")
+    return BatchTransformResponse(
+        results=results, succeeded=succeeded, failed=len(results) - succeeded
     )
 
 
 def apply_transformation(
     nodes: list[GraphNode],
-    input_data: pd.DataFrame,
+    input_data: "pl.DataFrame",
     evaluate_node_id: Optional[str] = None,
-) -> pd.DataFrame:
+) -> "pl.DataFrame":
     """
     Apply a transformation configuration to input data.
 
@@ -239,6 +873,17 @@ def apply_transformation(
     Returns:
         Transformed data
     """
+    return run_plan(plan_nodes(nodes, evaluate_node_id), input_data)
+
+
+def plan_nodes(nodes: list[GraphNode], evaluate_node_id: Optional[str]) -> list[GraphNode]:
+    """
+    Get the nodes needed to evaluate a node, in execution order.
+
+    Raises:
+        HTTPException: If the node is not part of the configuration
+        ValueError: If the nodes contain a cycle
+    """
     node_map = map_node_id_to_node(nodes)
     evaluate_node = node_map.get(evaluate_node_id, None)
     if not evaluate_node:
@@ -246,64 +891,90 @@ def apply_transformation(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Node with ID {evaluate_node_id} not found in configuration",
         )
-    relevant_tree = select_subtree(evaluate_node, node_map)
-    sorted_nodes = topological_sort(relevant_tree)
+    with span("select_subtree", node_id=evaluate_node_id):
+        relevant_tree = select_subtree(evaluate_node, node_map)
+    with span("topological_sort"):
+        return topological_sort(relevant_tree)
+
+
+def run_plan(sorted_nodes: list[GraphNode], input_data: "pl.DataFrame") -> "pl.DataFrame":
+    """
+    Apply nodes in execution order to input data.
+
+    Args:
+        sorted_nodes: Nodes as returned by `plan_nodes`
+        input_data: Input data to transform
 
-    # Apply the transformation
-    df = pd.DataFrame()
+    Returns:
+        Output of the last node
+    """
+    df = pl.DataFrame()
     for node in sorted_nodes:
-        if node.type == NodeType.INPUT:
-            # We assume we will only have one input node.
-            # If there is already data in the current frame, we extend this data by duplication.
-            if df.empty:
-                df = input_data
-            else:
-                # The current dataframe will only contain constants.
-                # Join to put the constant in every row.
-                df = df.join(input_data, how="cross")
-            # Rename the columns to a combo of node-id and handle-id
-            name_mapping = {
-                node.manual_values.column_names[i]: f"{node.id}-column-{i}"
-                for i in range(len(node.manual_values.column_names))
-            }
-            df.rename(columns=name_mapping, inplace=True)
-        elif node.type == NodeType.CONSTANT:
-            # If the dataframe is empty, we fill in one row with the constant value.
-            if df.empty:
-                df = pd.DataFrame({node.id: [node.manual_values.constant]})
-            else:
-                df[node.id] = node.manual_values.constant
-        elif node.type == NodeType.STRING_CONCAT:
-            # handle to input:
-            inputs = {handle.target_handle: handle for handle in node.inputs}
-            input_1 = node.manual_values.input_1
-            input_2 = node.manual_values.input_2
-            if "input-1" in inputs:
-                input_1 = df[
-                    f"{inputs['input-1'].source_node}-{inputs['input-1'].source_handle}"
-                ]
-            if "input-2" in inputs:
-                input_2 = df[
-                    f"{inputs['input-2'].source_node}-{inputs['input-2'].source_handle}"
-                ]
-
-            df[f"{node.id}-output"] = input_1 + node.manual_values.separator + input_2
-        elif node.type == NodeType.OUTPUT:
-            # handle to input:
-            inputs = {
-                f"{handle.source_node}-{handle.source_handle}": handle.target_handle
-                for handle in node.inputs
-            }
-            # Drop columns that aren't mapped to outputs
-            columns_to_keep = list(inputs.keys())
-            df = df[columns_to_keep]
-            df.rename(columns=inputs, inplace=True)
+        start = time.perf_counter()
+        with span("node", node_id=node.id, operator=node.type.value):
+            df = _apply_node(node, df, input_data)
+        OPERATOR_DURATION.observe(time.perf_counter() - start, operator=node.type.value)
+        OPERATOR_ROWS.inc(df.height, operator=node.type.value)
+    return df
+
 
+def _apply_node(node: GraphNode, df: "pl.DataFrame", input_data: "pl.DataFrame") -> "pl.DataFrame":
+    """Apply a single node to the frame built by the nodes before it."""
+    if node.type == NodeType.INPUT:
+        # We assume we will only have one input node.
+        # If there is already data in the current frame, we extend this data by duplication.
+        if df.width == 0:
+            df = input_data
         else:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Unsupported node type: {node.type}",
+            # The current dataframe will only contain constants.
+            # Join to put the constant in every row.
+            df = df.join(input_data, how="cross")
+        # Rename the columns to a combo of node-id and handle-id; columns
+        # left out of the read are skipped
+        name_mapping = {
+            node.manual_values.column_names[i]: f"{node.id}-column-{i}"
+            for i in range(len(node.manual_values.column_names))
+        }
+        df = df.rename(name_mapping, strict=False)
+    elif node.type == NodeType.CONSTANT:
+        # If the dataframe is empty, we fill in one row with the constant value.
+        if df.width == 0:
+            df = pl.DataFrame({node.id: [node.manual_values.constant]})
+        else:
+            df = df.with_columns(pl.lit(node.manual_values.constant).alias(node.id))
+    elif node.type == NodeType.STRING_CONCAT:
+        # handle to input:
+        inputs = {handle.target_handle: handle for handle in node.inputs}
+        input_1 = pl.lit(node.manual_values.input_1)
+        input_2 = pl.lit(node.manual_values.input_2)
+        if "input-1" in inputs:
+            input_1 = pl.col(
+                f"{inputs['input-1'].source_node}-{inputs['input-1'].source_handle}"
+            )
+        if "input-2" in inputs:
+            input_2 = pl.col(
+                f"{inputs['input-2'].source_node}-{inputs['input-2'].source_handle}"
             )
+
+        df = df.with_columns(
+            pl.concat_str(
+                [input_1, pl.lit(node.manual_values.separator), input_2]
+            ).alias(f"{node.id}-output")
+        )
+    elif node.type == NodeType.OUTPUT:
+        # handle to input:
+        inputs = {
+            f"{handle.source_node}-{handle.source_handle}": handle.target_handle
+            for handle in node.inputs
+        }
+        # Drop columns that aren't mapped to outputs
+        df = df.select([pl.col(source).alias(target) for source, target in inputs.items()])
+
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Unsupported node type: {node.type}",
+        )
     return df
 
 
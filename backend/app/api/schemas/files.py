@@ -1,17 +1,89 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Literal, Optional
 from pydantic import BaseModel, Field
 
 from .operator import Operator
 
 
+class ColumnType(BaseModel):
+    """Type inferred for a column of an uploaded file."""
+
+    type: Literal[
+        "string", "integer", "float", "boolean", "date", "datetime", "categorical"
+    ] = Field(description="Inferred type")
+    format: Optional[str] = Field(
+        None, description="strftime format of date and datetime values"
+    )
+
+
+class ColumnStatistics(BaseModel):
+    """Statistics for a single column of an uploaded file."""
+
+    null_count: int = Field(description="Number of missing values")
+    min: Any = Field(None, description="Smallest value")
+    max: Any = Field(None, description="Largest value")
+    distinct_count: Optional[int] = Field(
+        None, description="Approximate number of distinct values"
+    )
+
+
+ProfileStatus = Literal["profiling", "ready", "failed"]
+
+
 class FileUploadResponse(BaseModel):
     """Response model for file upload."""
 
     file_id: str = Field(description="Unique identifier for the uploaded file")
     filename: str = Field(description="Original filename")
     file_path: str = Field(description="Path where file is stored")
-    row_count: int = Field(description="Number of rows in the file")
+    size_bytes: int = Field(description="Size of the file in bytes")
+    content_hash: str = Field(description="SHA-256 hex digest of the file contents")
+    row_count: Optional[int] = Field(
+        None, description="Number of rows in the file, once profiled"
+    )
     columns: List[str] = Field(description="List of column headers extracted from CSV")
+    status: ProfileStatus = Field(
+        "ready", description="Whether the file is still being profiled"
+    )
+    progress: float = Field(
+        1.0, ge=0, le=1, description="Fraction of the profiling work done"
+    )
+    error: Optional[str] = Field(None, description="Why profiling failed")
+    column_types: Optional[Dict[str, ColumnType]] = Field(
+        None, description="Column types inferred from a sample, keyed by column name"
+    )
+    column_stats: Optional[Dict[str, ColumnStatistics]] = Field(
+        None, description="Per-column statistics, keyed by column name"
+    )
+
+
+class FileStatusResponse(BaseModel):
+    """Response model for the profiling status of an uploaded file."""
+
+    file_id: str = Field(description="ID of the file")
+    status: ProfileStatus = Field(description="Whether the file is still being profiled")
+    progress: float = Field(description="Fraction of the profiling work done")
+    error: Optional[str] = Field(None, description="Why profiling failed")
+
+
+class FilePinResponse(BaseModel):
+    """Response model for pinning or unpinning a file."""
+
+    file_id: str = Field(description="ID of the file")
+    pinned: bool = Field(description="Whether the file is protected from eviction")
+
+
+class StorageUsage(BaseModel):
+    """Disk usage of the upload directory."""
+
+    budget_bytes: int = Field(description="Disk budget before files are evicted")
+    used_bytes: int = Field(description="Total bytes used")
+    blob_bytes: int = Field(description="Bytes used by uploaded file contents")
+    cache_bytes: int = Field(description="Bytes used by derived caches")
+    other_bytes: int = Field(
+        description="Bytes used by everything else (registry, temporary files, outputs)"
+    )
+    blob_count: int = Field(description="Number of stored file contents")
+    pinned_count: int = Field(description="Number of pinned file contents")
 
 
 class GenerateNodeTemplateRequest(BaseModel):
@@ -35,6 +107,7 @@ class CSVPreviewRequest(BaseModel):
     """Request model for CSV preview."""
 
     file_id: str = Field(description="ID of the file to preview")
+    offset: int = Field(default=0, ge=0, description="Index of the first row to preview")
     limit: int = Field(
         default=20, ge=1, le=100, description="Number of rows to preview"
     )
@@ -48,4 +121,5 @@ class CSVPreviewResponse(BaseModel):
     total_rows: Optional[int] = Field(
         None, description="Total number of rows in file if known"
     )
+    offset: int = Field(default=0, description="Index of the first row in this preview")
     preview_limit: int = Field(description="Number of rows in this preview")
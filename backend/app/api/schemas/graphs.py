@@ -56,10 +56,23 @@ class PreviewGraphRequest(BaseModel):
     """Request model for graph preview."""
     graph: ExportedGraph = Field(description="Exported graph from frontend")
     preview_limit: int = Field(default=20, ge=1, le=100, description="Number of rows to preview")
+    profile: bool = Field(default=False, description="Include an execution profile of every executed node")
+
+
+class NodeProfile(BaseModel):
+    """Execution profile of a single node."""
+    node_id: str
+    type: str
+    wall_time_ms: float = Field(description="Time spent executing the node")
+    input_rows: Optional[int] = Field(None, description="Rows available to the node, if known")
+    output_rows: int = Field(description="Rows the node produced")
+    output_bytes: int = Field(description="Estimated in-memory size of the node's output")
+    cached: bool = Field(description="Whether the node read from a cache instead of its source")
 
 
 class PreviewGraphResponse(BaseModel):
     """Response model for graph preview."""
     preview_data: Dict[str, Any] = Field(description="Preview results for each node")
     operations: List[Dict[str, Any]] = Field(description="Operations that would be executed")
-    metadata: Dict[str, Any] = Field(description="Processing metadata") 
\ No newline at end of file
+    metadata: Dict[str, Any] = Field(description="Processing metadata")
+    profile: Optional[List[NodeProfile]] = Field(None, description="Per-node execution profile, when requested") 
\ No newline at end of file
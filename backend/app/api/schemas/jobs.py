@@ -0,0 +1,80 @@
+from datetime import datetime
+from typing import Literal, Optional
+
+from pydantic import BaseModel, ConfigDict, Field
+
+from app.api.schemas.transform import TransformationConfig
+
+JobStatus = Literal["queued", "running", "succeeded", "failed"]
+
+
+class JobRequest(BaseModel):
+    """Request model for enqueueing a transform job."""
+
+    config_id: Optional[str] = Field(
+        None,
+        description="ID of a saved transformation config. Mutually exclusive with 'config' field",
+    )
+    config: Optional[TransformationConfig] = Field(
+        None,
+        description="Direct transformation config object. Mutually exclusive with 'config_id' field",
+    )
+    evaluate_node_id: Optional[str] = Field(
+        None,
+        description="Node ID for which to evaluate and write output",
+    )
+    source_file: Optional[str] = Field(
+        None,
+        description="Path to the source file to transform. If not provided, uses the latest file from input_file_prefix_path",
+    )
+    output_file: Optional[str] = Field(
+        None,
+        description="Key to write the result to, under output_file_prefix_path. Defaults to <output_file_prefix_path>/<job_id>.csv",
+    )
+    storage: Optional[Literal["s3", "local"]] = Field(
+        None,
+        description="Storage backend holding the source and output files. Defaults to the configured backend",
+    )
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "config_id": "customer-data-transform-v1",
+                "evaluate_node_id": "output-1",
+            }
+        }
+    )
+
+
+class JobPlan(BaseModel):
+    """A transform with every input resolved, as stored in the job queue."""
+
+    config: TransformationConfig
+    evaluate_node_id: Optional[str] = None
+    storage: Literal["s3", "local"]
+    source_file: str
+    output_file: str
+
+
+class JobInfo(BaseModel):
+    """Status and progress of a transform job."""
+
+    job_id: str
+    status: JobStatus
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    rows_processed: int = Field(0, description="Number of source rows transformed so far")
+    bytes_processed: int = Field(0, description="Number of result bytes written so far")
+    source_bytes: Optional[int] = Field(None, description="Size of the source file")
+    result_location: Optional[str] = Field(
+        None, description="Where the result was written, once the job succeeded"
+    )
+    error: Optional[str] = Field(None, description="Error message if the job failed")
+
+
+class JobListResponse(BaseModel):
+    """Response model for listing jobs."""
+
+    jobs: list[JobInfo]
+    count: int
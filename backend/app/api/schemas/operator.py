@@ -36,11 +36,9 @@ class Output(BaseModel):
 
 
 class ConfigStep(BaseModel):
-    """Configuration step for an operator."""
-    id: str
-    type: str
-    name: str
-    description: str
+    """Configuration step for an operator: a DataFrame operation and its arguments."""
+    operation: str
+    kwargs: Dict[str, Any] = Field(default_factory=dict)
 
 
 class Config(BaseModel):
@@ -1,4 +1,4 @@
-from typing import Dict, List, Any, Optional, Union
+from typing import Dict, List, Any, Literal, Optional, Union
 from enum import Enum
 from pydantic import BaseModel, Field, ConfigDict
 
@@ -214,6 +214,10 @@ class TransformRequest(BaseModel):
         None,
         description="Path to the source file to use for transformation. If not provided, uses the latest file from input_file_prefix_path",
     )
+    storage: Optional[Literal["s3", "local"]] = Field(
+        None,
+        description="Storage backend holding the source file. Defaults to the configured backend",
+    )
 
     model_config = ConfigDict(
         json_schema_extra={
@@ -252,3 +256,64 @@ class TransformDataResponse(BaseModel):
             }
         }
     )
+
+
+class BatchTransformRequest(BaseModel):
+    """Request model for transforming every file under a prefix."""
+
+    config_id: Optional[str] = Field(
+        None,
+        description="ID of a saved transformation config. Mutually exclusive with 'config' field",
+    )
+    config: Optional[TransformationConfig] = Field(
+        None,
+        description="Direct transformation config object. Mutually exclusive with 'config_id' field",
+    )
+    evaluate_node_id: Optional[str] = Field(
+        None,
+        description="Node ID for which to evaluate and return output",
+    )
+    input_prefix: Optional[str] = Field(
+        None,
+        description="Prefix to list input files from. Defaults to the config's input_file_prefix_path",
+    )
+    storage: Optional[Literal["s3", "local"]] = Field(
+        None,
+        description="Storage backend holding the input and output files. Defaults to the configured backend",
+    )
+    max_workers: Optional[int] = Field(
+        None,
+        ge=1,
+        description="Maximum number of files transformed concurrently. Capped by BATCH_MAX_WORKERS",
+    )
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "config_id": "customer-data-transform-v1",
+                "evaluate_node_id": "output-1",
+                "max_workers": 4,
+            }
+        }
+    )
+
+
+class BatchFileResult(BaseModel):
+    """Outcome of transforming a single file in a batch."""
+
+    source_file: str = Field(description="Key of the input file")
+    output_file: Optional[str] = Field(
+        None, description="Key the transformed output was written to"
+    )
+    status: Literal["succeeded", "failed"]
+    row_count: Optional[int] = Field(None, description="Number of rows written")
+    error: Optional[str] = Field(None, description="Error message if the file failed")
+    duration_ms: float = Field(description="Time spent on this file")
+
+
+class BatchTransformResponse(BaseModel):
+    """Response model for a batch transformation."""
+
+    results: List[BatchFileResult]
+    succeeded: int
+    failed: int
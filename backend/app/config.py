@@ -1,7 +1,21 @@
+import os
+import tempfile
+from typing import Optional
+
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
+def _state_path(name: str) -> str:
+    """
+    Default path of a state file: in the upload directory, or in the
+    temporary directory on Lambda, where the package directory is read-only.
+    """
+    if "AWS_LAMBDA_FUNCTION_NAME" in os.environ:
+        return os.path.join(tempfile.gettempdir(), "transformat", name)
+    return os.path.join("uploads", name)
+
+
 class Settings(BaseSettings):
     """
     Application settings loaded from environment variables.
@@ -38,6 +52,108 @@ class Settings(BaseSettings):
     # AWS Configuration
     AWS_REGION: str = "eu-west-1"
 
+    # Storage Configuration
+    # Backend used by execution paths that don't specify one: "s3" or "local"
+    STORAGE_BACKEND: str = Field(default="s3")
+    S3_BUCKET: Optional[str] = Field(default=None)
+    LOCAL_STORAGE_ROOT: str = Field(default="uploads")
+
+    # Upload Configuration
+    # Uploads larger than this are rejected with 413 while streaming
+    MAX_UPLOAD_BYTES: int = Field(default=2 * 1024**3)
+    # Number of rows between two entries of an upload's row offset index
+    ROW_INDEX_STRIDE: int = Field(default=10_000)
+    # Number of leading rows column types are inferred from
+    TYPE_INFERENCE_SAMPLE_ROWS: int = Field(default=10_000)
+    # Disk budget of the upload directory; least recently used data beyond it
+    # is evicted
+    STORAGE_BUDGET_BYTES: int = Field(default=20 * 1024**3)
+    # SQLite database registering uploads, shared by all workers; opened on
+    # first use
+    FILE_REGISTRY_PATH: str = Field(default_factory=lambda: _state_path(".registry.db"))
+    # Background threads profiling uploads (row count, types, columnar copy)
+    PROFILING_MAX_WORKERS: int = Field(default=2)
+
+    # Execution Configuration
+    # Worker processes running previews and node updates
+    INTERACTIVE_MAX_WORKERS: int = Field(default=2)
+    # Worker processes running full transforms
+    EXECUTION_MAX_WORKERS: int = Field(default=2)
+
+    # Number of rows per chunk of a streamed result
+    STREAM_BATCH_ROWS: int = Field(default=10_000)
+
+    # Admission Configuration
+    # Estimated memory all executing transforms of a worker may use together
+    EXECUTION_MEMORY_BUDGET_BYTES: int = Field(default=4 * 1024**3)
+    # Part of the budget kept free for previews
+    PREVIEW_MEMORY_RESERVE_BYTES: int = Field(default=512 * 1024**2)
+    # Seconds a request waits for memory before it is rejected with 503
+    ADMISSION_QUEUE_TIMEOUT: float = Field(default=30.0)
+    # In-memory size of a transform relative to the CSV bytes it reads
+    ADMISSION_MEMORY_FACTOR: float = Field(default=4.0)
+
+    # Job Configuration
+    # Queue backend for long-running transform jobs: "sqlite"
+    JOB_QUEUE_BACKEND: str = Field(default="sqlite")
+    # SQLite database holding the queue, shared by the API and job workers
+    JOB_QUEUE_PATH: str = Field(default_factory=lambda: _state_path(".jobs.db"))
+    # Worker processes running queued jobs; 0 leaves jobs to workers started
+    # with `python -m app.services.job_workers`
+    JOB_WORKERS: int = Field(default=2)
+    # Seconds an idle worker waits before checking the queue again
+    JOB_POLL_INTERVAL: float = Field(default=1.0)
+    # Seconds a running job may go without progress before another worker
+    # takes it over
+    JOB_LEASE_SECONDS: float = Field(default=300.0)
+    # Number of source rows transformed and written at a time
+    JOB_BATCH_ROWS: int = Field(default=50_000)
+
+    # Metrics Configuration
+    # Directory where every process writes its metrics for /metrics to merge;
+    # shared by all workers of a server
+    METRICS_DIR: str = Field(default=os.path.join(tempfile.gettempdir(), "transformat-metrics"))
+    # Seconds between two writes of a process's metrics
+    METRICS_FLUSH_INTERVAL: float = Field(default=1.0)
+    # Seconds between two event loop lag measurements
+    EVENT_LOOP_LAG_INTERVAL: float = Field(default=1.0)
+
+    # Tracing Configuration
+    # Where spans of every request are exported: "none", "jsonl" or "chrome"
+    # (Chrome trace events, for Perfetto or chrome://tracing)
+    TRACE_EXPORTER: str = Field(default="none")
+    # File spans are appended to, by all processes
+    TRACE_PATH: str = Field(default="traces/spans.jsonl")
+
+    # Batch Configuration
+    # Upper bound on files a single batch transform runs at once on the execution pool
+    BATCH_MAX_WORKERS: int = Field(default=4)
+
+    # Warm Cache Configuration
+    # Local copies of S3 objects, revalidated by ETag on every read; on Lambda
+    # the temp directory is the function's ephemeral storage
+    OBJECT_CACHE_DIR: str = Field(
+        default=os.path.join(tempfile.gettempdir(), "transformat-objects")
+    )
+    # Bytes of S3 objects kept locally; unset uses half of the ephemeral
+    # storage on Lambda and turns the cache off elsewhere, 0 turns it off
+    OBJECT_CACHE_MAX_BYTES: Optional[int] = Field(default=None)
+    # Bytes of compiled transform plans kept per process; unset uses 1/32 of
+    # the function's (or machine's) memory
+    PLAN_CACHE_MAX_BYTES: Optional[int] = Field(default=None)
+
+    # Dataset Cache Configuration
+    # Decoded sources shared by every process of the host, as Arrow IPC files
+    # that readers memory-map; a tmpfs like /dev/shm keeps them in shared memory
+    DATASET_CACHE_DIR: str = Field(
+        default="/dev/shm/transformat-datasets"
+        if os.path.isdir("/dev/shm")
+        else os.path.join(tempfile.gettempdir(), "transformat-datasets")
+    )
+    # Bytes of decoded sources kept; unset uses 1 GiB, capped at half of the
+    # filesystem holding DATASET_CACHE_DIR, 0 turns the cache off
+    DATASET_CACHE_MAX_BYTES: Optional[int] = Field(default=None)
+
     @property
     def is_development(self) -> bool:
         """Check if the application is running in development mode."""
@@ -48,6 +164,11 @@ class Settings(BaseSettings):
         """Check if the application is running in production mode."""
         return self.ENVIRONMENT.lower() == "production"
 
+    @property
+    def is_lambda(self) -> bool:
+        """Check if the application is running on AWS Lambda."""
+        return "AWS_LAMBDA_FUNCTION_NAME" in os.environ
+
     model_config = SettingsConfigDict(
         env_file=".env", env_file_encoding="utf-8", case_sensitive=True, extra="ignore"
     )
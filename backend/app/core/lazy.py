@@ -0,0 +1,47 @@
+import importlib.util
+import sys
+from types import ModuleType
+from typing import Set
+
+# Modules lazy_import created, which stay unloaded until first used
+_lazy_modules: Set[str] = set()
+
+
+def lazy_import(name: str) -> ModuleType:
+    """
+    Import a module on first attribute access instead of right away.
+
+    Keeps heavy libraries (polars, numpy, pyarrow) out of the import
+    of the application, so a cold Lambda start only pays for the libraries
+    the request it handles actually uses. Annotations naming the module's
+    types must be quoted, or evaluating them loads the module.
+
+    Args:
+        name: Name of a top-level module, e.g. "polars"
+
+    Returns:
+        The module, loaded when one of its attributes is first used
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    _lazy_modules.add(name)
+    return module
+
+
+def is_loaded(name: str) -> bool:
+    """Whether a module was imported and, if lazy, actually loaded."""
+    module = sys.modules.get(name)
+    if module is None:
+        return False
+    # LazyLoader turns a module into a plain module when it loads; checking
+    # anything else about it would load it
+    return name not in _lazy_modules or type(module) is ModuleType
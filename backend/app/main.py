@@ -1,15 +1,26 @@
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+import asyncio
+import time
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.routes import api_router
 from app.config import settings
 from app.logger import configure_logging, get_logger
-from dotenv import load_dotenv
+from app.services.execution_pool import execution_pool, interactive_pool
+from app.services.job_workers import job_workers
+from app.services.metrics import REQUEST_DURATION, monitor_event_loop_lag
+from app.services.tracing import trace
 import os
 
-# Load environment variables from .env file in parent directory
-load_dotenv(os.path.join(os.path.dirname(os.path.dirname(__file__)), ".env"))
+# Load environment variables from .env file in parent directory; deployments
+# without one (e.g. Lambda) skip importing dotenv
+ENV_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), ".env")
+if os.path.exists(ENV_FILE):
+    from dotenv import load_dotenv
+
+    load_dotenv(ENV_FILE)
 
 # Configure logging first
 configure_logging()
@@ -27,11 +38,22 @@ async def lifespan(app: FastAPI):
         version=settings.APP_VERSION,
         environment=settings.ENVIRONMENT,
     )
+    # Spawn the workers now rather than on the first request
+    await interactive_pool.start()
+    await execution_pool.start()
+    job_workers.start()
+    lag_monitor = asyncio.create_task(
+        monitor_event_loop_lag(settings.EVENT_LOOP_LAG_INTERVAL)
+    )
     yield
+    lag_monitor.cancel()
     logger.info(
         "Application shutting down",
         app_name=settings.APP_NAME,
     )
+    interactive_pool.shutdown()
+    execution_pool.shutdown()
+    job_workers.stop()
 
 
 # Create FastAPI app
@@ -54,6 +76,54 @@ app.add_middleware(
     allow_headers=settings.CORS_ALLOW_HEADERS,
 )
 
+
+def route_template(request: Request) -> str:
+    """Get the path template of the route that handled a request."""
+    # Included routers only know their own prefix; FastAPI records the full
+    # path of the matched route in its scope extension
+    context = request.scope.get("fastapi", {}).get("effective_route_context")
+    if getattr(context, "path", None):
+        return context.path
+    return getattr(request.scope.get("route"), "path", "unmatched")
+
+
+@app.middleware("http")
+async def record_request_duration(request: Request, call_next):
+    """Record the latency of every request under its route template."""
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        REQUEST_DURATION.observe(
+            time.perf_counter() - start,
+            method=request.method,
+            route=route_template(request),
+            status=str(status_code),
+        )
+
+
+
+@app.middleware("http")
+async def trace_request(request: Request, call_next):
+    """
+    Run every request in its own trace.
+
+    Spans of the request, including those of pool workers, share the trace
+    ID; log lines carry it and the response returns it as X-Trace-Id.
+    """
+    with trace(
+        f"{request.method} {request.url.path}",
+        method=request.method,
+        path=request.url.path,
+    ) as trace_id:
+        response = await call_next(request)
+        response.headers["X-Trace-Id"] = trace_id
+        return response
+
+
 # Include API router with prefix
 app.include_router(api_router, prefix=f"{settings.API_PREFIX}{settings.API_V1_PREFIX}")
 
@@ -0,0 +1,200 @@
+import asyncio
+import io
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Deque, Dict, List, Optional
+
+from fastapi import HTTPException, status
+
+from app.config import settings
+from app.core.lazy import lazy_import
+from app.logger import get_logger
+from app.services.storage import ObjectInfo, ObjectStore
+
+pl = lazy_import("polars")
+
+logger = get_logger("services.admission")
+
+PREVIEW = "preview"
+EXECUTION = "execution"
+# Lanes in order of priority
+LANES = [PREVIEW, EXECUTION]
+
+# Leading bytes of a source read to find its columns and average row size
+SAMPLE_BYTES = 64 * 1024
+# Smallest reservation, covering per-request overhead
+MIN_ESTIMATE_BYTES = 1024 * 1024
+
+
+def estimate_memory(
+    store: ObjectStore,
+    source_file: str,
+    columns: Optional[List[str]] = None,
+    limit: Optional[int] = None,
+    info: Optional[ObjectInfo] = None,
+) -> int:
+    """
+    Estimate the peak memory of transforming a stored CSV file.
+
+    The size comes from the object metadata (ContentLength on S3) and is
+    scaled down to the projected columns and, for previews, to the rows read,
+    using the header and average row size of the first SAMPLE_BYTES. The
+    result is multiplied by ADMISSION_MEMORY_FACTOR to account for parsed
+    values taking more space than their text.
+
+    Args:
+        store: Store holding the file
+        source_file: Key of the file
+        columns: Columns the plan reads, or None for all
+        limit: Maximum number of rows read
+        info: Metadata of the file if already known, saves a HEAD request
+
+    Returns:
+        Estimated number of bytes
+    """
+    size = (info or store.head(source_file)).size
+    sample = store.read_bytes(source_file, max_bytes=SAMPLE_BYTES) if size else b""
+    header_end = sample.find(b"\n") + 1 or len(sample)
+    data_bytes = size - header_end
+
+    if limit is not None:
+        sample_rows = sample.count(b"\n", header_end)
+        if sample_rows:
+            row_bytes = (sample.rfind(b"\n") + 1 - header_end) / sample_rows
+            data_bytes = min(data_bytes, int(limit * row_bytes))
+
+    if columns is not None and header_end:
+        header = pl.read_csv(io.BytesIO(sample[:header_end]), n_rows=0).columns
+        if header:
+            projected = sum(1 for column in header if column in columns)
+            data_bytes = data_bytes * projected // len(header)
+
+    return max(int(data_bytes * settings.ADMISSION_MEMORY_FACTOR), MIN_ESTIMATE_BYTES)
+
+
+@dataclass
+class _Waiter:
+    estimate: int
+    granted: asyncio.Future
+
+
+class AdmissionController:
+    """
+    Limits the estimated memory of the work executing at once.
+
+    Requests reserve their estimated footprint before they execute and
+    release it when done. When the budget is used up they wait in their lane
+    for up to `queue_timeout` seconds and are then rejected with 503. Work
+    that could never fit is rejected with 413 right away.
+
+    There are two lanes. Previews may use the whole budget, while executions
+    leave `preview_reserve_bytes` free for them; freed memory goes to waiting
+    previews first, so a preview never queues behind a full transform.
+    """
+
+    def __init__(self, budget_bytes: int, preview_reserve_bytes: int, queue_timeout: float):
+        """
+        Args:
+            budget_bytes: Memory budget for all executing work
+            preview_reserve_bytes: Part of the budget only previews may use
+            queue_timeout: Seconds a request may wait for memory
+        """
+        self.budget_bytes = budget_bytes
+        self.preview_reserve_bytes = preview_reserve_bytes
+        self.queue_timeout = queue_timeout
+        self.in_use = 0
+        self._waiting: Dict[str, Deque[_Waiter]] = {lane: deque() for lane in LANES}
+
+    def limit(self, lane: str) -> int:
+        """Memory a lane may use, in bytes."""
+        if lane == PREVIEW:
+            return self.budget_bytes
+        return self.budget_bytes - self.preview_reserve_bytes
+
+    def _can_start(self, lane: str, estimate: int) -> bool:
+        # Waiting work of this lane or a higher priority one goes first
+        ahead = any(self._waiting[other] for other in LANES[: LANES.index(lane) + 1])
+        return not ahead and self.in_use + estimate <= self.limit(lane)
+
+    @asynccontextmanager
+    async def admit(self, estimate: int, lane: str = EXECUTION) -> AsyncIterator[None]:
+        """
+        Reserve memory for the duration of the block, waiting if needed.
+
+        Args:
+            estimate: Estimated peak memory in bytes, see `estimate_memory`
+            lane: PREVIEW or EXECUTION
+
+        Raises:
+            HTTPException: 413 if the work can never fit, 503 if no memory
+                became available within the queue timeout
+        """
+        if estimate > self.limit(lane):
+            raise HTTPException(
+                status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+                detail=f"Estimated memory of {estimate} bytes exceeds the budget of "
+                f"{self.limit(lane)} bytes; submit it as a job instead",
+            )
+
+        if self._can_start(lane, estimate):
+            self.in_use += estimate
+        else:
+            await self._wait(estimate, lane)
+
+        try:
+            yield
+        finally:
+            self.in_use -= estimate
+            self._grant()
+
+    async def _wait(self, estimate: int, lane: str) -> None:
+        waiter = _Waiter(estimate, asyncio.get_running_loop().create_future())
+        self._waiting[lane].append(waiter)
+        logger.info(
+            "Queued for memory", lane=lane, estimate=estimate, in_use=self.in_use
+        )
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.granted), self.queue_timeout)
+        except BaseException as e:
+            if waiter.granted.done():
+                # Granted just as we gave up
+                self.in_use -= estimate
+                self._grant()
+            else:
+                self._waiting[lane].remove(waiter)
+                waiter.granted.cancel()
+                # The head of the lane may have been blocking others
+                self._grant()
+            if isinstance(e, asyncio.TimeoutError):
+                logger.warning("Rejected for memory", lane=lane, estimate=estimate)
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Not enough memory available to execute the request, retry later",
+                    headers={"Retry-After": str(max(int(self.queue_timeout), 1))},
+                )
+            raise
+
+    def _grant(self) -> None:
+        """Admit waiting work, in lane priority order, while it fits."""
+        for lane in LANES:
+            waiting = self._waiting[lane]
+            while waiting and self.in_use + waiting[0].estimate <= self.limit(lane):
+                waiter = waiting.popleft()
+                self.in_use += waiter.estimate
+                waiter.granted.set_result(None)
+            if waiting:
+                # Lower priority lanes wait until this one is served
+                return
+
+    def queued(self, lane: str) -> int:
+        """Number of requests waiting in a lane."""
+        return len(self._waiting[lane])
+
+
+# Global instance
+admission = AdmissionController(
+    settings.EXECUTION_MEMORY_BUDGET_BYTES,
+    settings.PREVIEW_MEMORY_RESERVE_BYTES,
+    settings.ADMISSION_QUEUE_TIMEOUT,
+)
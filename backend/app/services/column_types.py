@@ -0,0 +1,191 @@
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from app.api.schemas.files import ColumnType
+from app.core.lazy import lazy_import
+from app.logger import get_logger
+
+pl = lazy_import("polars")
+
+logger = get_logger("services.column_types")
+
+# Temporal formats tried, in order, for date and datetime columns
+DATE_FORMATS = ["%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y"]
+DATETIME_FORMATS = [
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%dT%H:%M:%S",
+    "%d/%m/%Y %H:%M:%S",
+    "%d-%m-%Y %H:%M:%S",
+]
+
+# String columns with at most this many distinct values (and few compared to
+# the sample size) are stored as categoricals
+CATEGORICAL_MAX_DISTINCT = 64
+CATEGORICAL_MAX_DISTINCT_RATIO = 0.5
+
+STRING = ColumnType(type="string")
+
+
+def _parse(col: "pl.Expr", column_type: ColumnType, strict: bool) -> "pl.Expr":
+    match column_type.type:
+        case "integer":
+            return col.cast(pl.Int64, strict=strict)
+        case "float":
+            return col.cast(pl.Float64, strict=strict)
+        case "boolean":
+            mapping = {"true": True, "false": False}
+            if strict:
+                return col.replace_strict(mapping, return_dtype=pl.Boolean)
+            return col.replace_strict(mapping, default=None, return_dtype=pl.Boolean)
+        case "date":
+            return col.str.to_date(column_type.format, strict=strict)
+        case "datetime":
+            return col.str.to_datetime(column_type.format, strict=strict)
+        case "categorical":
+            return col.cast(pl.Categorical)
+    return col
+
+
+def _text(col: "pl.Expr", column_type: ColumnType) -> "pl.Expr":
+    if column_type.type in ("date", "datetime"):
+        return col.dt.to_string(column_type.format)
+    return col.cast(pl.String)
+
+
+def parse_expr(name: str, column_type: ColumnType) -> "pl.Expr":
+    """
+    Expression converting a string column to its native dtype.
+
+    The conversion is strict: it fails on values that don't fit the type.
+    """
+    return _parse(pl.col(name), column_type, strict=True)
+
+
+def text_expr(name: str, column_type: ColumnType) -> "pl.Expr":
+    """Expression converting a parsed column back to its original text."""
+    return _text(pl.col(name), column_type)
+
+
+def round_trip_expr(name: str, column_type: ColumnType) -> "pl.Expr":
+    """
+    Expression checking that every value of a string column converts to a
+    type and back to exactly the same text.
+
+    Values that don't parse count as not round-tripping instead of failing.
+    """
+    col = pl.col(name)
+    return (
+        _text(_parse(col, column_type, strict=False), column_type)
+        .eq_missing(col)
+        .all()
+        .alias(name)
+    )
+
+
+def _round_trips(values: "pl.Series", column_type: ColumnType) -> bool:
+    """Check that every value parses and converts back to exactly the same text."""
+    return values.to_frame("v").select(round_trip_expr("v", column_type)).item()
+
+
+def _infer_column_type(values: "pl.Series") -> ColumnType:
+    """Infer the type of a single string column from its non-null sample values."""
+    if values.len() == 0:
+        return STRING
+
+    candidates = [
+        ColumnType(type="integer"),
+        ColumnType(type="float"),
+        ColumnType(type="boolean"),
+        *[ColumnType(type="date", format=f) for f in DATE_FORMATS],
+        *[ColumnType(type="datetime", format=f) for f in DATETIME_FORMATS],
+    ]
+    for candidate in candidates:
+        if _round_trips(values, candidate):
+            return candidate
+
+    distinct = values.n_unique()
+    if (
+        distinct <= CATEGORICAL_MAX_DISTINCT
+        and distinct <= values.len() * CATEGORICAL_MAX_DISTINCT_RATIO
+    ):
+        return ColumnType(type="categorical")
+    return STRING
+
+
+def infer_column_types(
+    path: Union[str, Path], sample_rows: int
+) -> Dict[str, ColumnType]:
+    """
+    Infer column types from the first rows of a CSV file.
+
+    A column only gets a native type when every sampled value converts to it
+    and back to exactly the same text, so "001" stays a string and reading the
+    typed data back as text reproduces the file. Values past the sample can
+    still not fit; check the whole file with `verify_column_types` before
+    storing columns typed.
+
+    Args:
+        path: Path to the CSV file
+        sample_rows: Number of rows to sample
+
+    Returns:
+        Mapping of column name to inferred type
+    """
+    sample = pl.read_csv(path, n_rows=sample_rows, infer_schema=False)
+    return {
+        column: _infer_column_type(sample[column].drop_nulls())
+        for column in sample.columns
+    }
+
+
+def verify_column_types(
+    path: Union[str, Path], column_types: Dict[str, ColumnType]
+) -> Dict[str, ColumnType]:
+    """
+    Check inferred column types against every row of a CSV file.
+
+    Args:
+        path: Path to the CSV file
+        column_types: Types inferred from a sample, see `infer_column_types`
+
+    Returns:
+        The types, with columns holding any value that doesn't convert to its
+        type and back to exactly the same text (e.g. "007" or "1.50" past the
+        sample) turned back into strings
+    """
+    typed = {name: t for name, t in column_types.items() if t != STRING}
+    if not typed:
+        return dict(column_types)
+    fits = (
+        pl.scan_csv(path, infer_schema=False)
+        .select([round_trip_expr(name, t) for name, t in typed.items()])
+        .collect()
+        .row(0, named=True)
+    )
+    demoted = [name for name, ok in fits.items() if not ok]
+    if demoted:
+        logger.info("Values past the sample don't fit their type", columns=demoted)
+    return {name: STRING if name in demoted else t for name, t in column_types.items()}
+
+
+def parse_exprs(column_types: Dict[str, ColumnType]) -> "List[pl.Expr]":
+    """Expressions converting string columns to their inferred types."""
+    return [parse_expr(name, t) for name, t in column_types.items() if t != STRING]
+
+
+def text_exprs(column_types: Dict[str, ColumnType]) -> "List[pl.Expr]":
+    """Expressions converting typed columns back to their original text."""
+    return [text_expr(name, t) for name, t in column_types.items() if t != STRING]
+
+
+def dump_column_types(column_types: Dict[str, ColumnType]) -> str:
+    """Serialize column types, e.g. for file metadata."""
+    return json.dumps({name: t.model_dump() for name, t in column_types.items()})
+
+
+def load_column_types(data: Optional[str]) -> Dict[str, ColumnType]:
+    """Deserialize column types written by `dump_column_types`."""
+    if not data:
+        return {}
+    return {name: ColumnType.model_validate(t) for name, t in json.loads(data).items()}
@@ -0,0 +1,152 @@
+import hashlib
+import os
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from app.api.schemas.files import ColumnType
+from app.core.lazy import lazy_import
+from app.logger import get_logger
+from app.services.column_types import (
+    dump_column_types,
+    load_column_types,
+    parse_exprs,
+    text_exprs,
+)
+from app.services.metrics import CACHE_REQUESTS
+
+pl = lazy_import("polars")
+
+logger = get_logger("services.columnar_cache")
+
+
+class ColumnarCache:
+    """
+    Parquet copies of CSV files.
+
+    A CSV is converted once; afterwards reads go through `scan`, which returns
+    a lazy Parquet scan so projections, predicates and row limits are pushed
+    down into the reader instead of parsing the CSV again. Columns are stored
+    with their inferred native types, which are recorded in the file metadata
+    so `scan_text` can reproduce the original text. Copies older than their
+    CSV are treated as missing.
+    """
+
+    def __init__(self, cache_dir: Union[str, Path]):
+        self.cache_dir = Path(cache_dir)
+
+    def path_for(self, csv_path: Union[str, Path]) -> Path:
+        """Get the location of the columnar copy of a CSV file."""
+        csv_path = Path(csv_path).resolve()
+        digest = hashlib.sha1(str(csv_path).encode()).hexdigest()[:12]
+        return self.cache_dir / f"{csv_path.stem}-{digest}.parquet"
+
+    def get(self, csv_path: Union[str, Path]) -> Optional[Path]:
+        """Get the columnar copy of a CSV file if it is up to date."""
+        cache_path = self.path_for(csv_path)
+        try:
+            if cache_path.stat().st_mtime_ns >= Path(csv_path).stat().st_mtime_ns:
+                return cache_path
+        except FileNotFoundError:
+            pass
+        return None
+
+    def ingest(
+        self,
+        csv_path: Union[str, Path],
+        column_types: Optional[Dict[str, ColumnType]] = None,
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Convert a CSV file to Parquet and collect per-column statistics.
+
+        The conversion is streamed, so the CSV is never fully loaded. This is
+        blocking; call it from a thread when on the event loop.
+
+        Args:
+            csv_path: Path to the CSV file
+            column_types: Types to store columns as; columns not listed stay strings
+
+        Returns:
+            Mapping of column name to its statistics
+
+        Raises:
+            polars.exceptions.PolarsError: If a value doesn't fit its column type
+        """
+        column_types = column_types or {}
+        cache_path = self.path_for(csv_path)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # Write next to the final location and swap in atomically, so readers
+        # never see a partial file
+        tmp_path = self.cache_dir / f".{uuid.uuid4()}.parquet"
+        try:
+            pl.scan_csv(csv_path, infer_schema=False).with_columns(
+                parse_exprs(column_types)
+            ).sink_parquet(
+                tmp_path,
+                statistics=True,
+                metadata={"column_types": dump_column_types(column_types)},
+            )
+            os.replace(tmp_path, cache_path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+        logger.info("Created columnar copy", csv_path=str(csv_path))
+        return self.column_statistics(cache_path)
+
+    @staticmethod
+    def column_statistics(parquet_path: Union[str, Path]) -> Dict[str, Dict[str, Any]]:
+        """Compute null count, min, max and approximate distinct count per column."""
+        lf = pl.scan_parquet(parquet_path)
+        columns = lf.collect_schema().names()
+        stats = lf.select(
+            *[pl.col(c).null_count().alias(f"{i}_null_count") for i, c in enumerate(columns)],
+            *[pl.col(c).min().alias(f"{i}_min") for i, c in enumerate(columns)],
+            *[pl.col(c).max().alias(f"{i}_max") for i, c in enumerate(columns)],
+            *[
+                pl.col(c).approx_n_unique().alias(f"{i}_distinct_count")
+                for i, c in enumerate(columns)
+            ],
+        ).collect().row(0, named=True)
+
+        return {
+            column: {
+                "null_count": stats[f"{i}_null_count"],
+                "min": stats[f"{i}_min"],
+                "max": stats[f"{i}_max"],
+                "distinct_count": stats[f"{i}_distinct_count"],
+            }
+            for i, column in enumerate(columns)
+        }
+
+    def scan(self, csv_path: Union[str, Path]) -> "pl.LazyFrame":
+        """
+        Lazily scan a CSV file, through its columnar copy when available.
+
+        Columns of the columnar copy have their stored types; without a copy
+        all columns are read as strings.
+        """
+        cache_path = self.get(csv_path)
+        CACHE_REQUESTS.inc(cache="columnar", result="miss" if cache_path is None else "hit")
+        if cache_path is not None:
+            return pl.scan_parquet(cache_path)
+        return pl.scan_csv(csv_path, infer_schema=False)
+
+    def scan_text(self, csv_path: Union[str, Path]) -> "pl.LazyFrame":
+        """
+        Lazily scan a CSV file with all columns as their original text.
+
+        Reads through the columnar copy when available, converting typed
+        columns back to text.
+        """
+        cache_path = self.get(csv_path)
+        CACHE_REQUESTS.inc(cache="columnar", result="miss" if cache_path is None else "hit")
+        if cache_path is None:
+            return pl.scan_csv(csv_path, infer_schema=False)
+        column_types = load_column_types(
+            pl.read_parquet_metadata(cache_path).get("column_types")
+        )
+        return pl.scan_parquet(cache_path).with_columns(text_exprs(column_types))
+
+    def evict(self, csv_path: Union[str, Path]) -> None:
+        """Remove the columnar copy of a CSV file."""
+        self.path_for(csv_path).unlink(missing_ok=True)
@@ -0,0 +1,197 @@
+import mmap
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+from app.core.lazy import lazy_import
+from app.logger import get_logger
+
+np = lazy_import("numpy")
+pl = lazy_import("polars")
+
+logger = get_logger("services.csv_metadata")
+
+# Bytes scanned per numpy pass when counting rows
+SCAN_CHUNK_SIZE = 16 * 1024 * 1024
+
+QUOTE = ord('"')
+NEWLINE = ord("\n")
+
+
+@dataclass
+class CsvMetadata:
+    """Structural information about a CSV file."""
+
+    columns: List[str]
+    row_count: int
+    # Byte offset where every `stride`-th data row starts (rows 0, stride, ...)
+    row_offsets: "np.ndarray" = field(default_factory=lambda: np.empty(0, np.int64))
+
+
+def read_header(path: Union[str, Path]) -> List[str]:
+    """
+    Read only the header of a CSV file.
+
+    Args:
+        path: Path to the CSV file
+
+    Returns:
+        List of column names
+    """
+    return pl.read_csv(path, n_rows=0).columns
+
+
+def _scan_records(data: "np.ndarray", stride: Optional[int]) -> "Tuple[int, np.ndarray]":
+    """
+    Find record boundaries in a byte array, respecting quotes.
+
+    Args:
+        data: Bytes of the CSV file
+        stride: Record every `stride`-th record start, or None to only count
+
+    Returns:
+        Tuple of (number of records, start offsets of records 1, 1 + stride, ...)
+    """
+    records = 0
+    in_quotes = False
+    offsets = []
+    for start in range(0, len(data), SCAN_CHUNK_SIZE):
+        chunk = data[start : start + SCAN_CHUNK_SIZE]
+        quotes = chunk == QUOTE
+        if not in_quotes and not quotes.any():
+            # Fast path: no quoting in play, every newline ends a record
+            if stride is None:
+                records += int(np.count_nonzero(chunk == NEWLINE))
+                continue
+            ends = np.flatnonzero(chunk == NEWLINE)
+        else:
+            # Only look at quote and newline positions
+            positions = np.flatnonzero(quotes | (chunk == NEWLINE))
+            is_quote = quotes[positions]
+            parity = np.cumsum(is_quote) + in_quotes
+            ends = positions[~is_quote & (parity % 2 == 0)]
+            if len(parity):
+                in_quotes = bool(parity[-1] % 2)
+        if stride is not None:
+            # The record ending at global index i is followed by record i + 1
+            first = (-records) % stride
+            offsets.append(ends[first::stride] + start + 1)
+        records += len(ends)
+    # The last record may not end with a newline
+    if data[-1] != NEWLINE:
+        records += 1
+    row_offsets = np.concatenate(offsets) if offsets else np.empty(0, np.int64)
+    return records, row_offsets[row_offsets < len(data)].astype(np.int64)
+
+
+def scan_rows(
+    path: Union[str, Path], stride: Optional[int] = None
+) -> "Tuple[int, np.ndarray]":
+    """
+    Count the data rows of a CSV file without parsing it, optionally building
+    a sparse index of row start offsets.
+
+    The file is memory-mapped and scanned in chunks with numpy. A newline only
+    ends a record when an even number of quote characters precede it, so
+    newlines inside quoted fields are not counted. Escaped quotes ("") come in
+    pairs and don't change the parity.
+
+    Args:
+        path: Path to the CSV file
+        stride: Index the start of every `stride`-th data row, or None
+
+    Returns:
+        Tuple of (number of data rows, byte offsets of data rows 0, stride, ...)
+    """
+    with open(path, "rb") as f:
+        if f.seek(0, 2) == 0:
+            return 0, np.empty(0, np.int64)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # All numpy views must be released before the map is closed
+            records, offsets = _scan_records(np.frombuffer(mm, dtype=np.uint8), stride)
+
+    # The first record is the header
+    return max(records - 1, 0), offsets
+
+
+def count_rows(path: Union[str, Path]) -> int:
+    """
+    Count the data rows of a CSV file without parsing it.
+
+    See `scan_rows`.
+
+    Args:
+        path: Path to the CSV file
+
+    Returns:
+        Number of data rows
+    """
+    return scan_rows(path)[0]
+
+
+def extract_metadata(
+    path: Union[str, Path], index_stride: Optional[int] = None
+) -> CsvMetadata:
+    """
+    Extract columns and row count from a CSV file without loading it.
+
+    This is blocking; call it from a thread when on the event loop.
+
+    Args:
+        path: Path to the CSV file
+        index_stride: Also index the offset of every `index_stride`-th row
+
+    Returns:
+        CsvMetadata for the file
+    """
+    row_count, row_offsets = scan_rows(path, stride=index_stride)
+    return CsvMetadata(
+        columns=read_header(path), row_count=row_count, row_offsets=row_offsets
+    )
+
+
+def read_rows(
+    path: Union[str, Path],
+    columns: List[str],
+    row_offsets: "np.ndarray",
+    stride: int,
+    offset: int,
+    limit: int,
+) -> "pl.DataFrame":
+    """
+    Read a page of rows by seeking into the file with a sparse row index.
+
+    Only the byte range covering the requested rows is read and parsed, so a
+    page deep into the file costs the same as the first one.
+
+    Args:
+        path: Path to the CSV file
+        columns: Column names of the file
+        row_offsets: Offsets of data rows 0, stride, 2 * stride, ...
+        stride: Number of rows between two offsets
+        offset: First data row to return
+        limit: Maximum number of rows to return
+
+    Returns:
+        DataFrame with the requested rows, all columns as strings
+    """
+    first_block = offset // stride
+    if limit <= 0 or first_block >= len(row_offsets):
+        return pl.DataFrame(schema={c: pl.String for c in columns})
+    end_block = (offset + limit - 1) // stride + 1
+
+    with open(path, "rb") as f:
+        f.seek(int(row_offsets[first_block]))
+        if end_block < len(row_offsets):
+            data = f.read(int(row_offsets[end_block] - row_offsets[first_block]))
+        else:
+            data = f.read()
+
+    df = pl.read_csv(
+        data,
+        has_header=False,
+        new_columns=columns,
+        infer_schema=False,
+        raise_if_empty=False,
+    )
+    return df.slice(offset - first_block * stride, limit)
@@ -0,0 +1,226 @@
+import fcntl
+import hashlib
+import os
+import threading
+import uuid
+import weakref
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from app.config import settings
+from app.core.lazy import lazy_import
+from app.logger import get_logger
+from app.services.metrics import CACHE_REQUESTS
+from app.services.storage import ObjectInfo, ObjectStore
+from app.services.tracing import span
+from app.services.warm_cache import disk_bytes
+
+pa = lazy_import("pyarrow")
+pl = lazy_import("polars")
+
+logger = get_logger("services.dataset_cache")
+
+# Default size of the cache, before capping it to the filesystem
+DEFAULT_MAX_BYTES = 1024**3
+
+
+class SharedDatasetCache:
+    """
+    Decoded source files shared by every process of the host.
+
+    A source is decoded once, into an uncompressed Arrow IPC file named after
+    its location and version, and every process (uvicorn workers and their
+    pool workers) attaches to it by memory-mapping that file. Frames are
+    built on the mapped buffers without copying, so a hot dataset occupies
+    the page cache (or /dev/shm) once, however many processes read it.
+
+    Attached datasets are reference counted with shared `flock`s: each
+    process holds one while any frame it returned is alive, and eviction
+    only deletes datasets it can lock exclusively. The kernel drops the
+    locks of processes that exit. Least recently attached datasets are
+    evicted first once the directory grows over `max_bytes`.
+    """
+
+    def __init__(self, directory: Union[str, Path], max_bytes: int):
+        """
+        Args:
+            directory: Directory holding the datasets, ideally on a tmpfs
+            max_bytes: Total size of the datasets kept
+        """
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # Path of each dataset this process has attached to, with the file
+        # holding its shared lock and the number of live frames
+        self._attached: Dict[Path, Tuple[int, int]] = {}
+
+    def _paths(self, store: ObjectStore, info: ObjectInfo) -> Tuple[str, Path]:
+        location = hashlib.sha1(store.location(info.key).encode()).hexdigest()[:24]
+        version = hashlib.sha1(
+            f"{info.size}:{info.last_modified}:{info.etag}".encode()
+        ).hexdigest()[:16]
+        return location, self.directory / f"{location}_{version}.arrow"
+
+    def attach(
+        self,
+        store: ObjectStore,
+        key: str,
+        columns: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        create: bool = True,
+        info: Optional[ObjectInfo] = None,
+    ) -> Optional["pl.DataFrame"]:
+        """
+        Read a stored CSV file through its shared decoded copy.
+
+        Args:
+            store: Store holding the file
+            key: Key of the file
+            columns: Only return these columns (those missing are ignored)
+            limit: Maximum number of rows to return
+            create: Decode the file if it has no copy yet
+            info: Metadata of the file if already known, saves a HEAD request
+
+        Returns:
+            Frame of string columns over the shared copy, or None if there is
+            no copy and none was created
+        """
+        info = info or store.head(key)
+        location, path = self._paths(store, info)
+        if not path.exists():
+            CACHE_REQUESTS.inc(cache="dataset", result="miss")
+            # Decoded strings take about as much space as their text
+            if not create or info.size > self.max_bytes:
+                return None
+            if not self._create(store, key, location, path):
+                return None
+        else:
+            CACHE_REQUESTS.inc(cache="dataset", result="hit")
+
+        try:
+            frame = self._map(path)
+        except FileNotFoundError:
+            # Evicted before we could lock it
+            return None
+        if columns is not None:
+            frame = frame.select([c for c in frame.columns if c in columns])
+        if limit:
+            frame = frame.head(limit)
+        weakref.finalize(frame, self._release, path)
+        self._evict()
+        return frame
+
+    def _create(self, store: ObjectStore, key: str, location: str, path: Path) -> bool:
+        """Decode a file into the cache, once across processes."""
+        locks = self.directory / ".locks"
+        locks.mkdir(parents=True, exist_ok=True)
+        with open(locks / location, "a") as lock:
+            # Processes missing the same file wait for the first to decode it
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            if path.exists():
+                return True
+            tmp_path = self.directory / f".{uuid.uuid4()}.arrow"
+            try:
+                with span("dataset_cache.decode", key=key):
+                    store.scan_csv(key).sink_ipc(tmp_path, compression="uncompressed")
+                os.replace(tmp_path, path)
+            except Exception as e:
+                # Out of space or an undecodable file; callers read it directly
+                logger.warning("Could not cache dataset", key=key, error=str(e))
+                return False
+            finally:
+                tmp_path.unlink(missing_ok=True)
+        logger.info("Cached dataset", key=key, size=path.stat().st_size)
+        # Older versions of the file are no longer read
+        for stale in self.directory.glob(f"{location}_*.arrow"):
+            if stale != path:
+                self._try_delete(stale)
+        return True
+
+    def _map(self, path: Path) -> "pl.DataFrame":
+        """Memory-map a dataset under a shared lock and build a frame on it."""
+        with self._lock:
+            fd, count = self._attached.get(path, (None, 0))
+            if fd is None:
+                fd = os.open(path, os.O_RDONLY)
+                fcntl.flock(fd, fcntl.LOCK_SH)
+            self._attached[path] = (fd, count + 1)
+        try:
+            os.utime(path)
+            # pyarrow reads the IPC file without copying; polars keeps its
+            # buffers as long as they are chunked the same way
+            table = pa.ipc.open_file(pa.memory_map(str(path))).read_all()
+            return pl.from_arrow(table, rechunk=False)
+        except BaseException:
+            self._release(path)
+            raise
+
+    def _release(self, path: Path) -> None:
+        with self._lock:
+            fd, count = self._attached[path]
+            if count > 1:
+                self._attached[path] = (fd, count - 1)
+                return
+            del self._attached[path]
+        # Closing drops the shared lock; the mapping itself lives on until
+        # pyarrow releases the buffers
+        os.close(fd)
+
+    def _try_delete(self, path: Path) -> bool:
+        """Delete a dataset unless some process has it attached."""
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except FileNotFoundError:
+            return True
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        else:
+            path.unlink(missing_ok=True)
+            return True
+        finally:
+            os.close(fd)
+
+    def _evict(self) -> None:
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.startswith(".") or not entry.name.endswith(".arrow"):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, Path(entry.path)))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if self._try_delete(path):
+                total -= size
+                logger.debug("Evicted dataset", path=str(path), size=size)
+
+    def usage(self) -> Tuple[int, int]:
+        """Number and total size of the cached datasets."""
+        count = total = 0
+        try:
+            for entry in os.scandir(self.directory):
+                if not entry.name.startswith(".") and entry.name.endswith(".arrow"):
+                    count += 1
+                    total += entry.stat().st_size
+        except FileNotFoundError:
+            pass
+        return count, total
+
+
+def _create_dataset_cache() -> Optional[SharedDatasetCache]:
+    max_bytes = settings.DATASET_CACHE_MAX_BYTES
+    if max_bytes is None:
+        max_bytes = min(DEFAULT_MAX_BYTES, disk_bytes(settings.DATASET_CACHE_DIR) // 2)
+    if max_bytes <= 0:
+        return None
+    return SharedDatasetCache(settings.DATASET_CACHE_DIR, max_bytes)
+
+
+# Global instance
+dataset_cache = _create_dataset_cache()
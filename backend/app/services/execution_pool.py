@@ -0,0 +1,154 @@
+import asyncio
+import importlib
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from fastapi import HTTPException
+
+from app.config import settings
+from app.core.lazy import lazy_import
+from app.logger import get_logger
+from app.services.metrics import POOL_ACTIVE_TASKS, POOL_QUEUE_DEPTH
+from app.services.tracing import TraceContext, attach, current_context, span
+
+pl = lazy_import("polars")
+
+logger = get_logger("services.execution_pool")
+
+T = TypeVar("T")
+
+# Modules imported by every worker before it accepts work, so the first plan
+# a worker runs doesn't pay for them
+WARM_MODULES = [
+    "polars",
+    "pyarrow",
+    "app.api.routes.transform",
+    "app.services.graph_service",
+]
+
+
+def _warm_worker() -> None:
+    """Initializer of pool workers: import everything plans need."""
+    for name in WARM_MODULES:
+        module = importlib.import_module(name)
+        # Lazily imported libraries only load on first attribute access
+        getattr(module, "__name__")
+
+
+def _ready() -> int:
+    return os.getpid()
+
+
+class _WorkerHTTPError(Exception):
+    """Picklable stand-in for an HTTPException raised in a worker."""
+
+    def __init__(self, status_code: int, detail: Any):
+        super().__init__(status_code, detail)
+
+
+def _call(fn: Callable[..., T], args: tuple, trace_context: Optional[TraceContext]) -> T:
+    # HTTPException can't be unpickled, and an unpicklable result breaks the pool
+    try:
+        with attach(trace_context):
+            return fn(*args)
+    except HTTPException as e:
+        raise _WorkerHTTPError(e.status_code, e.detail) from None
+
+
+def from_arrow(data: bytes) -> "pl.DataFrame":
+    """Deserialize a DataFrame a worker sent as an Arrow IPC stream."""
+    return pl.read_ipc_stream(data)
+
+
+class ExecutionPool:
+    """
+    Process pool that runs CPU-bound work off the event loop.
+
+    Workers are spawned (Polars is not fork-safe) and import the transform
+    and graph modules up front. Routes submit a serialized plan (JSON) and
+    await the result, which comes back as JSON or an Arrow IPC buffer, so
+    nothing large is pickled. Separate pools keep interactive requests from
+    queueing behind long transforms.
+
+    On Lambda, or where worker processes can't be created (no /dev/shm, so
+    no semaphores), work runs on threads of the current process instead.
+    Polars releases the GIL while it computes, and per-process caches such
+    as compiled plans then stay warm across invocations.
+    """
+
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max_workers
+        self._executor: Optional[Executor] = None
+        # Tasks submitted and not finished yet
+        self._pending = 0
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = self._create_executor()
+        return self._executor
+
+    def _create_executor(self) -> Executor:
+        if not settings.is_lambda:
+            try:
+                return ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_warm_worker,
+                )
+            except (OSError, NotImplementedError) as e:
+                logger.warning(
+                    "Worker processes unavailable, running in-process",
+                    pool=self.name,
+                    error=str(e),
+                )
+        return ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix=f"pool-{self.name}"
+        )
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """
+        Run a picklable function in a worker and await its result.
+
+        HTTPExceptions raised by the function are re-raised here.
+        """
+        loop = asyncio.get_running_loop()
+        self._pending += 1
+        self._report_pending()
+        try:
+            with span("pool.run", pool=self.name, function=fn.__name__):
+                # Spans of the worker join the trace of the request
+                return await loop.run_in_executor(
+                    self.executor, _call, fn, args, current_context()
+                )
+        except _WorkerHTTPError as e:
+            raise HTTPException(status_code=e.args[0], detail=e.args[1])
+        finally:
+            self._pending -= 1
+            self._report_pending()
+
+    def _report_pending(self) -> None:
+        active = min(self._pending, self.max_workers)
+        POOL_ACTIVE_TASKS.set(active, pool=self.name)
+        POOL_QUEUE_DEPTH.set(self._pending - active, pool=self.name)
+
+    async def start(self) -> None:
+        """Spawn and warm up every worker ahead of the first request."""
+        # Submitting one task per worker before any can finish spawns them all
+        pids = await asyncio.gather(*[self.run(_ready) for _ in range(self.max_workers)])
+        logger.info("Execution pool started", pool=self.name, workers=len(set(pids)))
+
+    def shutdown(self) -> None:
+        """Stop the workers, cancelling queued work."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+# Previews and node updates, which a user is waiting on
+interactive_pool = ExecutionPool("interactive", settings.INTERACTIVE_MAX_WORKERS)
+# Full transforms
+execution_pool = ExecutionPool("execution", settings.EXECUTION_MAX_WORKERS)
@@ -0,0 +1,205 @@
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, List, Optional, Union
+
+from app.api.schemas.files import FileUploadResponse
+from app.logger import get_logger
+
+logger = get_logger("services.file_registry")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    file_id TEXT PRIMARY KEY,
+    filename TEXT NOT NULL,
+    content_hash TEXT,
+    file_path TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_accessed REAL NOT NULL DEFAULT 0,
+    pinned INTEGER NOT NULL DEFAULT 0,
+    info TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_files_content_hash ON files (content_hash);
+CREATE INDEX IF NOT EXISTS idx_files_filename ON files (filename);
+"""
+
+# Columns added after the first version of the schema, with their definitions
+MIGRATIONS = {
+    "last_accessed": "REAL NOT NULL DEFAULT 0",
+    "pinned": "INTEGER NOT NULL DEFAULT 0",
+}
+
+
+@dataclass
+class BlobUsage:
+    """Access information for a stored blob, over all files sharing it."""
+
+    content_hash: str
+    file_path: str
+    last_accessed: float
+    pinned: bool
+    profiling: bool
+
+
+class FileRegistry:
+    """
+    Registry of uploaded files, shared by all worker processes.
+
+    Backed by SQLite in WAL mode, so readers in one worker never block on a
+    writer in another and registrations survive restarts. The parsed file
+    metadata (columns, row count, statistics) is stored alongside the indexed
+    columns, so lookups never touch the CSV.
+
+    The database is only created (and migrated) on first use, so creating a
+    registry never writes to disk.
+    """
+
+    def __init__(self, db_path: Union[str, Path]):
+        self.db_path = Path(db_path)
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get the connection for the current thread."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            with self._schema_lock:
+                if not self._schema_ready:
+                    self._create_schema(connection)
+                    self._schema_ready = True
+            self._local.connection = connection
+        return connection
+
+    @staticmethod
+    def _create_schema(connection: sqlite3.Connection) -> None:
+        connection.executescript(SCHEMA)
+        existing = {row[1] for row in connection.execute("PRAGMA table_info(files)")}
+        for column, definition in MIGRATIONS.items():
+            if column not in existing:
+                connection.execute(f"ALTER TABLE files ADD COLUMN {column} {definition}")
+
+    def add(self, info: FileUploadResponse) -> None:
+        """Register a file, replacing any previous entry with the same ID."""
+        now = time.time()
+        self._connection().execute(
+            "INSERT OR REPLACE INTO files"
+            " (file_id, filename, content_hash, file_path, created_at, last_accessed, info)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                info.file_id,
+                info.filename,
+                info.content_hash,
+                info.file_path,
+                now,
+                now,
+                info.model_dump_json(),
+            ),
+        )
+
+    def get(self, file_id: str) -> Optional[FileUploadResponse]:
+        """Get a file by ID."""
+        row = self._connection().execute(
+            "SELECT info FROM files WHERE file_id = ?", (file_id,)
+        ).fetchone()
+        return FileUploadResponse.model_validate_json(row[0]) if row else None
+
+    def find_by_hash(self, content_hash: str) -> List[FileUploadResponse]:
+        """Get all files with the given content hash, oldest first."""
+        return self._select("content_hash = ?", content_hash)
+
+    def find_by_filename(self, filename: str) -> List[FileUploadResponse]:
+        """Get all files uploaded under the given name, oldest first."""
+        return self._select("filename = ?", filename)
+
+    def _select(self, where: str, *params) -> List[FileUploadResponse]:
+        rows = self._connection().execute(
+            f"SELECT info FROM files WHERE {where} ORDER BY created_at", params
+        ).fetchall()
+        return [FileUploadResponse.model_validate_json(row[0]) for row in rows]
+
+    def update_by_hash(self, content_hash: str, **fields: Any) -> None:
+        """
+        Update fields of every file with the given content hash.
+
+        The update is atomic, so a file registered concurrently is either
+        updated too or registered after the update.
+        """
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            rows = connection.execute(
+                "SELECT file_id, info FROM files WHERE content_hash = ?",
+                (content_hash,),
+            ).fetchall()
+            for file_id, info in rows:
+                updated = FileUploadResponse.model_validate_json(info).model_copy(
+                    update=fields
+                )
+                connection.execute(
+                    "UPDATE files SET info = ? WHERE file_id = ?",
+                    (updated.model_dump_json(), file_id),
+                )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def touch(self, file_id: str) -> None:
+        """Record that a file was just accessed."""
+        self._connection().execute(
+            "UPDATE files SET last_accessed = ? WHERE file_id = ?", (time.time(), file_id)
+        )
+
+    def set_pinned(self, file_id: str, pinned: bool) -> bool:
+        """
+        Pin or unpin a file. Pinned files are never evicted.
+
+        Returns:
+            Whether the file exists
+        """
+        cursor = self._connection().execute(
+            "UPDATE files SET pinned = ? WHERE file_id = ?", (int(pinned), file_id)
+        )
+        return cursor.rowcount > 0
+
+    def is_pinned(self, file_id: str) -> bool:
+        """Check whether a file is pinned."""
+        row = self._connection().execute(
+            "SELECT pinned FROM files WHERE file_id = ?", (file_id,)
+        ).fetchone()
+        return bool(row and row[0])
+
+    def blob_usage(self) -> List[BlobUsage]:
+        """Get access information per stored blob, least recently used first."""
+        rows = self._connection().execute(
+            "SELECT content_hash, file_path, MAX(last_accessed), MAX(pinned),"
+            " MAX(json_extract(info, '$.status') = 'profiling')"
+            " FROM files GROUP BY content_hash, file_path ORDER BY MAX(last_accessed)"
+        ).fetchall()
+        return [
+            BlobUsage(
+                content_hash=content_hash,
+                file_path=file_path,
+                last_accessed=last_accessed,
+                pinned=bool(pinned),
+                profiling=bool(profiling),
+            )
+            for content_hash, file_path, last_accessed, pinned, profiling in rows
+        ]
+
+    def delete(self, file_id: str) -> None:
+        """Remove a file from the registry."""
+        self._connection().execute("DELETE FROM files WHERE file_id = ?", (file_id,))
+
+    def delete_by_hash(self, content_hash: str) -> None:
+        """Remove every file with the given content hash from the registry."""
+        self._connection().execute(
+            "DELETE FROM files WHERE content_hash = ?", (content_hash,)
+        )
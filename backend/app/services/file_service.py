@@ -1,30 +1,124 @@
+import asyncio
+import functools
+import hashlib
+import os
 import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple
-import polars as pl
+from typing import List, Dict, Any, Optional, Tuple, BinaryIO
 from fastapi import UploadFile, HTTPException, status
 
+from app.config import settings
+from app.core.lazy import lazy_import
 from app.logger import get_logger
 from app.api.schemas.operator import Operator, Output, Config
-from app.api.schemas.files import FileUploadResponse
+from app.api.schemas.files import ColumnStatistics, ColumnType, FileUploadResponse
+from app.services.column_types import STRING, infer_column_types, verify_column_types
+from app.services.csv_metadata import extract_metadata, read_header, read_rows
+from app.services.file_registry import FileRegistry
+from app.services.storage import LocalObjectStore
+from app.services.storage_manager import StorageManager
+
+np = lazy_import("numpy")
+pl = lazy_import("polars")
 
 logger = get_logger("services.file")
 
 # Default upload directory
 UPLOAD_DIR = Path("uploads")
-UPLOAD_DIR.mkdir(exist_ok=True)
+
+# Size of the chunks uploads are streamed to disk in
+UPLOAD_CHUNK_SIZE = 1024 * 1024
 
 
 class FileService:
     """Service for handling file operations and CSV processing."""
 
-    def __init__(self):
-        self.upload_dir = UPLOAD_DIR
-        self._file_registry: Dict[str, FileUploadResponse] = {}
+    def __init__(self, upload_dir: Path = UPLOAD_DIR, registry_path: Optional[Path] = None):
+        """
+        Args:
+            upload_dir: Directory uploads are stored in
+            registry_path: Database registering the uploads; defaults to a
+                file in `upload_dir`
+        """
+        self.upload_dir = Path(upload_dir)
+        # Uploads go through the same storage layer the transforms read from,
+        # so an uploaded key can be used as a source with storage="local".
+        self.store = LocalObjectStore(self.upload_dir)
+        # Shared with the other workers serving the same upload directory
+        self.registry = FileRegistry(registry_path or self.upload_dir / ".registry.db")
+        self.storage_manager = StorageManager(
+            self.store,
+            self.registry,
+            settings.STORAGE_BUDGET_BYTES,
+            derived_paths=self._derived_paths,
+            blobs_dir=self.upload_dir / "blobs",
+            cache_dirs=[self.store.columnar_cache.cache_dir, self.upload_dir / ".rowindex"],
+        )
+        # Uploads are profiled off the request path, on a small bounded pool
+        # so profiling never takes over the machine
+        self._profiler = ThreadPoolExecutor(
+            max_workers=settings.PROFILING_MAX_WORKERS, thread_name_prefix="profiler"
+        )
+        # In-flight profiling of blobs uploaded through this process, by hash
+        self._profiles: Dict[str, Future] = {}
+
+    @staticmethod
+    def _write_chunk(f: BinaryIO, hasher: Any, chunk: bytes) -> None:
+        f.write(chunk)
+        hasher.update(chunk)
+
+    async def _stream_to_disk(self, file: UploadFile) -> Tuple[Path, str, int]:
+        """
+        Stream an upload to a temporary file in fixed-size chunks.
+
+        Disk writes and hashing run off the event loop, and only one chunk is
+        held in memory at a time.
+
+        Args:
+            file: Uploaded file object
+
+        Returns:
+            Tuple of (temporary file path, sha256 hex digest, size in bytes)
+
+        Raises:
+            HTTPException: 413 if the upload exceeds MAX_UPLOAD_BYTES
+        """
+        max_bytes = settings.MAX_UPLOAD_BYTES
+        if file.size is not None and file.size > max_bytes:
+            raise HTTPException(
+                status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+                detail=f"File exceeds the maximum upload size of {max_bytes} bytes",
+            )
+
+        tmp_dir = self.upload_dir / ".tmp"
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = tmp_dir / f"{uuid.uuid4()}.part"
+        hasher = hashlib.sha256()
+        size = 0
+        try:
+            with open(tmp_path, "wb") as f:
+                while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise HTTPException(
+                            status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+                            detail=f"File exceeds the maximum upload size of {max_bytes} bytes",
+                        )
+                    await asyncio.to_thread(self._write_chunk, f, hasher, chunk)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        return tmp_path, hasher.hexdigest(), size
 
     async def upload_csv_file(self, file: UploadFile) -> FileUploadResponse:
         """
-        Upload and process a CSV file.
+        Upload a CSV file and start profiling it in the background.
+
+        Returns as soon as the file is stored and its header is read. Row
+        count, column types, statistics, the columnar copy and the row index
+        are filled in by the profiler; poll `get_file_info` until the status
+        is no longer "profiling".
 
         Args:
             file: Uploaded file object
@@ -38,77 +132,273 @@ class FileService:
                 detail="Only CSV files are supported",
             )
 
-        # Generate unique file ID and path
         file_id = str(uuid.uuid4())
-        file_path = self.upload_dir / f"{file_id}_{file.filename}"
 
-        try:
-            # Save file to disk
-            content = await file.read()
-            with open(file_path, "wb") as f:
-                f.write(content)
-
-            # Parse CSV to extract columns
-            df = pl.read_csv(file_path)
-            columns = df.columns
-
-            # Store file info in registry
-            file_info = FileUploadResponse(
-                file_id=file_id,
-                filename=file.filename,
-                file_path=str(file_path),
-                columns=columns,
-                row_count=df.height,
-            )
-            self._file_registry[file_id] = file_info
+        # Save file to disk
+        tmp_path, content_hash, size = await self._stream_to_disk(file)
 
+        # Identical contents were uploaded before: point the new file ID at
+        # the existing blob and reuse its metadata, columnar copy and index
+        existing = self._find_blob(content_hash)
+        if existing is not None:
+            tmp_path.unlink(missing_ok=True)
+            file_info = self._register_copy(existing, file_id, file.filename)
             logger.info(
-                f"Uploaded CSV file: {file.filename} with {len(columns)} columns"
+                f"Uploaded CSV file: {file.filename} matches existing content",
+                content_hash=content_hash,
             )
-
             return file_info
 
+        # Contents are stored once, under their hash
+        key = self._blob_key(content_hash)
+        file_path = self.store.path_for(key)
+
+        try:
+            self.store.put_file(key, tmp_path)
+            columns = await asyncio.to_thread(read_header, file_path)
         except Exception as e:
             # Clean up file on error
-            if file_path.exists():
-                file_path.unlink()
+            tmp_path.unlink(missing_ok=True)
+            self.store.delete(key)
             logger.error(f"Error uploading file: {str(e)}")
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Error processing CSV file: {str(e)}",
             )
 
+        file_info = FileUploadResponse(
+            file_id=file_id,
+            filename=file.filename,
+            file_path=str(file_path),
+            size_bytes=size,
+            content_hash=content_hash,
+            columns=columns,
+            status="profiling",
+            progress=0.0,
+        )
+        self.registry.add(file_info)
+
+        future = self._profiler.submit(self._profile, file_path, content_hash)
+        self._profiles[content_hash] = future
+        future.add_done_callback(lambda _: self._profiles.pop(content_hash, None))
+
+        logger.info(f"Uploaded CSV file: {file.filename} with {len(columns)} columns")
+        return file_info
+
+    def _register_copy(
+        self, existing: FileUploadResponse, file_id: str, filename: str
+    ) -> FileUploadResponse:
+        """Register a new file ID for the blob of an existing file."""
+        file_info = existing.model_copy(update={"file_id": file_id, "filename": filename})
+        self.registry.add(file_info)
+        if existing.status == "profiling":
+            # Profiling may have finished before the copy was registered, in
+            # which case it didn't update the copy
+            latest = self.registry.get(existing.file_id)
+            if latest is not None and latest.status != "profiling":
+                file_info = latest.model_copy(
+                    update={"file_id": file_id, "filename": filename}
+                )
+                self.registry.add(file_info)
+        return file_info
+
+    def _profile(self, file_path: Path, content_hash: str) -> None:
+        """
+        Profile a stored upload, recording progress in the registry.
+
+        Runs on the profiler pool. Every file sharing the blob is updated.
+        """
+        update = functools.partial(self.registry.update_by_hash, content_hash)
+        try:
+            # Scan row count and row index without parsing the whole file
+            metadata = extract_metadata(file_path, settings.ROW_INDEX_STRIDE)
+            self._save_row_index(file_path, metadata.row_offsets)
+            update(row_count=metadata.row_count, progress=1 / 3)
+
+            column_types = infer_column_types(
+                file_path, settings.TYPE_INFERENCE_SAMPLE_ROWS
+            )
+            update(progress=2 / 3)
+
+            # Convert once to a typed columnar copy that later reads scan instead
+            column_types, column_stats = self._ingest(file_path, column_types)
+            update(
+                column_types=column_types,
+                column_stats={
+                    column: ColumnStatistics(**stats)
+                    for column, stats in column_stats.items()
+                },
+                status="ready",
+                progress=1.0,
+            )
+            logger.info(f"Profiled {file_path.name}", row_count=metadata.row_count)
+        except Exception as e:
+            logger.error(f"Error profiling {file_path.name}: {str(e)}")
+            update(status="failed", error=str(e))
+
+        # The new blob and its caches may have pushed the directory over budget
+        try:
+            self.storage_manager.enforce_budget()
+        except Exception as e:
+            logger.error(f"Error enforcing storage budget: {str(e)}")
+
+    def _ingest(
+        self, file_path: Path, column_types: Dict[str, ColumnType]
+    ) -> Tuple[Dict[str, ColumnType], Dict[str, Dict[str, Any]]]:
+        """
+        Create the typed columnar copy of a file.
+
+        Columns holding values past the inference sample that don't convert to
+        their type and back to the same text are stored as strings instead, so
+        reading the copy back as text reproduces the file.
+
+        Returns:
+            Tuple of (column types, column statistics)
+        """
+        column_types = verify_column_types(file_path, column_types)
+        column_stats = self.store.columnar_cache.ingest(file_path, column_types)
+        return column_types, column_stats
+
+    def wait_for_profile(
+        self, file_id: str, timeout: Optional[float] = None
+    ) -> FileUploadResponse:
+        """
+        Wait for profiling of a file started by this process to finish.
+
+        Args:
+            file_id: ID of the file
+            timeout: Maximum number of seconds to wait
+
+        Returns:
+            The file info after profiling
+        """
+        file_info = self.get_file_info(file_id)
+        future = self._profiles.get(file_info.content_hash)
+        if future is not None:
+            future.result(timeout)
+        return self.get_file_info(file_id)
+
+    @staticmethod
+    def _blob_key(content_hash: str) -> str:
+        return f"blobs/{content_hash[:2]}/{content_hash}.csv"
+
+    def _find_blob(self, content_hash: str) -> Optional[FileUploadResponse]:
+        """Get a registered file with the given contents whose blob still exists."""
+        for file_info in self.registry.find_by_hash(content_hash):
+            if Path(file_info.file_path).exists():
+                return file_info
+        return None
+
+    def _derived_paths(self, file_path: Path) -> List[Path]:
+        """Paths of the caches derived from a blob."""
+        return [
+            self.store.columnar_cache.path_for(file_path),
+            self._row_index_path(file_path),
+        ]
+
+    def _row_index_path(self, file_path: Path) -> Path:
+        return self.upload_dir / ".rowindex" / f"{Path(file_path).name}.npz"
+
+    def _save_row_index(self, file_path: Path, row_offsets: "np.ndarray") -> None:
+        """Persist the sparse row offset index of an uploaded file."""
+        index_path = self._row_index_path(file_path)
+        index_path.parent.mkdir(exist_ok=True)
+        # Previews may read the index while it is written; swap it in atomically
+        tmp_path = index_path.with_name(f".{uuid.uuid4()}.npz")
+        try:
+            with open(tmp_path, "wb") as f:
+                np.savez(f, offsets=row_offsets, stride=settings.ROW_INDEX_STRIDE)
+            os.replace(tmp_path, index_path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    def _load_row_index(self, file_path: Path) -> "Optional[Tuple[np.ndarray, int]]":
+        """Load the row offset index of an uploaded file as (offsets, stride)."""
+        try:
+            with np.load(self._row_index_path(file_path)) as index:
+                return index["offsets"], int(index["stride"])
+        except FileNotFoundError:
+            return None
+
     def get_file_info(self, file_id: str) -> FileUploadResponse:
         """Get file information by ID."""
-        if file_id not in self._file_registry:
+        file_info = self.registry.get(file_id)
+        if file_info is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"File with ID {file_id} not found",
             )
-        return self._file_registry[file_id]
+        return file_info
 
-    def generate_node_template_file(self, file_id: str) -> Operator:
+    def set_pinned(self, file_id: str, pinned: bool) -> None:
+        """Pin or unpin a file. Pinned files are never evicted."""
+        if not self.registry.set_pinned(file_id, pinned):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"File with ID {file_id} not found",
+            )
+
+    def find_files(
+        self, filename: Optional[str] = None, content_hash: Optional[str] = None
+    ) -> List[FileUploadResponse]:
+        """Find uploaded files by name and/or content hash."""
+        if content_hash is not None:
+            files = self.registry.find_by_hash(content_hash)
+            if filename is not None:
+                files = [f for f in files if f.filename == filename]
+            return files
+        if filename is not None:
+            return self.registry.find_by_filename(filename)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Either filename or content_hash must be provided",
+        )
+
+    def scan_file(self, file_id: str) -> "pl.LazyFrame":
+        """
+        Lazily scan an uploaded file with columns as their inferred types.
+
+        Args:
+            file_id: ID of the uploaded file
+
+        Returns:
+            LazyFrame over the columnar copy of the file
+        """
+        file_info = self.get_file_info(file_id)
+        self.registry.touch(file_id)
+        return self.store.columnar_cache.scan(file_info.file_path)
+
+    def generate_node_template_file(
+        self,
+        file_id: str,
+        node_title: Optional[str] = None,
+        node_description: Optional[str] = None,
+    ) -> Operator:
         """
         Generate an Operator node template from a CSV file.
 
+        Output types are the column types inferred at upload time.
+
         Args:
             file_id: ID of the uploaded file
             node_title: Custom title for the node
             node_description: Custom description for the node
 
         Returns:
-            GenerateNodeTemplateResponse with generated operator
+            Generated operator
         """
         file_info = self.get_file_info(file_id)
+        self.registry.touch(file_id)
         columns = file_info.columns
         filename = file_info.filename
+        column_types = file_info.column_types or {}
 
         # Generate outputs for each column
         outputs = []
         for i, column in enumerate(columns):
             output = Output(
                 id=f"column_{i}",
-                type="string",  # Default to string type
+                type=column_types.get(column, STRING).type,
                 name=column,
                 description=f"Column: {column}",
                 group="outputs",
@@ -119,8 +409,8 @@ class FileService:
 
         # Create operator template
         operator = Operator(
-            title=f"CSV Input: {filename}",
-            description=f"Input node for CSV file: {filename}",
+            title=node_title or f"CSV Input: {filename}",
+            description=node_description or f"Input node for CSV file: {filename}",
             category="Input",
             id=file_id,
             type="csv_input",
@@ -132,21 +422,26 @@ class FileService:
 
         return operator
 
-    def preview_csv(
-        self, file_id: str, limit: int = 20
-    ) -> Tuple[List[str], List[List[str]], Optional[int]]:
+    def preview_frame(
+        self, file_id: str, limit: int = 20, offset: int = 0
+    ) -> "Tuple[pl.DataFrame, Optional[int]]":
         """
-        Preview CSV file contents.
+        Read a page of CSV file contents.
+
+        Pages are read by seeking to the nearest indexed row offset, so any
+        page costs about the same as the first one.
 
         Args:
             file_id: ID of the file to preview
             limit: Number of rows to preview
+            offset: Index of the first row to preview
 
         Returns:
-            Tuple of (headers, rows, total_row_count)
+            Tuple of (page, total_row_count)
         """
         file_info = self.get_file_info(file_id)
-        file_path = Path(file_info["file_path"])
+        file_path = Path(file_info.file_path)
+        self.registry.touch(file_id)
 
         if not file_path.exists():
             raise HTTPException(
@@ -154,14 +449,20 @@ class FileService:
             )
 
         try:
-            # Read CSV with limit
-            df = pl.read_csv(file_path, n_rows=limit)
-
-            headers = df.columns
-            rows = df.to_pandas().astype(str).values.tolist()
-            total_rows = file_info.get("row_count")
-
-            return headers, rows, total_rows
+            row_index = self._load_row_index(file_path)
+            if row_index is not None:
+                row_offsets, stride = row_index
+                df = read_rows(
+                    file_path, file_info.columns, row_offsets, stride, offset, limit
+                )
+            else:
+                # No index; the columnar copy still skips to the requested rows
+                df = (
+                    self.store.columnar_cache.scan(file_path)
+                    .slice(offset, limit)
+                    .collect()
+                )
+            return df, file_info.row_count
 
         except Exception as e:
             logger.error(f"Error previewing CSV: {str(e)}")
@@ -170,6 +471,33 @@ class FileService:
                 detail=f"Error reading CSV file: {str(e)}",
             )
 
+    def preview_csv(
+        self, file_id: str, limit: int = 20, offset: int = 0
+    ) -> Tuple[List[str], List[List[str]], Optional[int]]:
+        """
+        Preview a page of CSV file contents as text rows.
+
+        See `preview_frame`.
+
+        Returns:
+            Tuple of (headers, rows, total_row_count)
+        """
+        df, total_rows = self.preview_frame(file_id, limit, offset)
+        return df.columns, self.text_rows(df), total_rows
+
+    @staticmethod
+    def text_rows(df: "pl.DataFrame") -> List[List[str]]:
+        """Rows of a frame with every value as text and nulls as empty strings."""
+        return [
+            list(row)
+            for row in df.select(pl.all().cast(pl.String).fill_null("")).rows()
+        ]
+
+    def has_derived_cache(self, file_id: str) -> bool:
+        """Check whether reads of a file can use its row index or columnar copy."""
+        file_path = Path(self.get_file_info(file_id).file_path)
+        return any(path.exists() for path in self._derived_paths(file_path))
+
 
 # Global instance
-file_service = FileService()
+file_service = FileService(registry_path=Path(settings.FILE_REGISTRY_PATH))
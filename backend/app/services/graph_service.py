@@ -1,11 +1,17 @@
-from dataclasses import dataclass
+import time
+from dataclasses import asdict, dataclass
 from typing import Any, Optional
 
 from app.logger import get_logger
 from app.api.schemas.graphs import (
     ExportedGraph,
     GraphNode,
+    NodeProfile,
+    PreviewGraphResponse,
+    ProcessGraphResponse,
 )
+from app.services.single_flight import canonical_hash
+from app.services.tracing import span
 
 logger = get_logger("services.graph")
 
@@ -37,7 +43,8 @@ class GraphService:
 
     def __init__(self, graph: ExportedGraph):
         self.graph = graph
-        self.internal_graph = self._to_internal_graph(graph)
+        with span("to_internal_graph", nodes=len(graph.nodes)):
+            self.internal_graph = self._to_internal_graph(graph)
         self.selected_subtree = self.internal_graph
 
     @staticmethod
@@ -134,3 +141,171 @@ class GraphService:
                 )
 
         return [self.graph.nodes[n.input_index] for n in sorted_nodes]
+
+    def process_graph(self) -> ProcessGraphResponse:
+        """
+        Create an execution plan: the operations in dependency order.
+        """
+        with span("topological_sort"):
+            sorted_nodes = self.topological_sort()
+        operations = [
+            {
+                "node_id": node.id,
+                "type": node.type,
+                "operator": node.operator,
+                "inputs": [asdict(edge) for edge in self.internal_graph[node.id].inputs],
+            }
+            for node in sorted_nodes
+        ]
+        execution_plan = {
+            "order": [node.id for node in sorted_nodes],
+            "dependencies": {
+                node.id: self.internal_graph[node.id].get_parent_ids()
+                for node in sorted_nodes
+            },
+        }
+        return ProcessGraphResponse(operations=operations, execution_plan=execution_plan)
+
+    def preview_graph(
+        self, preview_limit: int, profile: bool = False
+    ) -> PreviewGraphResponse:
+        """
+        Create the execution plan and preview the data of its input nodes.
+
+        CSV input nodes are previewed from the uploaded file their operator
+        refers to. With `profile`, the response reports for every executed
+        node its wall time, row counts, output size and whether it was read
+        through a derived cache (row index or columnar copy).
+        """
+        # Imported here: the file service sets up storage on import
+        from app.services.file_service import file_service
+
+        start = time.perf_counter()
+        plan = self.process_graph()
+        plan_ms = (time.perf_counter() - start) * 1000
+        preview_data = {}
+        node_profiles = []
+        for operation in plan.operations:
+            operator = operation["operator"]
+            if operator.get("type") != "csv_input":
+                continue
+            node_start = time.perf_counter()
+            with span("node", node_id=operation["node_id"], operator="csv_input"):
+                cached = profile and file_service.has_derived_cache(operator["id"])
+                with span("fetch", file_id=operator["id"]):
+                    df, total_rows = file_service.preview_frame(
+                        operator["id"], limit=preview_limit
+                    )
+                preview_data[operation["node_id"]] = {
+                    "headers": df.columns,
+                    "rows": file_service.text_rows(df),
+                    "total_rows": total_rows,
+                }
+            if profile:
+                node_profiles.append(
+                    NodeProfile(
+                        node_id=operation["node_id"],
+                        type=operation["type"],
+                        wall_time_ms=(time.perf_counter() - node_start) * 1000,
+                        input_rows=total_rows,
+                        output_rows=df.height,
+                        output_bytes=df.estimated_size(),
+                        cached=cached,
+                    )
+                )
+        metadata = {
+            "preview_limit": preview_limit,
+            "node_count": len(plan.operations),
+            "previewed_nodes": len(preview_data),
+            "duration_ms": (time.perf_counter() - start) * 1000,
+        }
+        if profile:
+            metadata["plan_ms"] = plan_ms
+        return PreviewGraphResponse(
+            preview_data=preview_data,
+            operations=plan.operations,
+            metadata=metadata,
+            profile=node_profiles if profile else None,
+        )
+
+    def update_node_operator(self, node_id: str) -> dict[str, Any]:
+        """
+        Recompute the operator of a node after the graph changed.
+
+        A join node exposes the outputs of the nearest dataframe-producing
+        node upstream of each of its inputs.
+        """
+        operator = self.internal_graph[node_id].operator
+        if operator["type"] != "join":
+            return operator
+
+        left_dataframe = None
+        right_dataframe = None
+        for edge in self.graph.edges:
+            if edge.target_node_id == node_id:
+                if edge.target_handle_id == "left-dataframe":
+                    left_dataframe = edge.source_node_id
+                elif edge.target_handle_id == "right-dataframe":
+                    right_dataframe = edge.source_node_id
+
+        operator["outputs"] = []
+        for source_id in (left_dataframe, right_dataframe):
+            if source_id is None:
+                continue
+            with span("select_subtree", node_id=source_id):
+                self.select_subtree(source_id)
+            with span("topological_sort"):
+                upstream_nodes = self.topological_sort()
+            for upstream in upstream_nodes[::-1]:
+                if upstream.operator["type"] in ["join", "csv_input", "manual-input"]:
+                    operator["outputs"] += upstream.operator["outputs"]
+                    break
+        logger.debug("Updated join outputs", node_id=node_id, outputs=len(operator["outputs"]))
+        return operator
+
+
+# Entry points for the execution pool: graphs travel as JSON
+
+def preview_key(graph: ExportedGraph, preview_limit: int, profile: bool = False) -> str:
+    """
+    Identify a graph preview by what its result depends on.
+
+    Node positions, edge IDs and export metadata are left out, so graphs that
+    only differ in layout or export time share a key. Inputs are identified
+    by the file IDs in their operators, and stored files never change.
+    """
+    return canonical_hash(
+        {
+            "version": graph.version,
+            "nodes": [
+                {"id": node.id, "type": node.type, "operator": node.operator}
+                for node in graph.nodes
+            ],
+            "edges": [
+                [
+                    edge.source_node_id,
+                    edge.source_handle_id,
+                    edge.target_node_id,
+                    edge.target_handle_id,
+                ]
+                for edge in graph.edges
+            ],
+            "preview_limit": preview_limit,
+            "profile": profile,
+        }
+    )
+
+
+def preview_graph(graph_json: str, preview_limit: int, profile: bool = False) -> str:
+    """Preview a graph; returns the PreviewGraphResponse as JSON."""
+    with span("parse_graph"):
+        graph = ExportedGraph.model_validate_json(graph_json)
+    preview = GraphService(graph).preview_graph(preview_limit, profile)
+    with span("serialize_response"):
+        return preview.model_dump_json()
+
+
+def update_node_operator(graph_json: str, node_id: str) -> dict[str, Any]:
+    """Recompute the operator of a node of a graph."""
+    graph = ExportedGraph.model_validate_json(graph_json)
+    return GraphService(graph).update_node_operator(node_id)
@@ -0,0 +1,324 @@
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, UTC
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterator, List, Optional, Union
+
+from app.api.schemas.jobs import JobInfo, JobPlan
+from app.config import settings
+from app.logger import get_logger
+
+logger = get_logger("services.job_queue")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    plan TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    heartbeat_at REAL,
+    worker_id TEXT,
+    rows_processed INTEGER NOT NULL DEFAULT 0,
+    bytes_processed INTEGER NOT NULL DEFAULT 0,
+    source_bytes INTEGER,
+    result_location TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status_created_at ON jobs (status, created_at);
+"""
+
+INFO_COLUMNS = (
+    "job_id, status, created_at, started_at, finished_at, rows_processed,"
+    " bytes_processed, source_bytes, result_location, error"
+)
+
+# Updates of a running job only apply while the worker still holds it
+HELD_BY_WORKER = " WHERE job_id = ? AND worker_id = ? AND status = 'running'"
+
+
+@dataclass
+class ClaimedJob:
+    """A job handed to a worker."""
+
+    job_id: str
+    worker_id: str
+    plan: JobPlan
+
+
+class LeaseLost(Exception):
+    """The lease of a job expired and another worker took the job over."""
+
+
+class JobQueue(ABC):
+    """
+    Durable queue of transform jobs.
+
+    The API enqueues plans and reads job status; job workers claim queued
+    jobs and report progress. A job claimed by a worker that stops reporting
+    for longer than the lease is handed to another worker. Updates from the
+    worker that lost it are then ignored, and tell it to stop.
+    """
+
+    # Time a running job may go without a progress update before it is
+    # handed to another worker
+    lease_seconds: float
+
+    @abstractmethod
+    def enqueue(self, plan: JobPlan, job_id: Optional[str] = None) -> JobInfo:
+        """Add a job to the queue."""
+
+    @abstractmethod
+    def claim(self, worker_id: str) -> Optional[ClaimedJob]:
+        """Take the oldest queued job (or one whose lease expired), if any."""
+
+    @abstractmethod
+    def update_progress(
+        self,
+        job_id: str,
+        worker_id: str,
+        rows_processed: int,
+        bytes_processed: int,
+        source_bytes: Optional[int] = None,
+    ) -> bool:
+        """
+        Record the progress of a running job and renew its lease.
+
+        Returns:
+            False if the worker no longer holds the job, in which case nothing
+            is recorded
+        """
+
+    @abstractmethod
+    def heartbeat(self, job_id: str, worker_id: str) -> bool:
+        """Renew the lease of a running job; False if the worker lost it."""
+
+    @abstractmethod
+    def complete(self, job_id: str, worker_id: str, result_location: str) -> bool:
+        """Mark a job as succeeded; False if the worker lost it."""
+
+    @abstractmethod
+    def fail(self, job_id: str, worker_id: str, error: str) -> bool:
+        """Mark a job as failed; False if the worker lost it."""
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[JobInfo]:
+        """Get a job by ID."""
+
+    @abstractmethod
+    def list_jobs(self, limit: int = 50) -> List[JobInfo]:
+        """Get the most recently created jobs, newest first."""
+
+    @contextmanager
+    def renewing_lease(self, job: ClaimedJob) -> Iterator[None]:
+        """
+        Keep renewing the lease of a job while a long step runs.
+
+        For steps that report no progress, such as downloading the source or
+        uploading the result.
+
+        Raises:
+            LeaseLost: If the job was taken over before or during the step
+        """
+        if not self.heartbeat(job.job_id, job.worker_id):
+            raise LeaseLost(job.job_id)
+        stop = threading.Event()
+        lost = threading.Event()
+
+        def renew() -> None:
+            while not stop.wait(self.lease_seconds / 3):
+                if not self.heartbeat(job.job_id, job.worker_id):
+                    lost.set()
+                    return
+
+        thread = threading.Thread(target=renew, name=f"lease-{job.job_id}", daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+        if lost.is_set() or not self.heartbeat(job.job_id, job.worker_id):
+            raise LeaseLost(job.job_id)
+
+
+def _timestamp(value: Optional[float]) -> Optional[datetime]:
+    return datetime.fromtimestamp(value, UTC) if value is not None else None
+
+
+class SQLiteJobQueue(JobQueue):
+    """
+    Job queue backed by SQLite in WAL mode.
+
+    Works on a local disk shared by the API and worker processes. Claims run
+    in an immediate transaction, so a job is only ever claimed by one worker.
+    """
+
+    def __init__(self, db_path: Union[str, Path], lease_seconds: float):
+        """
+        Args:
+            db_path: Path of the database file, created if missing
+            lease_seconds: Time a running job may go without a progress
+                update before it is handed to another worker
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.lease_seconds = lease_seconds
+        self._local = threading.local()
+        self._connection().executescript(SCHEMA)
+
+    def __getstate__(self):
+        # Connections stay in the process that opened them
+        state = self.__dict__.copy()
+        del state["_local"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get the connection for the current thread."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def enqueue(self, plan: JobPlan, job_id: Optional[str] = None) -> JobInfo:
+        job_id = job_id or str(uuid.uuid4())
+        self._connection().execute(
+            "INSERT INTO jobs (job_id, status, plan, created_at) VALUES (?, 'queued', ?, ?)",
+            (job_id, plan.model_dump_json(), time.time()),
+        )
+        logger.info("Enqueued job", job_id=job_id, source_file=plan.source_file)
+        return self.get(job_id)
+
+    def claim(self, worker_id: str) -> Optional[ClaimedJob]:
+        connection = self._connection()
+        now = time.time()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(
+                "SELECT job_id, plan FROM jobs"
+                " WHERE status = 'queued' OR (status = 'running' AND heartbeat_at < ?)"
+                " ORDER BY created_at LIMIT 1",
+                (now - self.lease_seconds,),
+            ).fetchone()
+            if row is not None:
+                # Progress restarts from scratch when a job is taken over
+                connection.execute(
+                    "UPDATE jobs SET status = 'running', worker_id = ?, started_at = ?,"
+                    " heartbeat_at = ?, rows_processed = 0, bytes_processed = 0"
+                    " WHERE job_id = ?",
+                    (worker_id, now, now, row[0]),
+                )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        if row is None:
+            return None
+        logger.info("Claimed job", job_id=row[0], worker_id=worker_id)
+        return ClaimedJob(
+            job_id=row[0], worker_id=worker_id, plan=JobPlan.model_validate_json(row[1])
+        )
+
+    def update_progress(
+        self,
+        job_id: str,
+        worker_id: str,
+        rows_processed: int,
+        bytes_processed: int,
+        source_bytes: Optional[int] = None,
+    ) -> bool:
+        cursor = self._connection().execute(
+            "UPDATE jobs SET rows_processed = ?, bytes_processed = ?,"
+            " source_bytes = COALESCE(?, source_bytes), heartbeat_at = ?" + HELD_BY_WORKER,
+            (rows_processed, bytes_processed, source_bytes, time.time(), job_id, worker_id),
+        )
+        return cursor.rowcount == 1
+
+    def heartbeat(self, job_id: str, worker_id: str) -> bool:
+        cursor = self._connection().execute(
+            "UPDATE jobs SET heartbeat_at = ?" + HELD_BY_WORKER,
+            (time.time(), job_id, worker_id),
+        )
+        return cursor.rowcount == 1
+
+    def complete(self, job_id: str, worker_id: str, result_location: str) -> bool:
+        cursor = self._connection().execute(
+            "UPDATE jobs SET status = 'succeeded', result_location = ?, finished_at = ?"
+            + HELD_BY_WORKER,
+            (result_location, time.time(), job_id, worker_id),
+        )
+        if cursor.rowcount != 1:
+            return False
+        logger.info("Job succeeded", job_id=job_id, result_location=result_location)
+        return True
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> bool:
+        cursor = self._connection().execute(
+            "UPDATE jobs SET status = 'failed', error = ?, finished_at = ?" + HELD_BY_WORKER,
+            (error, time.time(), job_id, worker_id),
+        )
+        if cursor.rowcount != 1:
+            return False
+        logger.error("Job failed", job_id=job_id, error=error)
+        return True
+
+    def get(self, job_id: str) -> Optional[JobInfo]:
+        row = self._connection().execute(
+            f"SELECT {INFO_COLUMNS} FROM jobs WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        return self._info(row) if row else None
+
+    def list_jobs(self, limit: int = 50) -> List[JobInfo]:
+        rows = self._connection().execute(
+            f"SELECT {INFO_COLUMNS} FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+        ).fetchall()
+        return [self._info(row) for row in rows]
+
+    @staticmethod
+    def _info(row: tuple) -> JobInfo:
+        return JobInfo(
+            job_id=row[0],
+            status=row[1],
+            created_at=_timestamp(row[2]),
+            started_at=_timestamp(row[3]),
+            finished_at=_timestamp(row[4]),
+            rows_processed=row[5],
+            bytes_processed=row[6],
+            source_bytes=row[7],
+            result_location=row[8],
+            error=row[9],
+        )
+
+
+def get_job_queue(backend: Optional[str] = None) -> JobQueue:
+    """
+    Get the job queue for a backend.
+
+    Args:
+        backend: Only "sqlite" for now. Defaults to the configured JOB_QUEUE_BACKEND.
+
+    Returns:
+        The (shared) job queue instance for that backend
+    """
+    return _create_job_queue(backend or settings.JOB_QUEUE_BACKEND)
+
+
+@lru_cache
+def _create_job_queue(backend: str) -> JobQueue:
+    if backend == "sqlite":
+        return SQLiteJobQueue(settings.JOB_QUEUE_PATH, settings.JOB_LEASE_SECONDS)
+    raise ValueError(f"Unknown job queue backend: {backend}")
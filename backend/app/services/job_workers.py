@@ -0,0 +1,116 @@
+import multiprocessing
+import os
+import signal
+import socket
+from multiprocessing.synchronize import Event
+from typing import List, Optional
+
+from app.config import settings
+from app.logger import configure_logging, get_logger
+from app.services.job_queue import JobQueue, get_job_queue
+
+logger = get_logger("services.job_workers")
+
+
+def _work(queue: JobQueue, stop: Event, poll_interval: float, batch_rows: int) -> None:
+    """Main loop of a job worker process: claim and run jobs until stopped."""
+    configure_logging()
+    # Imported here so the API process doesn't depend on routes at import time
+    from app.api.routes.transform import execute_job
+
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    logger.info("Job worker started", worker_id=worker_id)
+    while not stop.is_set():
+        job = queue.claim(worker_id)
+        if job is None:
+            stop.wait(poll_interval)
+            continue
+        execute_job(queue, job, batch_rows)
+    logger.info("Job worker stopped", worker_id=worker_id)
+
+
+class JobWorkers:
+    """
+    Worker processes that run queued transform jobs.
+
+    Each worker polls the queue and runs one job at a time, so throughput is
+    set by the number of workers rather than by the number of open requests.
+    Workers can run inside the API process or on their own; a job left behind
+    by a worker that died is taken over once its lease expires.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        queue: Optional[JobQueue] = None,
+        poll_interval: float = settings.JOB_POLL_INTERVAL,
+        batch_rows: int = settings.JOB_BATCH_ROWS,
+    ):
+        """
+        Args:
+            workers: Number of worker processes
+            queue: Queue to take jobs from, defaults to the configured backend
+            poll_interval: Seconds an idle worker waits between polls
+            batch_rows: Number of source rows transformed at a time
+        """
+        self.workers = workers
+        self.queue = queue
+        self.poll_interval = poll_interval
+        self.batch_rows = batch_rows
+        # Polars is not fork-safe, so workers are spawned
+        self._context = multiprocessing.get_context("spawn")
+        self._stop = self._context.Event()
+        self._processes: List[multiprocessing.Process] = []
+
+    def start(self) -> None:
+        """Spawn the worker processes."""
+        queue = self.queue or get_job_queue()
+        self._stop.clear()
+        for i in range(self.workers):
+            process = self._context.Process(
+                target=_work,
+                args=(queue, self._stop, self.poll_interval, self.batch_rows),
+                name=f"job-worker-{i}",
+                daemon=True,
+            )
+            process.start()
+            self._processes.append(process)
+        logger.info("Job workers started", workers=self.workers)
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """
+        Stop the worker processes.
+
+        Workers finish the job they are running; those still busy after
+        `timeout` seconds are terminated and their jobs are retried by
+        another worker once the lease expires.
+        """
+        self._stop.set()
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                logger.warning("Terminating busy job worker", pid=process.pid)
+                process.terminate()
+                process.join()
+        self._processes = []
+
+    def join(self) -> None:
+        """Wait for the worker processes to exit."""
+        for process in self._processes:
+            process.join()
+
+
+# Global instance
+job_workers = JobWorkers(settings.JOB_WORKERS)
+
+
+if __name__ == "__main__":
+    # Run workers without the API: python -m app.services.job_workers
+    configure_logging()
+    workers = JobWorkers(max(settings.JOB_WORKERS, 1))
+    workers.start()
+    signal.signal(signal.SIGTERM, lambda *_: workers.stop())
+    try:
+        workers.join()
+    except KeyboardInterrupt:
+        workers.stop()
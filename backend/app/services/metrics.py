@@ -0,0 +1,321 @@
+import asyncio
+import atexit
+import json
+import math
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from app.config import settings
+from app.logger import get_logger
+
+logger = get_logger("services.metrics")
+
+# Default latency buckets, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Metric:
+    """A named metric with a fixed set of labels."""
+
+    type = ""
+
+    def __init__(self, registry: "MetricsRegistry", name: str, help: str, labelnames: Sequence[str]):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.values: Dict[LabelValues, object] = {}
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+
+class Counter(Metric):
+    """A value that only goes up, summed over processes."""
+
+    type = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self.registry.lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+        self.registry.mark_dirty()
+
+
+class Gauge(Metric):
+    """A value that goes up and down, reported per process."""
+
+    type = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        with self.registry.lock:
+            self.values[self._key(labels)] = value
+        self.registry.mark_dirty()
+
+
+class Histogram(Metric):
+    """Observations counted in cumulative buckets, summed over processes."""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        registry: "MetricsRegistry",
+        name: str,
+        help: str,
+        labelnames: Sequence[str],
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(registry, name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self.registry.lock:
+            # Per-bucket counts followed by the sum and the count
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+        self.registry.mark_dirty()
+
+
+class MetricsRegistry:
+    """
+    Metrics of this process, shared with the other processes of the server.
+
+    Recording only updates in-memory values. A background thread writes a
+    snapshot of them to `<directory>/<pid>.json` when they changed, at most
+    every `flush_interval` seconds, so uvicorn workers and pool worker
+    processes all contribute. `collect` merges the snapshots of the live
+    processes: counters and histograms are summed, gauges get a `pid` label.
+    Snapshots of processes that exited are dropped, which Prometheus treats
+    as a counter reset.
+    """
+
+    def __init__(self, directory: Union[str, Path], flush_interval: float):
+        self.directory = Path(directory)
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.metrics: Dict[str, Metric] = {}
+        self._dirty = False
+        self._flusher: Optional[threading.Thread] = None
+        self._flusher_pid: Optional[int] = None
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(self, name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(self, name, help, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(self, name, help, labelnames, buckets))
+
+    def _register(self, metric: Metric) -> Metric:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def mark_dirty(self) -> None:
+        self._dirty = True
+        # Forked or spawned processes start their own flusher
+        if self._flusher_pid != os.getpid():
+            self._start_flusher()
+
+    def _start_flusher(self) -> None:
+        with self.lock:
+            if self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+            self._flusher = threading.Thread(
+                target=self._flush_periodically, name="metrics-flusher", daemon=True
+            )
+            self._flusher.start()
+        atexit.register(self.flush)
+
+    def _flush_periodically(self) -> None:
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def snapshot(self) -> Dict[str, List]:
+        """Copy of the current values, keyed by metric name."""
+        with self.lock:
+            return {
+                name: [
+                    [list(key), list(value) if isinstance(value, list) else value]
+                    for key, value in metric.values.items()
+                ]
+                for name, metric in self.metrics.items()
+            }
+
+    def flush(self) -> None:
+        """Write the snapshot of this process if anything changed."""
+        if not self._dirty:
+            return
+        self._dirty = False
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self.directory / f"{os.getpid()}.json"
+            tmp_path = path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(self.snapshot()))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("Could not write metrics snapshot", error=str(e))
+
+    def _snapshots(self) -> Dict[int, Dict[str, List]]:
+        """Snapshots of every live process, this one read from memory."""
+        snapshots = {os.getpid(): self.snapshot()}
+        try:
+            paths = list(self.directory.glob("*.json"))
+        except OSError:
+            paths = []
+        for path in paths:
+            try:
+                pid = int(path.stem)
+            except ValueError:
+                continue
+            if pid in snapshots:
+                continue
+            if not _is_alive(pid):
+                path.unlink(missing_ok=True)
+                continue
+            try:
+                snapshots[pid] = json.loads(path.read_text())
+            except (OSError, ValueError):
+                # Removed or replaced while reading
+                continue
+        return snapshots
+
+    def collect(self) -> str:
+        """Render the metrics of all processes in the Prometheus text format."""
+        merged: Dict[str, Dict[LabelValues, object]] = {name: {} for name in self.metrics}
+        for pid, snapshot in self._snapshots().items():
+            for name, samples in snapshot.items():
+                metric = self.metrics.get(name)
+                if metric is None:
+                    continue
+                values = merged[name]
+                for key, value in samples:
+                    key = tuple(key)
+                    if metric.type == "gauge":
+                        values[(*key, str(pid))] = value
+                    elif metric.type == "counter":
+                        values[key] = values.get(key, 0.0) + value
+                    else:
+                        total = values.setdefault(key, [0] * len(value))
+                        for i, v in enumerate(value):
+                            total[i] += v
+
+        lines = []
+        for name, metric in self.metrics.items():
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.type}")
+            for key, value in sorted(merged[name].items()):
+                if metric.type == "gauge":
+                    labels = _format_labels((*metric.labelnames, "pid"), key)
+                    lines.append(f"{name}{labels} {_format_value(value)}")
+                elif metric.type == "counter":
+                    labels = _format_labels(metric.labelnames, key)
+                    lines.append(f"{name}_total{labels} {_format_value(value)}")
+                else:
+                    lines.extend(self._histogram_lines(metric, key, value))
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _histogram_lines(metric: Histogram, key: LabelValues, state: List) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip((*metric.buckets, math.inf), (*state[:-2], None)):
+            cumulative = state[-1] if count is None else cumulative + count
+            labels = _format_labels((*metric.labelnames, "le"), (*key, _format_value(bound)))
+            lines.append(f"{metric.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(metric.labelnames, key)
+        lines.append(f"{metric.name}_sum{labels} {_format_value(state[-2])}")
+        lines.append(f"{metric.name}_count{labels} {state[-1]}")
+        return lines
+
+
+def _is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+async def monitor_event_loop_lag(interval: float) -> None:
+    """Measure how late the event loop wakes up from sleeps, until cancelled."""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.set(max(loop.time() - start - interval, 0.0))
+
+
+# Global instance
+metrics = MetricsRegistry(settings.METRICS_DIR, settings.METRICS_FLUSH_INTERVAL)
+
+REQUEST_DURATION = metrics.histogram(
+    "http_request_duration_seconds",
+    "Time until the response headers were sent, per route",
+    ["method", "route", "status"],
+)
+OPERATOR_DURATION = metrics.histogram(
+    "operator_execution_seconds",
+    "Time spent executing nodes, per node type",
+    ["operator"],
+)
+OPERATOR_ROWS = metrics.counter(
+    "operator_rows",
+    "Rows produced by executed nodes, per node type",
+    ["operator"],
+)
+S3_REQUESTS = metrics.counter("s3_requests", "S3 API requests, per operation", ["operation"])
+S3_BYTES_READ = metrics.counter("s3_bytes_read", "Bytes downloaded from S3")
+CACHE_REQUESTS = metrics.counter(
+    "cache_requests", "Cache lookups, per cache and result (hit or miss)", ["cache", "result"]
+)
+EVENT_LOOP_LAG = metrics.gauge(
+    "event_loop_lag_seconds", "Delay of the event loop at its last measurement"
+)
+POOL_QUEUE_DEPTH = metrics.gauge(
+    "execution_pool_queue_depth", "Tasks waiting for a free worker, per pool", ["pool"]
+)
+POOL_ACTIVE_TASKS = metrics.gauge(
+    "execution_pool_active_tasks", "Tasks running on a worker, per pool", ["pool"]
+)
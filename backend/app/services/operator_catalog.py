@@ -0,0 +1,119 @@
+import hashlib
+import json
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+
+from app.api.schemas.operator import Operator
+from app.config import settings
+from app.logger import get_logger
+from app.services.metrics import CACHE_REQUESTS
+
+logger = get_logger("services.operator_catalog")
+
+# Directory holding one JSON file per operator
+OPERATORS_DIR = Path(__file__).parent.parent / "api" / "operators"
+
+# (file name, modification time, size) of every operator file
+Fingerprint = Tuple[Tuple[str, int, int], ...]
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """The operator catalog as loaded from disk, ready to serve."""
+
+    operators: List[Dict[str, Any]]
+    # Serialized response body and its strong ETag
+    body: bytes
+    etag: str
+
+
+class OperatorCatalog:
+    """
+    Parsed and validated operator definitions, kept in memory.
+
+    Each access compares the names, modification times and sizes of the
+    operator files with those of the loaded snapshot and only reloads when
+    they differ. The response body and ETag are computed once per load.
+    Files that don't match the `Operator` schema are logged and left out.
+
+    Without `revalidate` the files are only read once, for deployments whose
+    files can't change, like a Lambda package; warm invocations then don't
+    touch the filesystem at all.
+    """
+
+    def __init__(
+        self, operators_dir: Union[str, Path] = OPERATORS_DIR, revalidate: bool = True
+    ):
+        self.operators_dir = Path(operators_dir)
+        self.revalidate = revalidate
+        self._lock = threading.Lock()
+        self._fingerprint: Optional[Fingerprint] = None
+        self._snapshot: Optional[CatalogSnapshot] = None
+
+    def _scan(self) -> Fingerprint:
+        try:
+            stats = [
+                (entry.name, entry.stat())
+                for entry in os.scandir(self.operators_dir)
+                if entry.name.endswith(".json") and entry.is_file()
+            ]
+        except FileNotFoundError:
+            logger.error(f"Operators directory not found: {self.operators_dir}")
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Operators directory not found",
+            )
+        return tuple(sorted((name, st.st_mtime_ns, st.st_size) for name, st in stats))
+
+    def _load(self, fingerprint: Fingerprint) -> CatalogSnapshot:
+        operators = []
+        for name, _, _ in fingerprint:
+            path = self.operators_dir / name
+            try:
+                with open(path, "r") as f:
+                    operator_data = json.load(f)
+                Operator.model_validate(operator_data)
+            except (OSError, json.JSONDecodeError, ValidationError) as e:
+                logger.error(f"Skipping invalid operator file {name}: {str(e)}")
+                continue
+            operators.append(operator_data)
+
+        body = json.dumps({"operators": operators, "count": len(operators)}).encode()
+        etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        logger.info("Loaded operator catalog", count=len(operators), etag=etag)
+        return CatalogSnapshot(operators=operators, body=body, etag=etag)
+
+    def get(self) -> CatalogSnapshot:
+        """Get the current catalog, reloading it if operator files changed."""
+        snapshot = self._snapshot
+        if not self.revalidate and snapshot is not None:
+            CACHE_REQUESTS.inc(cache="operator_catalog", result="hit")
+            return snapshot
+        fingerprint = self._scan()
+        with self._lock:
+            if self._snapshot is None or fingerprint != self._fingerprint:
+                CACHE_REQUESTS.inc(cache="operator_catalog", result="miss")
+                self._snapshot = self._load(fingerprint)
+                self._fingerprint = fingerprint
+            else:
+                CACHE_REQUESTS.inc(cache="operator_catalog", result="hit")
+            return self._snapshot
+
+    @staticmethod
+    def matches(if_none_match: Optional[str], etag: str) -> bool:
+        """Check an If-None-Match header against an ETag."""
+        if not if_none_match:
+            return False
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        # If-None-Match uses weak comparison
+        return "*" in candidates or etag in [tag.removeprefix("W/") for tag in candidates]
+
+
+# Global instance; the files of a Lambda package are read-only
+operator_catalog = OperatorCatalog(revalidate=not settings.is_lambda)
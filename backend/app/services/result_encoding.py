@@ -0,0 +1,203 @@
+import io
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Union
+
+from fastapi import HTTPException, status
+
+from app.core.lazy import lazy_import
+from app.logger import get_logger
+
+pl = lazy_import("polars")
+pa = lazy_import("pyarrow")
+
+logger = get_logger("services.result_encoding")
+
+JSON = "application/json"
+CSV = "text/csv"
+NDJSON = "application/x-ndjson"
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+PARQUET = "application/vnd.apache.parquet"
+
+# Binary formats, encoded straight from Arrow buffers
+ARROW_MEDIA_TYPES = [ARROW_STREAM, PARQUET]
+# Formats a result can be streamed in, in order of preference
+STREAM_MEDIA_TYPES = [CSV, NDJSON, *ARROW_MEDIA_TYPES]
+
+
+def negotiate_media_type(
+    accept: Optional[str], supported: List[str] = STREAM_MEDIA_TYPES
+) -> str:
+    """
+    Pick the response media type from an Accept header.
+
+    The supported type with the highest quality wins; ties go to the type
+    listed first in the header. Wildcards and a missing header give the first
+    supported type.
+
+    Args:
+        accept: Value of the Accept header
+        supported: Media types the endpoint can produce, the default first
+
+    Raises:
+        HTTPException: 406 if the header only accepts unsupported types
+    """
+    if not accept:
+        return supported[0]
+
+    best, best_quality = None, 0.0
+    for part in accept.split(","):
+        media_type, *params = [p.strip() for p in part.split(";")]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if media_type.endswith("/*"):
+            prefix = media_type[:-1] if media_type != "*/*" else ""
+            media_type = next((t for t in supported if t.startswith(prefix)), "")
+        if media_type in supported and quality > best_quality:
+            best, best_quality = media_type, quality
+
+    if best is None:
+        raise HTTPException(
+            status_code=status.HTTP_406_NOT_ACCEPTABLE,
+            detail=f"Supported result formats: {', '.join(supported)}",
+        )
+    return best
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file handing out what was written since the last `take`."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        # Writers record offsets (e.g. of Parquet row groups) from this
+        return self._position
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _iter_arrow_encoded(
+    schema: "pa.Schema", batches: "Iterable[pa.RecordBatch]", media_type: str
+) -> Iterator[bytes]:
+    """Encode record batches as an Arrow IPC stream or Parquet, batch by batch."""
+    sink = _ChunkSink()
+    if media_type == ARROW_STREAM:
+        writer = pa.ipc.new_stream(sink, schema)
+    else:
+        import pyarrow.parquet as pq
+
+        # One row group per batch
+        writer = pq.ParquetWriter(sink, schema)
+    with writer:
+        for batch in batches:
+            writer.write_batch(batch)
+            yield sink.take()
+    yield sink.take()
+
+
+def iter_encoded(
+    empty: "pl.DataFrame", batches: "Iterable[pl.DataFrame]", media_type: str
+) -> Iterator[bytes]:
+    """
+    Encode a result batch by batch as text.
+
+    Only one encoded batch is held at a time, so memory stays flat however
+    large the result is.
+
+    Args:
+        empty: Frame with the schema of the result and no rows
+        batches: Batches of the result
+        media_type: CSV or NDJSON
+
+    Yields:
+        Encoded chunks
+    """
+    if media_type == CSV:
+        # The header goes out even when there are no rows
+        yield empty.write_csv().encode()
+        for batch in batches:
+            yield batch.write_csv(include_header=False).encode()
+    else:
+        for batch in batches:
+            yield batch.write_ndjson().encode()
+
+
+def encode_frame(df: "pl.DataFrame", media_type: str) -> bytes:
+    """Encode a whole (small) result in one of STREAM_MEDIA_TYPES."""
+    if media_type == ARROW_STREAM:
+        return df.write_ipc_stream(None, compat_level=pl.CompatLevel.newest()).getvalue()
+    if media_type == PARQUET:
+        buffer = io.BytesIO()
+        df.write_parquet(buffer)
+        return buffer.getvalue()
+    return b"".join(iter_encoded(df.head(0), [df], media_type))
+
+
+def iter_ipc_file(path: Union[str, Path], media_type: str) -> Iterator[bytes]:
+    """
+    Encode an Arrow IPC file batch by batch.
+
+    The file is memory-mapped and its record batches are used without
+    copying, so a batch is only paged in when it is encoded. Arrow and
+    Parquet output is written from the batches' buffers directly.
+
+    Args:
+        path: Arrow IPC file, e.g. written by a worker process
+        media_type: One of STREAM_MEDIA_TYPES
+
+    Yields:
+        Encoded chunks
+    """
+    with pa.memory_map(str(path)) as source:
+        reader = pa.ipc.open_file(source)
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        yield from _iter_batches_encoded(reader.schema, batches, media_type)
+
+
+def iter_ipc_stream(source: BinaryIO, media_type: str) -> Iterator[bytes]:
+    """
+    Encode an Arrow IPC stream batch by batch, as it is being written.
+
+    Each record batch is encoded as soon as it has been read, so the first
+    chunk goes out while the writer is still producing the rest.
+
+    Args:
+        source: Readable end of the stream, e.g. a socket a worker writes to
+        media_type: One of STREAM_MEDIA_TYPES
+
+    Yields:
+        Encoded chunks
+    """
+    reader = pa.ipc.open_stream(source)
+    yield from _iter_batches_encoded(reader.schema, reader, media_type)
+
+
+def _iter_batches_encoded(
+    schema: "pa.Schema", batches: "Iterable[pa.RecordBatch]", media_type: str
+) -> Iterator[bytes]:
+    if media_type in ARROW_MEDIA_TYPES:
+        yield from _iter_arrow_encoded(schema, batches, media_type)
+    else:
+        yield from iter_encoded(
+            pl.from_arrow(schema.empty_table()),
+            (pl.from_arrow(batch) for batch in batches),
+            media_type,
+        )
@@ -0,0 +1,72 @@
+import asyncio
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict, TypeVar
+
+from app.logger import get_logger
+
+logger = get_logger("services.single_flight")
+
+T = TypeVar("T")
+
+
+def canonical_hash(value: Any) -> str:
+    """
+    Hash a JSON-serializable value independently of key order.
+
+    Args:
+        value: Plan and source description, e.g. a dict of model dumps
+
+    Returns:
+        Hex SHA-256 digest of the value's canonical JSON encoding
+    """
+    encoded = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls into one execution.
+
+    The first caller for a key starts the call; callers arriving while it is
+    in flight await the same task and get the same result or exception. The
+    key is forgotten as soon as the call finishes, so nothing is cached. A
+    caller that is cancelled (e.g. a client disconnecting) doesn't cancel the
+    call for the others.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[str, asyncio.Task] = {}
+
+    async def run(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run `fn`, or join the call already in flight for `key`.
+
+        Args:
+            key: Identity of the call, e.g. from `canonical_hash`
+            fn: Coroutine function starting the call
+        """
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._forget(key, task))
+        else:
+            logger.debug("Joined in-flight call", group=self.name, key=key)
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Mark the exception retrieved when every caller went away
+            task.exception()
+
+    def in_flight(self) -> int:
+        """Number of calls currently executing."""
+        return len(self._calls)
+
+
+# Graph previews and transform previews
+preview_flights = SingleFlight("preview")
@@ -0,0 +1,431 @@
+import mmap
+import os
+import shutil
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, UTC
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Union
+
+from fastapi import HTTPException, status
+
+from app.config import settings
+from app.core.lazy import lazy_import
+from app.logger import get_logger
+from app.services.columnar_cache import ColumnarCache
+from app.services.metrics import CACHE_REQUESTS, S3_BYTES_READ, S3_REQUESTS
+from app.services.tracing import span
+from app.services.warm_cache import ObjectFileCache, object_cache
+
+pl = lazy_import("polars")
+
+logger = get_logger("services.storage")
+
+# What the CSV readers accept directly: a filesystem path (memory-mapped by
+# the reader itself) or the raw bytes of a remote object.
+CsvSource = Union[str, bytes]
+
+
+@dataclass
+class ObjectInfo:
+    """Metadata about a single stored object."""
+
+    key: str
+    size: int
+    last_modified: datetime
+    etag: Optional[str] = None
+
+
+class ObjectStore(ABC):
+    """
+    Key/value access to stored files.
+
+    Uploads and transformation sources both go through this interface, so
+    every execution path can run against S3 or the local filesystem.
+    """
+
+    name: str
+
+    @abstractmethod
+    def list_objects(self, prefix: str = "") -> list[ObjectInfo]:
+        """List all objects whose key starts with the given prefix."""
+
+    @abstractmethod
+    def head(self, key: str) -> ObjectInfo:
+        """Get metadata for a single object."""
+
+    @abstractmethod
+    def read_bytes(self, key: str, max_bytes: Optional[int] = None) -> bytes:
+        """Read an object, or only its first `max_bytes` bytes."""
+
+    @abstractmethod
+    def open_buffer(self, key: str) -> Union[memoryview, bytes]:
+        """Get the full contents of an object as a read-only buffer."""
+
+    @abstractmethod
+    def csv_source(self, key: str) -> CsvSource:
+        """Get a source that can be handed to a CSV reader as-is."""
+
+    @abstractmethod
+    def scan_csv(self, key: str) -> "pl.LazyFrame":
+        """Lazily scan a CSV object with every column read as a string."""
+
+    @abstractmethod
+    def put_bytes(self, key: str, data: bytes) -> ObjectInfo:
+        """Store the given bytes under a key."""
+
+    @abstractmethod
+    def put_file(self, key: str, path: Path) -> ObjectInfo:
+        """Store a local file under a key. The local file is consumed."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Delete an object if it exists."""
+
+    @abstractmethod
+    def location(self, key: str) -> str:
+        """Get a URI for an object, for reporting where results were written."""
+
+    def exists(self, key: str) -> bool:
+        """Check whether an object exists."""
+        try:
+            self.head(key)
+            return True
+        except HTTPException as e:
+            if e.status_code == status.HTTP_404_NOT_FOUND:
+                return False
+            raise
+
+
+def _map_file(path: Path) -> Union[memoryview, bytes]:
+    """Memory-map a file read-only."""
+    if path.stat().st_size == 0:
+        # Empty files cannot be memory-mapped
+        return b""
+    with open(path, "rb") as f:
+        # The mapping stays valid after the file handle is closed
+        return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+class LocalObjectStore(ObjectStore):
+    """
+    Object store backed by a directory on the local filesystem.
+
+    Reads are memory-mapped: `open_buffer` returns a view over the mapped file
+    and `csv_source` returns the path so Polars maps the file itself
+    instead of copying it through Python. `scan_csv` goes through the columnar
+    (Parquet) copy of a file once one has been ingested.
+    Entries whose path contains a component starting with "." are internal
+    (caches, temporary files) and are never listed. The root directory is
+    created by the first write.
+    """
+
+    name = "local"
+
+    def __init__(self, root: Union[str, Path]):
+        self.root = Path(root)
+        self.columnar_cache = ColumnarCache(self.root / ".columnar")
+
+    def path_for(self, key: str) -> Path:
+        """Resolve a key to a path inside the store root."""
+        root = self.root.resolve()
+        path = (root / key).resolve()
+        if path == root or not path.is_relative_to(root):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid object key: {key}",
+            )
+        return path
+
+    def _info(self, key: str, path: Path) -> ObjectInfo:
+        stat = path.stat()
+        return ObjectInfo(
+            key=key,
+            size=stat.st_size,
+            last_modified=datetime.fromtimestamp(stat.st_mtime, UTC),
+            etag=f"{stat.st_mtime_ns:x}-{stat.st_size:x}",
+        )
+
+    def _existing_path(self, key: str) -> Path:
+        path = self.path_for(key)
+        if not path.is_file():
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"File {key} not found in local storage",
+            )
+        return path
+
+    def list_objects(self, prefix: str = "") -> list[ObjectInfo]:
+        objects = []
+        for path in self.root.rglob("*"):
+            key = path.relative_to(self.root).as_posix()
+            if not key.startswith(prefix) or not path.is_file():
+                continue
+            if any(part.startswith(".") for part in Path(key).parts):
+                continue
+            objects.append(self._info(key, path))
+        return sorted(objects, key=lambda o: o.key)
+
+    def head(self, key: str) -> ObjectInfo:
+        return self._info(key, self._existing_path(key))
+
+    def read_bytes(self, key: str, max_bytes: Optional[int] = None) -> bytes:
+        with open(self._existing_path(key), "rb") as f:
+            return f.read(max_bytes if max_bytes is not None else -1)
+
+    def open_buffer(self, key: str) -> Union[memoryview, bytes]:
+        return _map_file(self._existing_path(key))
+
+    def csv_source(self, key: str) -> CsvSource:
+        return str(self._existing_path(key))
+
+    def scan_csv(self, key: str) -> "pl.LazyFrame":
+        return self.columnar_cache.scan_text(self._existing_path(key))
+
+    def put_bytes(self, key: str, data: bytes) -> ObjectInfo:
+        path = self.path_for(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+        return self._info(key, path)
+
+    def put_file(self, key: str, path: Path) -> ObjectInfo:
+        target = self.path_for(key)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.move(path, target)
+        return self._info(key, target)
+
+    def delete(self, key: str) -> None:
+        path = self.path_for(key)
+        path.unlink(missing_ok=True)
+        self.columnar_cache.evict(path)
+
+    def location(self, key: str) -> str:
+        return self.path_for(key).as_uri()
+
+
+class S3ObjectStore(ObjectStore):
+    """
+    Object store backed by an S3 bucket.
+
+    With an object cache, whole-object reads keep a local copy of the object
+    and later reads revalidate it with a conditional GET (If-None-Match), so
+    an unchanged object costs a 304 instead of a download and is then read
+    from the local file, memory-mapped. On Lambda this carries downloads over
+    between warm invocations.
+    """
+
+    name = "s3"
+
+    def __init__(
+        self, bucket: Optional[str], client=None, cache: Optional[ObjectFileCache] = None
+    ):
+        self.bucket = bucket
+        self._client = client
+        self.cache = cache
+
+    def __getstate__(self):
+        # boto3 clients can't be pickled; worker processes create their own
+        return {**self.__dict__, "_client": None}
+
+    @property
+    def client(self):
+        """The boto3 client, created on first use."""
+        if self._client is None:
+            import boto3
+
+            self._client = boto3.client(
+                "s3",
+                aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
+                aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
+                aws_session_token=os.getenv("AWS_SESSION_TOKEN"),
+                region_name=settings.AWS_REGION,
+            )
+        return self._client
+
+    def _raise_client_error(self, key: str, e: Exception):
+        from botocore.exceptions import ClientError
+
+        if not isinstance(e, ClientError):
+            raise e
+        logger.error("Error accessing S3", key=key, error=str(e))
+        code = e.response.get("Error", {}).get("Code")
+        if code in ("NoSuchKey", "404", "NotFound"):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"File {key} not found in S3 or cannot be read",
+            )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error accessing S3: {str(e)}",
+        )
+
+    def list_objects(self, prefix: str = "") -> list[ObjectInfo]:
+        objects = []
+        try:
+            paginator = self.client.get_paginator("list_objects_v2")
+            with span("s3.ListObjectsV2", prefix=prefix):
+                for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+                    S3_REQUESTS.inc(operation="ListObjectsV2")
+                    for item in page.get("Contents", []):
+                        objects.append(
+                            ObjectInfo(
+                                key=item["Key"],
+                                size=item["Size"],
+                                last_modified=item["LastModified"],
+                                etag=item.get("ETag", "").strip('"') or None,
+                            )
+                        )
+        except Exception as e:
+            self._raise_client_error(prefix, e)
+        return objects
+
+    def head(self, key: str) -> ObjectInfo:
+        S3_REQUESTS.inc(operation="HeadObject")
+        try:
+            with span("s3.HeadObject", key=key):
+                response = self.client.head_object(Bucket=self.bucket, Key=key)
+        except Exception as e:
+            self._raise_client_error(key, e)
+        return ObjectInfo(
+            key=key,
+            size=response["ContentLength"],
+            last_modified=response["LastModified"],
+            etag=response.get("ETag", "").strip('"') or None,
+        )
+
+    def _get_object(self, key: str, max_bytes: Optional[int] = None) -> bytes:
+        kwargs = {"Bucket": self.bucket, "Key": key}
+        if max_bytes is not None:
+            kwargs["Range"] = f"bytes=0-{max_bytes - 1}"
+        S3_REQUESTS.inc(operation="GetObject")
+        try:
+            with span("s3.GetObject", key=key) as current:
+                response = self.client.get_object(**kwargs)
+                data = response["Body"].read()
+                if current is not None:
+                    current.attributes["bytes"] = len(data)
+            S3_BYTES_READ.inc(len(data))
+            return data
+        except Exception as e:
+            self._raise_client_error(key, e)
+
+    def _fetch(self, key: str) -> CsvSource:
+        """
+        Get the whole contents of an object.
+
+        Returns:
+            Path of the cached copy, or the bytes when the object isn't cached
+        """
+        if self.cache is None:
+            return self.read_bytes(key)
+
+        cached = self.cache.lookup(self.bucket, key)
+        kwargs = {"Bucket": self.bucket, "Key": key}
+        if cached is not None:
+            kwargs["IfNoneMatch"] = f'"{cached[1]}"'
+        S3_REQUESTS.inc(operation="GetObject")
+        try:
+            with span("s3.GetObject", key=key, cached=cached is not None) as current:
+                try:
+                    response = self.client.get_object(**kwargs)
+                except Exception as e:
+                    if cached is None or not _not_modified(e):
+                        raise
+                    CACHE_REQUESTS.inc(cache="s3_object", result="hit")
+                    self.cache.touch(cached[0])
+                    return str(cached[0])
+
+                CACHE_REQUESTS.inc(cache="s3_object", result="miss")
+                size = response["ContentLength"]
+                etag = response.get("ETag", "").strip('"') or None
+                if current is not None:
+                    current.attributes["bytes"] = size
+                S3_BYTES_READ.inc(size)
+                if not self.cache.cacheable(size, etag):
+                    return response["Body"].read()
+                return str(self.cache.store(self.bucket, key, etag, response["Body"]))
+        except Exception as e:
+            self._raise_client_error(key, e)
+
+    def read_bytes(self, key: str, max_bytes: Optional[int] = None) -> bytes:
+        if max_bytes is not None or self.cache is None:
+            return self._get_object(key, max_bytes)
+        source = self._fetch(key)
+        return Path(source).read_bytes() if isinstance(source, str) else source
+
+    def open_buffer(self, key: str) -> Union[memoryview, bytes]:
+        source = self._fetch(key)
+        return _map_file(Path(source)) if isinstance(source, str) else source
+
+    def csv_source(self, key: str) -> CsvSource:
+        return self._fetch(key)
+
+    def scan_csv(self, key: str) -> "pl.LazyFrame":
+        return pl.scan_csv(self._fetch(key), infer_schema=False)
+
+    def put_bytes(self, key: str, data: bytes) -> ObjectInfo:
+        S3_REQUESTS.inc(operation="PutObject")
+        try:
+            self.client.put_object(Bucket=self.bucket, Key=key, Body=data)
+        except Exception as e:
+            self._raise_client_error(key, e)
+        return self.head(key)
+
+    def put_file(self, key: str, path: Path) -> ObjectInfo:
+        S3_REQUESTS.inc(operation="UploadFile")
+        try:
+            self.client.upload_file(str(path), self.bucket, key)
+        except Exception as e:
+            self._raise_client_error(key, e)
+        Path(path).unlink(missing_ok=True)
+        return self.head(key)
+
+    def delete(self, key: str) -> None:
+        S3_REQUESTS.inc(operation="DeleteObject")
+        try:
+            self.client.delete_object(Bucket=self.bucket, Key=key)
+        except Exception as e:
+            self._raise_client_error(key, e)
+        if self.cache is not None:
+            self.cache.evict(self.bucket, key)
+
+    def location(self, key: str) -> str:
+        return f"s3://{self.bucket}/{key}"
+
+
+def _not_modified(e: Exception) -> bool:
+    """Check whether a boto3 error is a 304 answering a conditional request."""
+    from botocore.exceptions import ClientError
+
+    if not isinstance(e, ClientError):
+        return False
+    code = e.response.get("Error", {}).get("Code")
+    status_code = e.response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+    return code in ("304", "NotModified") or status_code == 304
+
+
+def get_object_store(backend: Optional[str] = None) -> ObjectStore:
+    """
+    Get the object store for a backend.
+
+    Args:
+        backend: "s3" or "local". Defaults to the configured STORAGE_BACKEND.
+
+    Returns:
+        The (shared) object store instance for that backend
+    """
+    return _create_object_store(backend or settings.STORAGE_BACKEND)
+
+
+@lru_cache
+def _create_object_store(backend: str) -> ObjectStore:
+    if backend == "s3":
+        return S3ObjectStore(settings.S3_BUCKET, cache=object_cache)
+    if backend == "local":
+        return LocalObjectStore(settings.LOCAL_STORAGE_ROOT)
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"Unknown storage backend: {backend}",
+    )
@@ -0,0 +1,148 @@
+import os
+import threading
+from pathlib import Path
+from typing import Callable, List, Union
+
+from app.api.schemas.files import StorageUsage
+from app.logger import get_logger
+from app.services.file_registry import BlobUsage, FileRegistry
+from app.services.storage import LocalObjectStore
+
+logger = get_logger("services.storage_manager")
+
+
+def _tree_size(path: Path) -> int:
+    """Total size of the regular files under a directory."""
+    total = 0
+    try:
+        entries = list(os.scandir(path))
+    except FileNotFoundError:
+        return 0
+    for entry in entries:
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                total += _tree_size(Path(entry.path))
+            elif entry.is_file(follow_symlinks=False):
+                total += entry.stat(follow_symlinks=False).st_size
+        except FileNotFoundError:
+            # Removed while walking
+            continue
+    return total
+
+
+def _size(path: Path) -> int:
+    try:
+        return path.stat().st_size
+    except FileNotFoundError:
+        return 0
+
+
+class StorageManager:
+    """
+    Keeps an upload directory within a disk budget.
+
+    Access times are tracked per file ID in the registry; a blob counts as
+    used when any file sharing it was. When the directory exceeds its budget,
+    derived caches (columnar copies, row indexes) of the least recently used
+    blobs are evicted first, since reads fall back to the CSV without them.
+    If that is not enough, least recently used blobs are deleted together
+    with their registrations. Pinned files and files still being profiled
+    are never evicted.
+    """
+
+    def __init__(
+        self,
+        store: LocalObjectStore,
+        registry: FileRegistry,
+        budget_bytes: int,
+        derived_paths: Callable[[Path], List[Path]],
+        blobs_dir: Union[str, Path],
+        cache_dirs: List[Path],
+    ):
+        """
+        Args:
+            store: Store holding the blobs
+            registry: Registry of the files stored in `store`
+            budget_bytes: Disk budget for the whole upload directory
+            derived_paths: Paths of the derived caches of a blob
+            blobs_dir: Directory holding the blobs
+            cache_dirs: Directories holding derived caches
+        """
+        self.store = store
+        self.registry = registry
+        self.budget_bytes = budget_bytes
+        self.derived_paths = derived_paths
+        self.blobs_dir = Path(blobs_dir)
+        self.cache_dirs = cache_dirs
+        self._lock = threading.Lock()
+
+    def usage(self) -> StorageUsage:
+        """Report the disk usage of the upload directory."""
+        used = _tree_size(self.store.root)
+        blob_bytes = _tree_size(self.blobs_dir)
+        cache_bytes = sum(_tree_size(d) for d in self.cache_dirs)
+        blobs = self.registry.blob_usage()
+        return StorageUsage(
+            budget_bytes=self.budget_bytes,
+            used_bytes=used,
+            blob_bytes=blob_bytes,
+            cache_bytes=cache_bytes,
+            other_bytes=used - blob_bytes - cache_bytes,
+            blob_count=len(blobs),
+            pinned_count=sum(blob.pinned for blob in blobs),
+        )
+
+    def enforce_budget(self) -> int:
+        """
+        Evict least recently used data until the directory fits its budget.
+
+        This is blocking; call it from a thread when on the event loop.
+
+        Returns:
+            Number of bytes freed
+        """
+        with self._lock:
+            used = _tree_size(self.store.root)
+            if used <= self.budget_bytes:
+                return 0
+
+            evictable = [
+                blob
+                for blob in self.registry.blob_usage()
+                if not blob.pinned and not blob.profiling
+            ]
+            freed = 0
+            for evict in (self._evict_caches, self._evict_blob):
+                for blob in evictable:
+                    if used - freed <= self.budget_bytes:
+                        break
+                    freed += evict(blob)
+
+            logger.info(
+                "Enforced storage budget",
+                budget_bytes=self.budget_bytes,
+                used_bytes=used - freed,
+                freed_bytes=freed,
+            )
+            return freed
+
+    def _evict_caches(self, blob: BlobUsage) -> int:
+        """Delete the derived caches of a blob."""
+        freed = 0
+        for path in self.derived_paths(Path(blob.file_path)):
+            size = _size(path)
+            path.unlink(missing_ok=True)
+            freed += size
+        if freed:
+            logger.info("Evicted derived caches", content_hash=blob.content_hash)
+        return freed
+
+    def _evict_blob(self, blob: BlobUsage) -> int:
+        """Delete a blob, its derived caches and every file registered on it."""
+        file_path = Path(blob.file_path)
+        freed = self._evict_caches(blob) + _size(file_path)
+        self.registry.delete_by_hash(blob.content_hash)
+        file_path.unlink(missing_ok=True)
+        logger.info("Evicted blob", content_hash=blob.content_hash)
+        return freed
+
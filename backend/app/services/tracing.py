@@ -0,0 +1,248 @@
+import json
+import os
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
+
+import structlog
+
+from app.config import settings
+from app.logger import get_logger
+
+logger = get_logger("services.tracing")
+
+# (trace ID, ID of the innermost open span) of the current task
+TraceContext = Tuple[str, Optional[str]]
+
+_context: ContextVar[Optional[TraceContext]] = ContextVar("trace_context", default=None)
+
+
+@dataclass
+class Span:
+    """A timed operation within a trace."""
+
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    name: str
+    # Wall clock start, in seconds since the epoch
+    start: float
+    duration: float = 0.0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    pid: int = field(default_factory=os.getpid)
+    thread_id: int = field(default_factory=threading.get_ident)
+
+
+class SpanExporter(ABC):
+    """Writes finished spans somewhere."""
+
+    @abstractmethod
+    def export(self, span: Span) -> None:
+        """Write a finished span."""
+
+
+class _AppendingExporter(SpanExporter):
+    """
+    Appends one line per span to a file shared by all processes.
+
+    Every line is written with a single append, so lines of concurrent
+    processes never interleave.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._file = None
+        self._pid = None
+
+    def _open(self):
+        # Each process opens its own handle
+        if self._pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._prepare()
+            self._file = open(self.path, "a", buffering=1)
+            self._pid = os.getpid()
+        return self._file
+
+    def _prepare(self) -> None:
+        """Create the file if needed, before the first span is appended."""
+
+    @abstractmethod
+    def _line(self, span: Span) -> str:
+        """Encode a span as one line, without the newline."""
+
+    def export(self, span: Span) -> None:
+        line = self._line(span) + "\n"
+        with self._lock:
+            try:
+                self._open().write(line)
+            except OSError as e:
+                logger.warning("Could not export span", error=str(e))
+
+
+class JsonlExporter(_AppendingExporter):
+    """Writes every span as a JSON object on its own line."""
+
+    def _line(self, span: Span) -> str:
+        return json.dumps(
+            {
+                "trace_id": span.trace_id,
+                "span_id": span.span_id,
+                "parent_id": span.parent_id,
+                "name": span.name,
+                "start": span.start,
+                "duration_ms": span.duration * 1000,
+                "attributes": span.attributes,
+                "pid": span.pid,
+                "thread_id": span.thread_id,
+            },
+            default=str,
+        )
+
+
+class ChromeTraceExporter(_AppendingExporter):
+    """
+    Writes spans as Chrome trace events, to open in Perfetto or chrome://tracing.
+
+    The file is a JSON array that is never closed, which the trace format
+    explicitly allows, so processes can keep appending to it.
+    """
+
+    def _prepare(self) -> None:
+        try:
+            with open(self.path, "x") as f:
+                f.write("[\n")
+        except FileExistsError:
+            pass
+
+    def _line(self, span: Span) -> str:
+        event = {
+            "name": span.name,
+            "cat": "transformat",
+            "ph": "X",
+            "ts": span.start * 1_000_000,
+            "dur": span.duration * 1_000_000,
+            "pid": span.pid,
+            "tid": span.thread_id,
+            "args": {
+                "trace_id": span.trace_id,
+                "span_id": span.span_id,
+                "parent_id": span.parent_id,
+                **span.attributes,
+            },
+        }
+        return json.dumps(event, default=str) + ","
+
+
+def create_exporter(kind: str, path: Union[str, Path]) -> Optional[SpanExporter]:
+    """
+    Create a span exporter.
+
+    Args:
+        kind: "jsonl", "chrome" or "none"
+        path: File the spans are appended to
+
+    Returns:
+        The exporter, or None when tracing is off
+    """
+    if kind == "jsonl":
+        return JsonlExporter(path)
+    if kind == "chrome":
+        return ChromeTraceExporter(path)
+    if kind == "none":
+        return None
+    raise ValueError(f"Unknown trace exporter: {kind}")
+
+
+_exporter: Optional[SpanExporter] = create_exporter(settings.TRACE_EXPORTER, settings.TRACE_PATH)
+
+
+def set_exporter(exporter: Optional[SpanExporter]) -> None:
+    """Replace the exporter of this process; None turns tracing off."""
+    global _exporter
+    _exporter = exporter
+
+
+def _new_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def current_context() -> Optional[TraceContext]:
+    """The trace context of the current task, to hand to another process."""
+    return _context.get()
+
+
+@contextmanager
+def attach(context: Optional[TraceContext]) -> Iterator[None]:
+    """
+    Continue a trace from another process or task.
+
+    Spans opened inside become children of the span the context was taken
+    in, and log lines carry its trace ID.
+    """
+    if context is None:
+        yield
+        return
+    token = _context.set(context)
+    with structlog.contextvars.bound_contextvars(trace_id=context[0]):
+        try:
+            yield
+        finally:
+            _context.reset(token)
+
+
+@contextmanager
+def trace(name: str, **attributes: Any) -> Iterator[str]:
+    """
+    Start a new trace with a root span.
+
+    Yields:
+        The trace ID, which log lines inside the block carry as well
+    """
+    trace_id = uuid.uuid4().hex
+    with attach((trace_id, None)), span(name, **attributes):
+        yield trace_id
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """
+    Time the block as a child of the current span.
+
+    Does nothing outside a trace or when tracing is off.
+
+    Yields:
+        The span, so attributes can be added while it is open, or None
+    """
+    context = _context.get()
+    exporter = _exporter
+    if context is None or exporter is None:
+        yield None
+        return
+
+    trace_id, parent_id = context
+    current = Span(
+        trace_id=trace_id,
+        span_id=_new_id(),
+        parent_id=parent_id,
+        name=name,
+        start=time.time(),
+        attributes=attributes,
+    )
+    token = _context.set((trace_id, current.span_id))
+    start = time.perf_counter()
+    try:
+        yield current
+    except BaseException as e:
+        current.attributes["error"] = type(e).__name__
+        raise
+    finally:
+        current.duration = time.perf_counter() - start
+        _context.reset(token)
+        exporter.export(current)
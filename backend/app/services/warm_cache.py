@@ -0,0 +1,229 @@
+import hashlib
+import os
+import re
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import BinaryIO, Generic, Hashable, Optional, Tuple, TypeVar, Union
+
+from app.config import settings
+from app.logger import get_logger
+from app.services.metrics import CACHE_REQUESTS
+
+logger = get_logger("services.warm_cache")
+
+T = TypeVar("T")
+
+# ETags that can be part of a file name; S3 returns hex digests, with a part
+# count for multipart uploads
+_SAFE_ETAG = re.compile(r"^[0-9A-Za-z-]{1,128}$")
+
+
+def memory_bytes() -> int:
+    """Memory of the Lambda function, or of the machine elsewhere."""
+    memory_mb = os.environ.get("AWS_LAMBDA_FUNCTION_MEMORY_SIZE")
+    if memory_mb:
+        return int(memory_mb) * 1024 * 1024
+    return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+
+
+def disk_bytes(directory: Union[str, Path]) -> int:
+    """Size of the filesystem holding a directory, e.g. Lambda's ephemeral storage."""
+    path = Path(directory).absolute()
+    while not path.exists():
+        path = path.parent
+    return shutil.disk_usage(path).total
+
+
+class LRUCache(Generic[T]):
+    """
+    In-memory cache bounded by the total size of its values.
+
+    Lives as long as the process, which on Lambda means across the warm
+    invocations of an execution environment. The least recently used values
+    are dropped once `max_bytes` is exceeded.
+    """
+
+    def __init__(self, name: str, max_bytes: int):
+        """
+        Args:
+            name: Name the cache reports its hits and misses under
+            max_bytes: Total size of the values kept
+        """
+        self.name = name
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[T, int]]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[T]:
+        """Get a value, marking it recently used, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        CACHE_REQUESTS.inc(cache=self.name, result="miss" if entry is None else "hit")
+        return None if entry is None else entry[0]
+
+    def put(self, key: Hashable, value: T, size: int) -> None:
+        """Add a value of an (estimated) size in bytes; too large values aren't kept."""
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size_bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self.size_bytes += size
+            while self.size_bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.size_bytes -= evicted
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class ObjectFileCache:
+    """
+    Local copies of remote objects, validated by their ETag.
+
+    Each copy is stored as `<key digest>_<etag>`, so the ETag to revalidate
+    with is known without reading anything, and a changed object never
+    matches a stale copy. Copies are written to a temporary name and renamed
+    into place, so processes sharing the directory never see partial files.
+    The least recently used copies are deleted once the directory grows over
+    `max_bytes`.
+    """
+
+    def __init__(self, directory: Union[str, Path], max_bytes: int):
+        """
+        Args:
+            directory: Directory holding the copies
+            max_bytes: Total size of the copies kept
+        """
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+
+    def _prefix(self, namespace: str, key: str) -> str:
+        return hashlib.sha1(f"{namespace}/{key}".encode()).hexdigest()[:24]
+
+    def lookup(self, namespace: str, key: str) -> Optional[Tuple[Path, str]]:
+        """
+        Find the copy of an object.
+
+        Args:
+            namespace: Where the key lives, e.g. the bucket
+            key: Key of the object
+
+        Returns:
+            The path of the copy and the ETag it was stored with, or None
+        """
+        try:
+            matches = list(self.directory.glob(f"{self._prefix(namespace, key)}_*"))
+        except OSError:
+            return None
+        if not matches:
+            return None
+        path = max(matches, key=lambda p: p.stat().st_mtime_ns if p.exists() else 0)
+        return path, path.name.split("_", 1)[1]
+
+    def cacheable(self, size: int, etag: Optional[str]) -> bool:
+        """Check whether an object of this size and ETag can be kept."""
+        return etag is not None and bool(_SAFE_ETAG.match(etag)) and size <= self.max_bytes
+
+    def store(self, namespace: str, key: str, etag: str, body: BinaryIO) -> Path:
+        """
+        Write the contents of an object, replacing copies of older versions.
+
+        Args:
+            namespace: Where the key lives, e.g. the bucket
+            key: Key of the object
+            etag: ETag of the contents, see `cacheable`
+            body: Readable stream of the contents
+
+        Returns:
+            Path of the copy
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        prefix = self._prefix(namespace, key)
+        path = self.directory / f"{prefix}_{etag}"
+        tmp_path = self.directory / f".{uuid.uuid4()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                shutil.copyfileobj(body, f, 1024 * 1024)
+            os.replace(tmp_path, path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+        for stale in self.directory.glob(f"{prefix}_*"):
+            if stale != path:
+                stale.unlink(missing_ok=True)
+        self._evict(keep=path)
+        return path
+
+    def touch(self, path: Path) -> None:
+        """Mark a copy as recently used."""
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+
+    def evict(self, namespace: str, key: str) -> None:
+        """Delete the copies of an object."""
+        for path in self.directory.glob(f"{self._prefix(namespace, key)}_*"):
+            path.unlink(missing_ok=True)
+
+    def _evict(self, keep: Path) -> None:
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.startswith(".") or not entry.is_file():
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, Path(entry.path)))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            path.unlink(missing_ok=True)
+            total -= size
+            logger.debug("Evicted cached object", path=str(path), size=size)
+
+    def usage(self) -> Tuple[int, int]:
+        """Number and total size of the copies."""
+        count = total = 0
+        try:
+            for entry in os.scandir(self.directory):
+                if not entry.name.startswith(".") and entry.is_file():
+                    count += 1
+                    total += entry.stat().st_size
+        except FileNotFoundError:
+            pass
+        return count, total
+
+
+def _create_object_cache() -> Optional[ObjectFileCache]:
+    max_bytes = settings.OBJECT_CACHE_MAX_BYTES
+    if max_bytes is None:
+        # Long-running servers only cache objects when given a size to use
+        if not settings.is_lambda:
+            return None
+        max_bytes = disk_bytes(settings.OBJECT_CACHE_DIR) // 2
+    if max_bytes <= 0:
+        return None
+    return ObjectFileCache(settings.OBJECT_CACHE_DIR, max_bytes)
+
+
+# Global instances
+object_cache = _create_object_cache()
+plan_cache: LRUCache = LRUCache(
+    "plan",
+    settings.PLAN_CACHE_MAX_BYTES
+    if settings.PLAN_CACHE_MAX_BYTES is not None
+    else memory_bytes() // 32,
+)
@@ -0,0 +1,155 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.routes.transform import admit_transform
+from app.api.schemas.transform import TransformRequest, TransformationConfig
+from app.services.admission import (
+    EXECUTION,
+    MIN_ESTIMATE_BYTES,
+    PREVIEW,
+    AdmissionController,
+    estimate_memory,
+)
+from app.services.storage import LocalObjectStore
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.services.admission.settings.ADMISSION_MEMORY_FACTOR", 1.0)
+    monkeypatch.setattr("app.services.admission.MIN_ESTIMATE_BYTES", 0)
+    store = LocalObjectStore(tmp_path)
+    # 100 rows of 10 bytes each
+    store.put_bytes("in/a.csv", b"a,b\n" + b"aaaa,bbbb\n" * 100)
+    return store
+
+
+class TestEstimateMemory:
+    """Test estimating the memory of a transform."""
+
+    def test_estimate_follows_the_source_size(self, store):
+        assert estimate_memory(store, "in/a.csv") == 1000
+
+    def test_estimate_follows_the_column_projection(self, store):
+        assert estimate_memory(store, "in/a.csv", columns=["a"]) == 500
+
+    def test_estimate_follows_the_row_limit(self, store):
+        assert estimate_memory(store, "in/a.csv", limit=10) == 100
+        assert estimate_memory(store, "in/a.csv", columns=["b"], limit=10) == 50
+
+    def test_estimate_has_a_floor(self, tmp_path):
+        store = LocalObjectStore(tmp_path)
+        store.put_bytes("in/a.csv", b"a\n1\n")
+
+        assert estimate_memory(store, "in/a.csv") == MIN_ESTIMATE_BYTES
+
+    async def test_transform_estimate_runs_off_the_event_loop(self, store, monkeypatch):
+        threads = []
+
+        def estimate(*args, **kwargs):
+            threads.append(threading.current_thread())
+            return estimate_memory(*args, **kwargs)
+
+        monkeypatch.setattr("app.api.routes.transform.estimate_memory", estimate)
+        config = TransformationConfig(
+            config_id="admission",
+            version="1",
+            description="admission",
+            input_file_prefix_path="in/",
+            output_file_prefix_path="out/",
+            nodes=[],
+            edges=[],
+        )
+
+        async with admit_transform(config, TransformRequest(config=config), store, "in/a.csv"):
+            pass
+
+        assert threads and threads[0] is not threading.main_thread()
+
+
+class TestAdmissionController:
+    """Test admitting work within a memory budget."""
+
+    async def test_work_within_the_budget_runs_at_once(self):
+        controller = AdmissionController(100, 20, queue_timeout=1)
+
+        async with controller.admit(40):
+            async with controller.admit(40):
+                assert controller.in_use == 80
+
+        assert controller.in_use == 0
+
+    async def test_work_waits_for_memory(self):
+        controller = AdmissionController(100, 20, queue_timeout=1)
+        order = []
+
+        async def run(name, estimate, hold):
+            async with controller.admit(estimate):
+                order.append(name)
+                await asyncio.sleep(hold)
+
+        await asyncio.gather(run("first", 60, 0.05), run("second", 60, 0))
+
+        assert order == ["first", "second"]
+        assert controller.in_use == 0
+
+    async def test_previews_use_the_reserve_and_go_first(self):
+        controller = AdmissionController(100, 20, queue_timeout=1)
+        order = []
+
+        async def run(name, estimate, lane):
+            async with controller.admit(estimate, lane):
+                order.append(name)
+
+        async with controller.admit(80):
+            # Execution may not use the reserve, previews may
+            async with controller.admit(20, PREVIEW):
+                pass
+            waiting = [
+                asyncio.ensure_future(run("execution", 50, EXECUTION)),
+                asyncio.ensure_future(run("preview", 50, PREVIEW)),
+            ]
+            await asyncio.sleep(0.01)
+            assert (controller.queued(PREVIEW), controller.queued(EXECUTION)) == (1, 1)
+
+        await asyncio.gather(*waiting)
+        assert order == ["preview", "execution"]
+
+    async def test_work_that_never_fits_is_rejected(self):
+        controller = AdmissionController(100, 20, queue_timeout=1)
+
+        with pytest.raises(HTTPException) as e:
+            async with controller.admit(90, EXECUTION):
+                pass
+        assert e.value.status_code == 413
+
+    async def test_work_is_rejected_after_the_queue_timeout(self):
+        controller = AdmissionController(100, 20, queue_timeout=0.01)
+
+        async with controller.admit(80):
+            with pytest.raises(HTTPException) as e:
+                async with controller.admit(50):
+                    pass
+
+        assert e.value.status_code == 503
+        assert "Retry-After" in e.value.headers
+        assert controller.queued(EXECUTION) == 0
+        assert controller.in_use == 0
+
+    async def test_cancelled_waiter_releases_its_place(self):
+        controller = AdmissionController(100, 20, queue_timeout=1)
+
+        async def wait():
+            async with controller.admit(50):
+                pass
+
+        async with controller.admit(80):
+            waiter = asyncio.ensure_future(wait())
+            await asyncio.sleep(0.01)
+            waiter.cancel()
+            await asyncio.gather(waiter, return_exceptions=True)
+            assert controller.queued(EXECUTION) == 0
+
+        assert controller.in_use == 0
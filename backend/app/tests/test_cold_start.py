@@ -0,0 +1,74 @@
+import sys
+
+import pytest
+
+from app.core.lazy import is_loaded, lazy_import
+from benchmarks.cold_start import HEAVY_MODULES, measure_cold_start, parse_importtime
+
+
+@pytest.fixture(scope="module")
+def cold_start():
+    return measure_cold_start("health")
+
+
+@pytest.fixture(scope="module")
+def transform_cold_start():
+    return measure_cold_start("transform")
+
+
+class TestLazyImport:
+    """Test importing modules on first use."""
+
+    def test_module_loads_on_attribute_access(self, monkeypatch):
+        monkeypatch.delitem(sys.modules, "colorsys", raising=False)
+
+        module = lazy_import("colorsys")
+
+        assert not is_loaded("colorsys")
+        assert module.rgb_to_hsv(1.0, 0.0, 0.0) == (0.0, 1.0, 1.0)
+        assert is_loaded("colorsys")
+
+    def test_loaded_module_is_returned_as_is(self):
+        assert lazy_import("json") is sys.modules["json"]
+
+    def test_missing_module_raises(self):
+        with pytest.raises(ModuleNotFoundError):
+            lazy_import("no_such_module_anywhere")
+
+
+class TestColdStart:
+    """Benchmark importing the Lambda entry point and its first request."""
+
+    def test_parse_importtime(self):
+        output = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |   json.decoder\n"
+            "import time:       300 |        420 | json\n"
+        )
+
+        assert parse_importtime(output) == {"json.decoder": (120, 120), "json": (300, 420)}
+
+    def test_import_leaves_heavy_libraries_unloaded(self, cold_start):
+        assert cold_start["loaded_after_import"] == []
+        assert not set(HEAVY_MODULES) & set(cold_start["imports"])
+
+    def test_import_writes_nothing_to_package_directory(
+        self, cold_start, transform_cold_start
+    ):
+        # On Lambda the package directory is read-only, so any write fails
+        assert cold_start["written_by_import"] == []
+        assert transform_cold_start["written_by_import"] == []
+
+    def test_health_request_leaves_heavy_libraries_unloaded(self, cold_start):
+        assert cold_start["status_code"] == 200
+        assert cold_start["loaded_after_request"] == []
+
+    def test_transform_request_loads_polars_and_pyarrow(self, transform_cold_start):
+        assert transform_cold_start["status_code"] == 200
+        assert transform_cold_start["loaded_after_import"] == []
+        assert {"polars", "pyarrow"} <= set(transform_cold_start["loaded_after_request"])
+
+    def test_timings_are_reported(self, cold_start):
+        assert cold_start["import_seconds"] > 0
+        assert cold_start["first_request_seconds"] > 0
+        assert "lambda_handler" in cold_start["imports"]
@@ -0,0 +1,49 @@
+import polars as pl
+import pytest
+
+from app.services import csv_metadata
+from app.services.csv_metadata import count_rows, extract_metadata, read_header
+
+
+@pytest.fixture
+def write_csv(tmp_path):
+    def write(content: bytes):
+        path = tmp_path / "data.csv"
+        path.write_bytes(content)
+        return path
+
+    return write
+
+
+@pytest.mark.parametrize(
+    "content,expected",
+    [
+        (b"a,b\n1,2\n3,4\n", 2),
+        (b"a,b\n1,2\n3,4", 2),
+        (b"a,b\n", 0),
+        (b"", 0),
+        (b'a,b\n1,"multi\nline"\n3,4\n', 2),
+        (b'a,b\n1,"say ""hi""\nthere"\n3,"x"\n', 2),
+        (b'a,b\r\n1,"x\r\ny"\r\n', 1),
+    ],
+)
+def test_count_rows(write_csv, content, expected):
+    assert count_rows(write_csv(content)) == expected
+
+
+def test_count_rows_across_chunks(write_csv, monkeypatch):
+    """Quote state carries over chunk boundaries."""
+    monkeypatch.setattr(csv_metadata, "SCAN_CHUNK_SIZE", 3)
+    content = b'a,b\n1,"multi\nline\nvalue"\n2,"x"\n3,4\n'
+    path = write_csv(content)
+
+    assert count_rows(path) == pl.read_csv(path).height == 3
+
+
+def test_extract_metadata(write_csv):
+    path = write_csv(b"name,email\nJohn,john@example.com\n")
+
+    assert read_header(path) == ["name", "email"]
+    metadata = extract_metadata(path)
+    assert metadata.columns == ["name", "email"]
+    assert metadata.row_count == 1
@@ -0,0 +1,160 @@
+import gc
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.dataset_cache import SharedDatasetCache
+from app.services.execution_pool import ExecutionPool
+from app.services.storage import LocalObjectStore
+
+
+class CountingStore(LocalObjectStore):
+    """Local store counting how often files get decoded and their metadata fetched."""
+
+    def __init__(self, root):
+        super().__init__(root)
+        self.scans = 0
+        self.heads = 0
+
+    def scan_csv(self, key):
+        self.scans += 1
+        return super().scan_csv(key)
+
+    def head(self, key):
+        self.heads += 1
+        return super().head(key)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = CountingStore(tmp_path / "files")
+    store.put_bytes("people.csv", b"name,age,city\nAda,36,London\nAlan,41,Wilmslow\n")
+    return store
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SharedDatasetCache(tmp_path / "datasets", max_bytes=1024 * 1024)
+
+
+def datasets(cache):
+    return sorted(p for p in cache.directory.glob("*.arrow"))
+
+
+class TestSharedDatasetCache:
+    """Test sharing decoded files through memory-mapped Arrow files."""
+
+    def test_file_is_decoded_once(self, store, cache):
+        first = cache.attach(store, "people.csv")
+        second = cache.attach(store, "people.csv")
+
+        assert store.scans == 1
+        assert first.to_dicts() == [
+            {"name": "Ada", "age": "36", "city": "London"},
+            {"name": "Alan", "age": "41", "city": "Wilmslow"},
+        ]
+        assert second.equals(first)
+        assert cache.usage()[0] == 1
+
+    def test_cache_is_shared_by_instances(self, store, cache):
+        cache.attach(store, "people.csv")
+        other = SharedDatasetCache(cache.directory, cache.max_bytes)
+
+        frame = other.attach(store, "people.csv", create=False)
+
+        assert frame is not None
+        assert store.scans == 1
+
+    def test_projection_and_limit_are_applied(self, store, cache):
+        frame = cache.attach(store, "people.csv", columns=["city", "name", "missing"], limit=1)
+
+        assert frame.columns == ["name", "city"]
+        assert frame.to_dicts() == [{"name": "Ada", "city": "London"}]
+
+    def test_missing_dataset_is_not_created_on_request(self, store, cache):
+        assert cache.attach(store, "people.csv", create=False) is None
+        assert store.scans == 0
+        assert datasets(cache) == []
+
+    def test_changed_file_replaces_its_dataset(self, store, cache):
+        first = cache.attach(store, "people.csv")
+        del first
+        gc.collect()
+        store.put_bytes("people.csv", b"name\nGrace\n")
+
+        frame = cache.attach(store, "people.csv")
+
+        assert frame.to_dicts() == [{"name": "Grace"}]
+        assert store.scans == 2
+        assert len(datasets(cache)) == 1
+
+    def test_files_larger_than_the_cache_are_not_kept(self, store, tmp_path):
+        cache = SharedDatasetCache(tmp_path / "datasets", max_bytes=8)
+
+        assert cache.attach(store, "people.csv") is None
+        assert store.scans == 0
+
+    def test_attached_datasets_are_not_evicted(self, store, cache):
+        store.put_bytes("other.csv", b"id\n1\n2\n")
+        frame = cache.attach(store, "people.csv")
+        cache.attach(store, "other.csv")
+        gc.collect()
+        cache.max_bytes = 1
+
+        cache._evict()
+
+        # Only the dataset nobody holds any more is dropped
+        assert len(datasets(cache)) == 1
+        assert cache.attach(store, "people.csv", create=False).equals(frame)
+
+        del frame
+        gc.collect()
+        cache._evict()
+
+        assert datasets(cache) == []
+
+    def test_known_metadata_saves_the_head_request(self, store, cache):
+        info = store.head("people.csv")
+
+        frame = cache.attach(store, "people.csv", info=info)
+
+        assert frame.height == 2
+        assert store.heads == 1
+
+
+def test_preview_fetches_source_metadata_once(store, monkeypatch):
+    # Run the transform on a thread, so the reads of the worker are counted too
+    monkeypatch.setenv("AWS_LAMBDA_FUNCTION_NAME", "transformat")
+    pool = ExecutionPool("test", max_workers=1)
+    monkeypatch.setattr("app.api.routes.transform.interactive_pool", pool)
+    monkeypatch.setattr("app.services.storage._create_object_store", lambda backend: store)
+    request = {
+        "config": {
+            "config_id": "people",
+            "version": "1",
+            "description": "people",
+            "input_file_prefix_path": "",
+            "output_file_prefix_path": "out/",
+            "nodes": [
+                {
+                    "id": "input-1",
+                    "type": "input",
+                    "position": {"x": 0, "y": 0},
+                    "manual_values": {"column_names": ["name", "age", "city"]},
+                }
+            ],
+            "edges": [],
+        },
+        "evaluate_node_id": "input-1",
+        "source_file": "people.csv",
+        "preview": True,
+        "limit": 1,
+    }
+    try:
+        response = TestClient(app).post("/transform", json=request)
+    finally:
+        pool.shutdown()
+
+    assert response.status_code == 200
+    assert store.heads == 1
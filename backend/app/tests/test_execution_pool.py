@@ -0,0 +1,329 @@
+import asyncio
+import os
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.api.routes import transform
+from app.api.routes.transform import execute_transform, execute_transform_to_stream
+from app.api.schemas.graphs import (
+    ExportedGraph,
+    GraphEdge,
+    GraphMetadata,
+    GraphNode as ExportedNode,
+    GraphPosition,
+)
+from app.api.schemas.transform import (
+    GraphNode,
+    InputNodeManualValues,
+    NodeType,
+    Position,
+    TransformationConfig,
+)
+from app.services.execution_pool import ExecutionPool, from_arrow
+from app.services.file_service import FileService
+from app.services.graph_service import GraphService
+from app.main import app
+from app.services.result_encoding import iter_ipc_stream
+from app.services.storage import LocalObjectStore
+from app.tests.test_file_service import upload
+
+
+@pytest.fixture
+async def pool():
+    """Execution pool with a single worker."""
+    pool = ExecutionPool("test", max_workers=1)
+    yield pool
+    pool.shutdown()
+
+
+@pytest.fixture
+def config():
+    return TransformationConfig(
+        config_id="pool",
+        version="1",
+        description="pool",
+        input_file_prefix_path="in/",
+        output_file_prefix_path="out/",
+        nodes=[
+            GraphNode(
+                id="input-1",
+                type=NodeType.INPUT,
+                position=Position(x=0, y=0),
+                manual_values=InputNodeManualValues(column_names=["name"]),
+            ),
+        ],
+        edges=[],
+    )
+
+
+class TestExecutionPool:
+    """Test running plans in worker processes."""
+
+    async def test_transform_returns_arrow_result(self, pool, config, tmp_path):
+        store = LocalObjectStore(tmp_path)
+        store.put_bytes("in/a.csv", b"name,email\nJohn,john@example.com\n")
+
+        result = await pool.run(
+            execute_transform, config.model_dump_json(), "input-1", store, "in/a.csv"
+        )
+
+        df = from_arrow(result)
+        assert df.columns == ["input-1-column-0", "email"]
+        assert df.rows() == [("John", "john@example.com")]
+
+    async def test_transform_streams_result_to_socket(self, pool, config, tmp_path):
+        store = LocalObjectStore(tmp_path)
+        store.put_bytes("in/a.csv", b"name,email\nJohn,j@example.com\nJane,ja@example.com\n")
+        socket_path = str(tmp_path / "result.sock")
+
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as listener:
+            listener.bind(socket_path)
+            listener.listen(1)
+            worker = asyncio.ensure_future(
+                pool.run(
+                    execute_transform_to_stream,
+                    config.model_dump_json(),
+                    "input-1",
+                    store,
+                    "in/a.csv",
+                    None,
+                    socket_path,
+                    1,
+                )
+            )
+            connection, _ = await asyncio.to_thread(listener.accept)
+            with connection, connection.makefile("rb") as source:
+                chunks = await asyncio.to_thread(
+                    lambda: list(iter_ipc_stream(source, "text/csv"))
+                )
+
+        assert await worker == 2
+        assert chunks == [
+            b"input-1-column-0,email\n",
+            b"John,j@example.com\n",
+            b"Jane,ja@example.com\n",
+        ]
+
+    async def test_http_errors_cross_the_process_boundary(self, pool, config, tmp_path):
+        store = LocalObjectStore(tmp_path)
+        store.put_bytes("in/a.csv", b"name\nJohn\n")
+
+        with pytest.raises(HTTPException) as e:
+            await pool.run(
+                execute_transform, config.model_dump_json(), "missing", store, "in/a.csv"
+            )
+        assert e.value.status_code == 404
+
+        # The pool survives the error
+        result = await pool.run(
+            execute_transform, config.model_dump_json(), "input-1", store, "in/a.csv"
+        )
+        assert from_arrow(result).height == 1
+
+    async def test_start_spawns_every_worker(self):
+        pool = ExecutionPool("test", max_workers=2)
+        try:
+            await pool.start()
+            assert len(pool.executor._processes) == 2
+        finally:
+            pool.shutdown()
+
+    @pytest.mark.parametrize("cause", ["lambda", "no_semaphores"])
+    async def test_runs_in_process_without_worker_processes(
+        self, cause, config, tmp_path, monkeypatch
+    ):
+        if cause == "lambda":
+            monkeypatch.setenv("AWS_LAMBDA_FUNCTION_NAME", "transformat")
+        else:
+            def unavailable(*args, **kwargs):
+                raise OSError(38, "Function not implemented")
+
+            monkeypatch.setattr(
+                "app.services.execution_pool.ProcessPoolExecutor", unavailable
+            )
+        store = LocalObjectStore(tmp_path)
+        store.put_bytes("in/a.csv", b"name\nJohn\n")
+        pool = ExecutionPool("test", max_workers=1)
+        try:
+            assert await pool.run(os.getpid) == os.getpid()
+            assert isinstance(pool.executor, ThreadPoolExecutor)
+
+            result = await pool.run(
+                execute_transform, config.model_dump_json(), "input-1", store, "in/a.csv"
+            )
+            assert from_arrow(result).rows() == [("John",)]
+
+            with pytest.raises(HTTPException) as e:
+                await pool.run(
+                    execute_transform, config.model_dump_json(), "missing", store, "in/a.csv"
+                )
+            assert e.value.status_code == 404
+        finally:
+            pool.shutdown()
+
+
+class TestStreamingTransform:
+    """Test streaming a transform result while it is computed."""
+
+    @pytest.fixture
+    def store(self, tmp_path, monkeypatch):
+        store = LocalObjectStore(tmp_path / "store")
+        monkeypatch.setattr(
+            "app.services.storage._create_object_store", lambda backend: store
+        )
+        return store
+
+    def test_first_batch_is_sent_before_the_rest_is_computed(
+        self, config, store, tmp_path, monkeypatch
+    ):
+        store.put_bytes("in/a.csv", b"name\nJohn\nJane\n")
+        socket_path = str(tmp_path / "result.sock")
+        run_plan = transform.run_plan
+        release = threading.Event()
+        planned = []
+
+        def blocking_run_plan(nodes, chunk):
+            planned.append(chunk.height)
+            if len(planned) > 1:
+                # Hold the second chunk back until the first one was read
+                assert release.wait(10)
+            return run_plan(nodes, chunk)
+
+        monkeypatch.setattr(transform, "run_plan", blocking_run_plan)
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as listener:
+            listener.bind(socket_path)
+            listener.listen(1)
+            worker = threading.Thread(
+                target=execute_transform_to_stream,
+                args=(config.model_dump_json(), "input-1", store, "in/a.csv", None, socket_path, 1),
+            )
+            worker.start()
+            connection, _ = listener.accept()
+            with connection, connection.makefile("rb") as source:
+                chunks = iter_ipc_stream(source, "text/csv")
+                assert next(chunks) == b"input-1-column-0\n"
+                assert next(chunks) == b"John\n"
+                assert worker.is_alive()
+
+                release.set()
+                assert list(chunks) == [b"Jane\n"]
+            worker.join()
+
+    def test_endpoint_streams_csv(self, config, store):
+        store.put_bytes("in/a.csv", b"name,email\nJohn,j@example.com\n")
+        client = TestClient(app)
+
+        response = client.post(
+            "/transform/stream",
+            json={
+                "config": config.model_dump(mode="json"),
+                "evaluate_node_id": "input-1",
+                "source_file": "in/a.csv",
+                "storage": "local",
+            },
+            headers={"Accept": "text/csv"},
+        )
+
+        assert response.status_code == 200
+        assert response.content == b"input-1-column-0,email\nJohn,j@example.com\n"
+
+    def test_errors_before_the_first_batch_keep_their_status(self, config, store):
+        store.put_bytes("in/a.csv", b"name\nJohn\n")
+        client = TestClient(app)
+
+        response = client.post(
+            "/transform/stream",
+            json={
+                "config": config.model_dump(mode="json"),
+                "evaluate_node_id": "missing",
+                "source_file": "in/a.csv",
+                "storage": "local",
+            },
+        )
+
+        assert response.status_code == 404
+
+
+def exported_graph(nodes, edges):
+    return ExportedGraph(
+        version="1",
+        metadata=GraphMetadata(
+            exported_at="2024-01-01T00:00:00Z",
+            node_count=len(nodes),
+            edge_count=len(edges),
+            export_format="json",
+        ),
+        nodes=[
+            ExportedNode(
+                id=node_id, type="operator", position=GraphPosition(x=0, y=0), operator=operator
+            )
+            for node_id, operator in nodes
+        ],
+        edges=[
+            GraphEdge(
+                id=f"{source}-{target}",
+                source_node_id=source,
+                target_node_id=target,
+                target_handle_id=handle,
+            )
+            for source, target, handle in edges
+        ],
+    )
+
+
+class TestGraphService:
+    """Test the plans built from exported graphs."""
+
+    def test_process_graph_orders_dependencies_first(self):
+        graph = exported_graph(
+            [("join", {"type": "join"}), ("a", {"type": "csv_input"})],
+            [("a", "join", "left-dataframe")],
+        )
+
+        plan = GraphService(graph).process_graph()
+
+        assert plan.execution_plan["order"] == ["a", "join"]
+        assert plan.execution_plan["dependencies"] == {"a": [], "join": ["a"]}
+
+    def test_join_exposes_upstream_outputs(self):
+        graph = exported_graph(
+            [
+                ("left", {"type": "csv_input", "outputs": [{"id": "l"}]}),
+                ("right", {"type": "manual-input", "outputs": [{"id": "r"}]}),
+                ("join", {"type": "join", "outputs": []}),
+            ],
+            [("left", "join", "left-dataframe"), ("right", "join", "right-dataframe")],
+        )
+
+        operator = GraphService(graph).update_node_operator("join")
+
+        assert operator["outputs"] == [{"id": "l"}, {"id": "r"}]
+
+    async def test_preview_profiles_executed_nodes(self, tmp_path, monkeypatch):
+        service = FileService(upload_dir=tmp_path)
+        monkeypatch.setattr("app.services.file_service.file_service", service)
+        info = await upload(service)
+        graph = exported_graph(
+            [("a", {"type": "csv_input", "id": info.file_id}), ("c", {"type": "constant"})],
+            [("a", "c", "input")],
+        )
+
+        preview = GraphService(graph).preview_graph(1, profile=True)
+
+        assert preview.preview_data["a"]["rows"] == [["John", "john@example.com"]]
+        [profile] = preview.profile
+        assert (profile.node_id, profile.type) == ("a", "operator")
+        assert (profile.input_rows, profile.output_rows) == (2, 1)
+        assert profile.output_bytes > 0
+        assert profile.cached
+        assert "plan_ms" in preview.metadata
+
+    def test_preview_without_profile(self):
+        graph = exported_graph([("c", {"type": "constant"})], [])
+
+        assert GraphService(graph).preview_graph(1).profile is None
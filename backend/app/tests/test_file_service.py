@@ -0,0 +1,401 @@
+import hashlib
+import io
+import os
+import tempfile
+import threading
+
+import polars as pl
+import pytest
+from fastapi import HTTPException, UploadFile
+
+from app.config import settings
+from app.services import file_service as file_service_module
+from app.services.file_service import FileService
+
+CSV_CONTENT = b"name,email\nJohn,john@example.com\nJane,jane@example.com\n"
+
+
+def make_upload(content: bytes = CSV_CONTENT, filename: str = "people.csv") -> UploadFile:
+    return UploadFile(file=io.BytesIO(content), filename=filename)
+
+
+async def upload(service: FileService, *args, **kwargs):
+    """Upload a file and wait for its background profiling to finish."""
+    info = await service.upload_csv_file(make_upload(*args, **kwargs))
+    return service.wait_for_profile(info.file_id)
+
+
+@pytest.fixture
+def service(tmp_path):
+    """File service storing uploads in a temporary directory."""
+    return FileService(upload_dir=tmp_path)
+
+
+class TestUpload:
+    """Test uploading CSV files."""
+
+    async def test_streams_in_chunks(self, service, monkeypatch):
+        monkeypatch.setattr(file_service_module, "UPLOAD_CHUNK_SIZE", 8)
+
+        info = await upload(service)
+
+        assert info.size_bytes == len(CSV_CONTENT)
+        assert info.content_hash == hashlib.sha256(CSV_CONTENT).hexdigest()
+        assert info.columns == ["name", "email"]
+        assert info.row_count == 2
+        assert open(info.file_path, "rb").read() == CSV_CONTENT
+
+    async def test_rejects_oversized_upload(self, service, monkeypatch):
+        monkeypatch.setattr(settings, "MAX_UPLOAD_BYTES", 16)
+        monkeypatch.setattr(file_service_module, "UPLOAD_CHUNK_SIZE", 8)
+
+        with pytest.raises(HTTPException) as e:
+            await upload(service)
+
+        assert e.value.status_code == 413
+        assert list((service.upload_dir / ".tmp").iterdir()) == []
+        assert service.store.list_objects() == []
+
+    async def test_returns_before_profiling(self, service, monkeypatch):
+        started = threading.Event()
+        release = threading.Event()
+        extract_metadata = file_service_module.extract_metadata
+
+        def slow_extract(*args, **kwargs):
+            started.set()
+            release.wait(5)
+            return extract_metadata(*args, **kwargs)
+
+        monkeypatch.setattr(file_service_module, "extract_metadata", slow_extract)
+
+        info = await service.upload_csv_file(make_upload())
+
+        assert info.status == "profiling"
+        assert info.columns == ["name", "email"]
+        assert info.row_count is None
+        started.wait(5)
+        assert service.get_file_info(info.file_id).progress == 0.0
+
+        release.set()
+        profiled = service.wait_for_profile(info.file_id, timeout=5)
+        assert profiled.status == "ready"
+        assert profiled.progress == 1.0
+        assert profiled.row_count == 2
+        assert profiled.column_stats["name"].min == "Jane"
+
+    async def test_profiling_failure_is_recorded(self, service, monkeypatch):
+        def fail(*args, **kwargs):
+            raise ValueError("broken")
+
+        monkeypatch.setattr(file_service_module, "extract_metadata", fail)
+
+        info = await upload(service)
+
+        assert info.status == "failed"
+        assert info.error == "broken"
+
+    async def test_duplicate_of_file_being_profiled_is_updated(self, service, monkeypatch):
+        release = threading.Event()
+        extract_metadata = file_service_module.extract_metadata
+
+        def slow_extract(*args, **kwargs):
+            release.wait(5)
+            return extract_metadata(*args, **kwargs)
+
+        monkeypatch.setattr(file_service_module, "extract_metadata", slow_extract)
+
+        first = await service.upload_csv_file(make_upload())
+        second = await service.upload_csv_file(make_upload(filename="copy.csv"))
+        assert second.status == "profiling"
+
+        release.set()
+        service.wait_for_profile(first.file_id, timeout=5)
+        assert service.get_file_info(second.file_id).status == "ready"
+        assert service.get_file_info(second.file_id).row_count == 2
+
+    async def test_rejects_non_csv(self, service):
+        with pytest.raises(HTTPException) as e:
+            await upload(service, filename="people.txt")
+        assert e.value.status_code == 400
+
+
+class TestColumnarCache:
+    """Test the columnar copy created on upload."""
+
+    async def test_upload_creates_columnar_copy(self, service):
+        info = await upload(service)
+
+        assert service.store.columnar_cache.get(info.file_path) is not None
+        assert info.column_stats["name"].null_count == 0
+        assert info.column_stats["name"].min == "Jane"
+        assert info.column_stats["name"].max == "John"
+
+    async def test_preview_without_row_index_reads_columnar_copy(self, service):
+        info = await upload(service)
+        service._row_index_path(info.file_path).unlink()
+        # Prove the CSV itself is no longer parsed
+        open(info.file_path, "wb").close()
+        cache_path = service.store.columnar_cache.path_for(info.file_path)
+        os.utime(cache_path)
+
+        headers, rows, total_rows = service.preview_csv(info.file_id, limit=1)
+
+        assert headers == ["name", "email"]
+        assert rows == [["John", "john@example.com"]]
+        assert total_rows == 2
+
+    async def test_stale_copy_is_ignored(self, service):
+        info = await upload(service)
+        cache_path = service.store.columnar_cache.path_for(info.file_path)
+        stat = os.stat(info.file_path)
+        os.utime(cache_path, ns=(stat.st_atime_ns, stat.st_mtime_ns - 1))
+
+        assert service.store.columnar_cache.get(info.file_path) is None
+
+
+class TestFileRegistry:
+    """Test the registry shared between worker processes."""
+
+    async def test_upload_visible_to_other_worker(self, service, tmp_path):
+        info = await upload(service)
+
+        # A second service on the same directory stands in for another worker
+        # (or a restart of this one)
+        other_worker = FileService(upload_dir=tmp_path)
+
+        assert other_worker.get_file_info(info.file_id) == info
+
+    async def test_indexed_lookups(self, service):
+        first = await upload(service)
+        second = await upload(service, filename="copy.csv")
+
+        assert service.find_files(content_hash=first.content_hash) == [first, second]
+        assert service.find_files(filename="copy.csv") == [second]
+        assert service.find_files(filename="copy.csv", content_hash="x") == []
+
+    def test_unknown_file(self, service):
+        with pytest.raises(HTTPException) as e:
+            service.get_file_info("missing")
+        assert e.value.status_code == 404
+
+    def test_database_is_created_on_first_use(self, tmp_path):
+        registry_path = tmp_path / "state" / "registry.db"
+        service = FileService(upload_dir=tmp_path / "uploads", registry_path=registry_path)
+
+        assert not registry_path.parent.exists()
+        assert service.find_files(filename="people.csv") == []
+        assert registry_path.exists()
+
+    @pytest.mark.parametrize("on_lambda", [False, True])
+    def test_default_paths_are_writable_on_lambda(self, monkeypatch, on_lambda):
+        if on_lambda:
+            monkeypatch.setenv("AWS_LAMBDA_FUNCTION_NAME", "transformat")
+        else:
+            monkeypatch.delenv("AWS_LAMBDA_FUNCTION_NAME", raising=False)
+
+        defaults = type(settings)()
+        paths = [defaults.FILE_REGISTRY_PATH, defaults.JOB_QUEUE_PATH]
+
+        under_tmp = [path.startswith(tempfile.gettempdir()) for path in paths]
+        assert under_tmp == [on_lambda, on_lambda]
+
+
+class TestPreview:
+    """Test paginated previews backed by the row offset index."""
+
+    @pytest.fixture
+    def large_csv(self):
+        lines = [b"id,text"] + [
+            f'{i},"row {i}\nsecond line"'.encode() if i % 7 == 0 else f"{i},row {i}".encode()
+            for i in range(1000)
+        ]
+        return b"\n".join(lines) + b"\n"
+
+    async def test_pages_match_full_read(self, service, monkeypatch, large_csv):
+        monkeypatch.setattr(settings, "ROW_INDEX_STRIDE", 64)
+        info = await upload(service, large_csv)
+        assert info.row_count == 1000
+
+        for offset, limit in [(0, 20), (63, 2), (64, 1), (500, 100), (990, 50)]:
+            headers, rows, total_rows = service.preview_csv(info.file_id, limit, offset)
+            expected = [
+                [str(i), f"row {i}\nsecond line" if i % 7 == 0 else f"row {i}"]
+                for i in range(offset, min(offset + limit, 1000))
+            ]
+            assert headers == ["id", "text"]
+            assert rows == expected
+            assert total_rows == 1000
+
+    async def test_offset_past_end(self, service):
+        info = await upload(service)
+
+        headers, rows, _ = service.preview_csv(info.file_id, limit=10, offset=10)
+
+        assert headers == ["name", "email"]
+        assert rows == []
+
+    async def test_nulls_become_empty_strings(self, service):
+        info = await upload(service, b"a,b\n1,\n")
+
+        _, rows, _ = service.preview_csv(info.file_id)
+
+        assert rows == [["1", ""]]
+
+
+class TestDeduplication:
+    """Test content-addressed storage of uploads."""
+
+    async def test_reupload_reuses_blob(self, service, monkeypatch):
+        first = await upload(service)
+
+        # Nothing is parsed again for known contents
+        def fail(*args, **kwargs):
+            raise AssertionError("metadata extracted twice")
+
+        monkeypatch.setattr(file_service_module, "extract_metadata", fail)
+        second = await upload(service, filename="again.csv")
+
+        assert second.file_id != first.file_id
+        assert second.filename == "again.csv"
+        assert second.file_path == first.file_path
+        assert second.row_count == first.row_count
+        assert second.column_stats == first.column_stats
+        assert len(service.store.list_objects()) == 1
+        assert list((service.upload_dir / ".tmp").iterdir()) == []
+        assert service.preview_csv(second.file_id) == service.preview_csv(first.file_id)
+
+    async def test_different_contents_get_different_blobs(self, service):
+        first = await upload(service)
+        second = await upload(service, CSV_CONTENT + b"Bob,bob@example.com\n")
+
+        assert second.file_path != first.file_path
+        assert second.row_count == 3
+
+
+class TestColumnTypes:
+    """Test column type inference at upload time."""
+
+    TYPED_CSV = (
+        b"id,price,active,joined,code,tier\n"
+        b"1,1.5,true,2023-01-05,001,gold\n"
+        b"2,2.25,false,2023-02-01,002,gold\n"
+        b"3,3.0,true,2023-03-09,003,silver\n"
+        b"4,4.75,false,2023-04-12,004,silver\n"
+    )
+
+    async def test_columns_are_stored_typed(self, service):
+        info = await upload(service, self.TYPED_CSV)
+
+        assert {c: t.type for c, t in info.column_types.items()} == {
+            "id": "integer",
+            "price": "float",
+            "active": "boolean",
+            "joined": "date",
+            "code": "string",
+            "tier": "categorical",
+        }
+        schema = service.scan_file(info.file_id).collect_schema()
+        assert schema["id"] == pl.Int64
+        assert schema["joined"] == pl.Date
+        assert schema["code"] == pl.String
+
+    async def test_text_scan_reproduces_original_values(self, service):
+        info = await upload(service, self.TYPED_CSV)
+
+        df = service.store.columnar_cache.scan_text(info.file_path).collect()
+
+        assert df.schema == {c: pl.String for c in info.columns}
+        assert df.row(0) == ("1", "1.5", "true", "2023-01-05", "001", "gold")
+
+    async def test_values_past_sample_fall_back_to_strings(self, service, monkeypatch):
+        monkeypatch.setattr(settings, "TYPE_INFERENCE_SAMPLE_ROWS", 1)
+
+        info = await upload(service, b"id\n1\nx\n")
+
+        assert info.column_types["id"].type == "string"
+        assert service.scan_file(info.file_id).collect()["id"].to_list() == ["1", "x"]
+
+    async def test_values_past_sample_that_change_as_text_stay_strings(
+        self, service, monkeypatch
+    ):
+        monkeypatch.setattr(settings, "TYPE_INFERENCE_SAMPLE_ROWS", 1)
+
+        info = await upload(service, b"id,price,n\n1,1.5,1\n007,1.50,2\n")
+
+        assert {c: t.type for c, t in info.column_types.items()} == {
+            "id": "string",
+            "price": "string",
+            "n": "integer",
+        }
+        df = service.store.columnar_cache.scan_text(info.file_path).collect()
+        assert df.rows() == [("1", "1.5", "1"), ("007", "1.50", "2")]
+        _, rows, _ = service.preview_csv(info.file_id, limit=10)
+        assert rows == [list(row) for row in df.rows()]
+
+    async def test_template_uses_inferred_types(self, service):
+        info = await upload(service, self.TYPED_CSV)
+
+        operator = service.generate_node_template_file(info.file_id, "People")
+
+        assert operator.title == "People"
+        assert [o.type for o in operator.outputs] == [
+            "integer", "float", "boolean", "date", "string", "categorical"
+        ]
+
+
+class TestStorageBudget:
+    """Test LRU eviction of uploads and their derived caches."""
+
+    @pytest.fixture
+    async def files(self, service):
+        files = [
+            await upload(service, CSV_CONTENT + f"User {i},user{i}@example.com\n".encode())
+            for i in range(3)
+        ]
+        # Access order, least recent first: 1, 0, 2
+        for info in (files[1], files[0], files[2]):
+            service.registry.touch(info.file_id)
+        return files
+
+    async def test_derived_caches_are_evicted_first(self, service, files):
+        usage = service.storage_manager.usage()
+        assert usage.blob_count == 3
+        service.storage_manager.budget_bytes = usage.used_bytes - 1
+
+        assert service.storage_manager.enforce_budget() > 0
+
+        assert all(os.path.exists(info.file_path) for info in files)
+        assert service.store.columnar_cache.get(files[1].file_path) is None
+        assert service.store.columnar_cache.get(files[0].file_path) is not None
+        # Reads fall back to the CSV
+        _, rows, _ = service.preview_csv(files[1].file_id)
+        assert rows[-1] == ["User 1", "user1@example.com"]
+
+    async def test_blobs_are_evicted_least_recently_used_first(self, service, files):
+        usage = service.storage_manager.usage()
+        # Dropping every derived cache is not enough
+        service.storage_manager.budget_bytes = usage.used_bytes - usage.cache_bytes - 1
+
+        service.storage_manager.enforce_budget()
+
+        assert not os.path.exists(files[1].file_path)
+        with pytest.raises(HTTPException):
+            service.get_file_info(files[1].file_id)
+        assert service.get_file_info(files[2].file_id).file_path == files[2].file_path
+
+    async def test_pinned_files_are_kept(self, service, files):
+        service.set_pinned(files[1].file_id, True)
+        service.storage_manager.budget_bytes = 0
+
+        service.storage_manager.enforce_budget()
+
+        usage = service.storage_manager.usage()
+        assert usage.blob_count == 1
+        assert usage.pinned_count == 1
+        assert os.path.exists(files[1].file_path)
+        assert service.store.columnar_cache.get(files[1].file_path) is not None
+
+    def test_pin_unknown_file(self, service):
+        with pytest.raises(HTTPException) as e:
+            service.set_pinned("missing", True)
+        assert e.value.status_code == 404
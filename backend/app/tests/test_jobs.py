@@ -0,0 +1,237 @@
+import time
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.routes.jobs import resolve_output_file
+from app.api.routes.transform import execute_job
+from app.api.schemas.jobs import JobPlan
+from app.api.schemas.transform import (
+    GraphNode,
+    InputNodeManualValues,
+    NodeType,
+    Position,
+    TransformationConfig,
+)
+from app.services.job_queue import LeaseLost, SQLiteJobQueue
+from app.services.job_workers import JobWorkers
+from app.services.storage import LocalObjectStore
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return SQLiteJobQueue(tmp_path / "jobs.db", lease_seconds=60)
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """Local store that job plans resolve to, in this and worker processes."""
+    root = tmp_path / "store"
+    monkeypatch.setenv("LOCAL_STORAGE_ROOT", str(root))
+    monkeypatch.setattr(
+        "app.services.storage._create_object_store",
+        lambda backend: LocalObjectStore(root),
+    )
+    return LocalObjectStore(root)
+
+
+def job_plan(source_file="in/a.csv", evaluate_node_id="input-1"):
+    return JobPlan(
+        config=TransformationConfig(
+            config_id="jobs",
+            version="1",
+            description="jobs",
+            input_file_prefix_path="in/",
+            output_file_prefix_path="out/",
+            nodes=[
+                GraphNode(
+                    id="input-1",
+                    type=NodeType.INPUT,
+                    position=Position(x=0, y=0),
+                    manual_values=InputNodeManualValues(column_names=["name"]),
+                ),
+            ],
+            edges=[],
+        ),
+        evaluate_node_id=evaluate_node_id,
+        storage="local",
+        source_file=source_file,
+        output_file="out/result.csv",
+    )
+
+
+class TestSQLiteJobQueue:
+    """Test the SQLite job queue."""
+
+    def test_jobs_are_claimed_once_in_order(self, queue):
+        first = queue.enqueue(job_plan())
+        second = queue.enqueue(job_plan())
+
+        assert queue.claim("a").job_id == first.job_id
+        assert queue.claim("b").job_id == second.job_id
+        assert queue.claim("c") is None
+        assert queue.get(first.job_id).status == "running"
+
+    def test_expired_lease_is_taken_over(self, tmp_path):
+        queue = SQLiteJobQueue(tmp_path / "jobs.db", lease_seconds=0)
+        job = queue.enqueue(job_plan())
+        queue.claim("a")
+        queue.update_progress(job.job_id, "a", 10, 100)
+
+        time.sleep(0.01)
+        claimed = queue.claim("b")
+
+        assert claimed.job_id == job.job_id
+        assert queue.get(job.job_id).rows_processed == 0
+
+    def test_updates_from_a_worker_that_lost_the_job_are_ignored(self, tmp_path):
+        queue = SQLiteJobQueue(tmp_path / "jobs.db", lease_seconds=0)
+        job = queue.enqueue(job_plan())
+        queue.claim("a")
+        time.sleep(0.01)
+        queue.claim("b")
+
+        assert not queue.update_progress(job.job_id, "a", 10, 100)
+        assert not queue.heartbeat(job.job_id, "a")
+        assert not queue.complete(job.job_id, "a", "s3://bucket/stale.csv")
+        assert not queue.fail(job.job_id, "a", "stale")
+        info = queue.get(job.job_id)
+        assert (info.status, info.rows_processed, info.result_location) == ("running", 0, None)
+        assert queue.update_progress(job.job_id, "b", 1, 10)
+
+    def test_renewed_lease_is_not_taken_over(self, tmp_path):
+        queue = SQLiteJobQueue(tmp_path / "jobs.db", lease_seconds=0.3)
+        queue.enqueue(job_plan())
+        job = queue.claim("a")
+
+        with queue.renewing_lease(job):
+            time.sleep(0.6)
+            assert queue.claim("b") is None
+
+        time.sleep(0.4)
+        assert queue.claim("b").job_id == job.job_id
+        with pytest.raises(LeaseLost):
+            with queue.renewing_lease(job):
+                pass
+
+    def test_progress_and_completion_are_reported(self, queue):
+        job = queue.enqueue(job_plan())
+        queue.claim("a")
+        queue.update_progress(job.job_id, "a", 5, 50, source_bytes=500)
+        queue.complete(job.job_id, "a", "s3://bucket/out/result.csv")
+
+        info = queue.get(job.job_id)
+        assert info.status == "succeeded"
+        assert (info.rows_processed, info.bytes_processed, info.source_bytes) == (5, 50, 500)
+        assert info.result_location == "s3://bucket/out/result.csv"
+        assert info.finished_at is not None
+
+    def test_queue_survives_reopening(self, queue):
+        job = queue.enqueue(job_plan())
+
+        reopened = SQLiteJobQueue(queue.db_path, lease_seconds=60)
+
+        assert reopened.get(job.job_id).status == "queued"
+        assert [j.job_id for j in reopened.list_jobs()] == [job.job_id]
+
+
+class TestExecuteJob:
+    """Test running a job in chunks."""
+
+    def test_result_is_written_chunk_by_chunk(self, queue, store):
+        store.put_bytes("in/a.csv", b"name,email\nJohn,j@x.com\nJane,ja@x.com\nJim,ji@x.com\n")
+        job = queue.enqueue(job_plan())
+
+        execute_job(queue, queue.claim("a"), batch_rows=2)
+
+        info = queue.get(job.job_id)
+        assert info.status == "succeeded"
+        assert info.rows_processed == 3
+        assert info.source_bytes == store.head("in/a.csv").size
+        assert info.result_location == store.path_for("out/result.csv").as_uri()
+        result = store.read_bytes("out/result.csv")
+        assert result == (
+            b"input-1-column-0,email\nJohn,j@x.com\nJane,ja@x.com\nJim,ji@x.com\n"
+        )
+        assert info.bytes_processed == len(result)
+
+    def test_failure_is_recorded(self, queue, store):
+        store.put_bytes("in/a.csv", b"name\nJohn\n")
+        job = queue.enqueue(job_plan(evaluate_node_id="missing"))
+
+        execute_job(queue, queue.claim("a"), batch_rows=2)
+
+        info = queue.get(job.job_id)
+        assert info.status == "failed"
+        assert "missing" in info.error
+        assert not store.exists("out/result.csv")
+
+    def test_job_taken_over_is_dropped(self, tmp_path, store):
+        queue = SQLiteJobQueue(tmp_path / "jobs.db", lease_seconds=0)
+        store.put_bytes("in/a.csv", b"name\nJohn\n")
+        job = queue.enqueue(job_plan())
+        stale = queue.claim("a")
+        time.sleep(0.01)
+        queue.claim("b")
+
+        execute_job(queue, stale, batch_rows=2)
+
+        info = queue.get(job.job_id)
+        assert info.status == "running"
+        assert info.error is None
+        assert not store.exists("out/result.csv")
+
+
+class TestResolveOutputFile:
+    """Test validating where a job writes its result."""
+
+    def test_default_is_under_the_output_prefix(self):
+        assert resolve_output_file(job_plan().config, None, "job-1") == "out/job-1.csv"
+
+    def test_requested_key_under_the_output_prefix_is_kept(self):
+        config = job_plan().config
+
+        assert resolve_output_file(config, "out/2024/result.csv", "job-1") == (
+            "out/2024/result.csv"
+        )
+
+    @pytest.mark.parametrize(
+        "output_file",
+        [".jobs.db", "in/a.csv", "out/../.registry.db", "out/./a.csv", "out//a.csv",
+         "out/.hidden.csv", "out/", "output/a.csv"],
+    )
+    def test_keys_outside_the_output_prefix_are_rejected(self, output_file):
+        with pytest.raises(HTTPException) as e:
+            resolve_output_file(job_plan().config, output_file, "job-1")
+        assert e.value.status_code == 400
+
+    def test_upload_blobs_are_rejected_without_prefix(self):
+        config = job_plan().config.model_copy(update={"output_file_prefix_path": ""})
+
+        assert resolve_output_file(config, "results/a.csv", "job-1") == "results/a.csv"
+        with pytest.raises(HTTPException):
+            resolve_output_file(config, "blobs/ab/abc.csv", "job-1")
+
+
+class TestJobWorkers:
+    """Test running jobs in worker processes."""
+
+    def test_workers_run_queued_jobs(self, queue, store):
+        store.put_bytes("in/a.csv", b"name\nJohn\n")
+        store.put_bytes("in/b.csv", b"name\nJane\n")
+        jobs = [queue.enqueue(job_plan("in/a.csv")), queue.enqueue(job_plan("in/b.csv"))]
+        workers = JobWorkers(2, queue=queue, poll_interval=0.05)
+
+        workers.start()
+        try:
+            deadline = time.monotonic() + 60
+            while time.monotonic() < deadline and any(
+                queue.get(job.job_id).status in ("queued", "running") for job in jobs
+            ):
+                time.sleep(0.1)
+        finally:
+            workers.stop()
+
+        assert [queue.get(job.job_id).status for job in jobs] == ["succeeded"] * 2
+        assert Path(store.path_for("out/result.csv")).exists()
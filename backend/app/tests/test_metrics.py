@@ -0,0 +1,90 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from app.services.metrics import MetricsRegistry
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return MetricsRegistry(tmp_path, flush_interval=60)
+
+
+def samples(text):
+    """Metric lines of an exposition, without comments."""
+    return [line for line in text.splitlines() if not line.startswith("#")]
+
+
+class TestMetricsRegistry:
+    """Test recording and exposing metrics."""
+
+    def test_counter_is_exposed_with_total_suffix(self, registry):
+        requests = registry.counter("s3_requests", "S3 requests", ["operation"])
+        requests.inc(operation="GetObject")
+        requests.inc(2, operation="GetObject")
+
+        text = registry.collect()
+
+        assert "# TYPE s3_requests counter" in text
+        assert samples(text) == ['s3_requests_total{operation="GetObject"} 3']
+
+    def test_histogram_buckets_are_cumulative(self, registry):
+        duration = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.7, 5.0):
+            duration.observe(value)
+
+        assert samples(registry.collect()) == [
+            'latency_seconds_bucket{le="0.1"} 1',
+            'latency_seconds_bucket{le="1"} 3',
+            'latency_seconds_bucket{le="+Inf"} 4',
+            "latency_seconds_sum 6.25",
+            "latency_seconds_count 4",
+        ]
+
+    def test_gauges_are_labelled_with_the_process(self, registry):
+        lag = registry.gauge("lag_seconds", "Lag")
+        lag.set(0.5)
+
+        assert samples(registry.collect()) == [f'lag_seconds{{pid="{os.getpid()}"}} 0.5']
+
+    def test_snapshots_of_other_processes_are_merged(self, registry, tmp_path):
+        requests = registry.counter("requests", "Requests", ["route"])
+        requests.inc(route="/a")
+        lag = registry.gauge("lag_seconds", "Lag")
+        other = os.getppid()
+        (tmp_path / f"{other}.json").write_text(
+            json.dumps({"requests": [[["/a"], 2.0], [["/b"], 1.0]], "lag_seconds": [[[], 0.25]]})
+        )
+
+        assert samples(registry.collect()) == [
+            'requests_total{route="/a"} 3',
+            'requests_total{route="/b"} 1',
+            f'lag_seconds{{pid="{other}"}} 0.25',
+        ]
+
+    def test_snapshots_of_exited_processes_are_dropped(self, registry, tmp_path):
+        registry.counter("requests", "Requests")
+        process = subprocess.run(
+            [sys.executable, "-c", "import os; print(os.getpid())"],
+            capture_output=True,
+            text=True,
+        )
+        dead = tmp_path / f"{process.stdout.strip()}.json"
+        dead.write_text(json.dumps({"requests": [[[], 5.0]]}))
+
+        assert samples(registry.collect()) == []
+        assert not dead.exists()
+
+    def test_flush_writes_a_snapshot_only_when_changed(self, registry, tmp_path):
+        requests = registry.counter("requests", "Requests")
+        path = tmp_path / f"{os.getpid()}.json"
+
+        registry.flush()
+        assert not path.exists()
+
+        requests.inc()
+        registry.flush()
+        assert json.loads(path.read_text()) == {"requests": [[[], 1.0]]}
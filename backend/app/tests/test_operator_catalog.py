@@ -0,0 +1,94 @@
+import json
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.operator_catalog import OPERATORS_DIR, OperatorCatalog
+
+OPERATOR = {
+    "title": "Addition",
+    "description": "Add two numbers",
+    "category": "math",
+    "id": "math-addition",
+    "type": "math-addition",
+    "inputs": [],
+    "outputs": [],
+    "config": {"steps": [{"operation": "with_columns", "kwargs": {}}]},
+}
+
+
+@pytest.fixture
+def operators_dir(tmp_path):
+    (tmp_path / "addition.json").write_text(json.dumps(OPERATOR))
+    return tmp_path
+
+
+class TestOperatorCatalog:
+    """Test the in-memory operator catalog."""
+
+    def test_shipped_operators_are_valid(self):
+        catalog = OperatorCatalog().get()
+
+        shipped = [name for name in os.listdir(OPERATORS_DIR) if name.endswith(".json")]
+        assert len(catalog.operators) == len(shipped)
+
+    def test_reloads_only_on_change(self, operators_dir):
+        catalog = OperatorCatalog(operators_dir)
+        first = catalog.get()
+        assert catalog.get() is first
+
+        (operators_dir / "copy.json").write_text(json.dumps({**OPERATOR, "id": "copy"}))
+        second = catalog.get()
+
+        assert second is not first
+        assert [o["id"] for o in second.operators] == ["math-addition", "copy"]
+        assert second.etag != first.etag
+
+    def test_catalog_without_revalidation_is_loaded_once(self, operators_dir):
+        catalog = OperatorCatalog(operators_dir, revalidate=False)
+        first = catalog.get()
+
+        (operators_dir / "copy.json").write_text(json.dumps({**OPERATOR, "id": "copy"}))
+
+        assert catalog.get() is first
+
+    def test_edited_file_is_reloaded(self, operators_dir):
+        catalog = OperatorCatalog(operators_dir)
+        first = catalog.get()
+        path = operators_dir / "addition.json"
+        path.write_text(json.dumps({**OPERATOR, "title": "Sum"}))
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        assert catalog.get().operators[0]["title"] == "Sum"
+        assert catalog.get().etag != first.etag
+
+    def test_invalid_operators_are_skipped(self, operators_dir):
+        (operators_dir / "broken.json").write_text("{")
+        (operators_dir / "incomplete.json").write_text(json.dumps({"id": "x"}))
+
+        catalog = OperatorCatalog(operators_dir).get()
+
+        assert [o["id"] for o in catalog.operators] == ["math-addition"]
+        assert json.loads(catalog.body)["count"] == 1
+
+
+class TestNodesEndpoint:
+    """Test conditional requests for the operator catalog."""
+
+    def test_etag_and_not_modified(self):
+        client = TestClient(app)
+
+        response = client.get("/nodes/")
+        etag = response.headers["etag"]
+        assert response.status_code == 200
+        assert response.json()["count"] == len(response.json()["operators"])
+
+        cached = client.get("/nodes/", headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+        assert cached.content == b""
+
+        stale = client.get("/nodes/", headers={"If-None-Match": '"stale"'})
+        assert stale.status_code == 200
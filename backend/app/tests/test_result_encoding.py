@@ -0,0 +1,110 @@
+import json
+
+import polars as pl
+import pyarrow as pa
+import pytest
+from fastapi import HTTPException
+
+from app.services.result_encoding import (
+    ARROW_STREAM,
+    JSON,
+    PARQUET,
+    encode_frame,
+    iter_ipc_file,
+    negotiate_media_type,
+)
+
+
+@pytest.fixture
+def result_file(tmp_path):
+    """Arrow IPC result file with several record batches."""
+    path = tmp_path / "result.arrow"
+    pl.DataFrame(
+        {"id": [str(i) for i in range(25)], "text": ['a "quoted", value'] * 25}
+    ).write_ipc(path, record_batch_size=10)
+    return path
+
+
+class TestNegotiation:
+    """Test choosing the result format from the Accept header."""
+
+    @pytest.mark.parametrize(
+        "accept, expected",
+        [
+            (None, "text/csv"),
+            ("*/*", "text/csv"),
+            ("application/x-ndjson", "application/x-ndjson"),
+            ("text/csv;q=0.5, application/x-ndjson", "application/x-ndjson"),
+            ("text/html, application/x-ndjson;q=0.1", "application/x-ndjson"),
+        ],
+    )
+    def test_negotiate(self, accept, expected):
+        assert negotiate_media_type(accept) == expected
+
+    def test_unsupported(self):
+        with pytest.raises(HTTPException) as e:
+            negotiate_media_type("text/html")
+        assert e.value.status_code == 406
+
+
+class TestStreaming:
+    """Test encoding results batch by batch."""
+
+    def test_csv_chunks_per_batch(self, result_file):
+        assert pa.ipc.open_file(pa.memory_map(str(result_file))).num_record_batches == 3
+
+        chunks = list(iter_ipc_file(result_file, "text/csv"))
+
+        # Header, then one chunk per record batch
+        assert len(chunks) == 4
+        assert chunks[0] == b"id,text\n"
+        assert pl.read_csv(b"".join(chunks), infer_schema=False).equals(
+            pl.read_ipc(result_file)
+        )
+
+    def test_ndjson(self, result_file):
+        lines = b"".join(iter_ipc_file(result_file, "application/x-ndjson")).splitlines()
+
+        assert len(lines) == 25
+        assert json.loads(lines[3]) == {"id": "3", "text": 'a "quoted", value'}
+
+    def test_empty_result_keeps_csv_header(self, tmp_path):
+        path = tmp_path / "empty.arrow"
+        pl.DataFrame(schema={"a": pl.String, "b": pl.String}).write_ipc(path)
+
+        assert b"".join(iter_ipc_file(path, "text/csv")) == b"a,b\n"
+
+
+class TestArrowFormats:
+    """Test Arrow IPC and Parquet output."""
+
+    @pytest.mark.parametrize(
+        "media_type, read",
+        [
+            (ARROW_STREAM, pl.read_ipc_stream),
+            (PARQUET, pl.read_parquet),
+        ],
+    )
+    def test_streamed_chunks_form_one_valid_file(self, result_file, media_type, read):
+        chunks = list(iter_ipc_file(result_file, media_type))
+
+        assert len(chunks) > 3
+        assert read(b"".join(chunks)).equals(pl.read_ipc(result_file))
+
+    @pytest.mark.parametrize("media_type", [ARROW_STREAM, PARQUET])
+    def test_parquet_and_arrow_round_trip_types(self, media_type):
+        df = pl.DataFrame({"a": [1, 2], "b": [1.5, None], "c": ["x", "y"]})
+
+        data = encode_frame(df, media_type)
+
+        read = pl.read_ipc_stream if media_type == ARROW_STREAM else pl.read_parquet
+        assert read(data).equals(df)
+
+    def test_negotiate_among_supported(self):
+        supported = [JSON, ARROW_STREAM, PARQUET]
+
+        assert negotiate_media_type(None, supported) == JSON
+        assert negotiate_media_type("*/*", supported) == JSON
+        assert negotiate_media_type(PARQUET, supported) == PARQUET
+        with pytest.raises(HTTPException):
+            negotiate_media_type("text/csv", supported)
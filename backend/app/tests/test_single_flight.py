@@ -0,0 +1,199 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.routes.transform import preview_key as transform_preview_key
+from app.api.schemas.transform import (
+    GraphNode,
+    InputNodeManualValues,
+    NodeType,
+    Position,
+    TransformationConfig,
+)
+from app.main import app
+from app.services.graph_service import preview_key as graph_preview_key
+from app.services.single_flight import SingleFlight, canonical_hash
+from app.services.storage import LocalObjectStore
+from app.tests.test_execution_pool import exported_graph
+
+
+class TestSingleFlight:
+    """Test coalescing of concurrent identical calls."""
+
+    async def test_concurrent_calls_share_one_execution(self):
+        flights = SingleFlight("test")
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return object()
+
+        results = await asyncio.gather(*[flights.run("key", work) for _ in range(5)])
+
+        assert calls == 1
+        assert all(result is results[0] for result in results)
+        assert flights.in_flight() == 0
+
+    async def test_different_keys_run_separately(self):
+        flights = SingleFlight("test")
+
+        async def work(value):
+            await asyncio.sleep(0.01)
+            return value
+
+        results = await asyncio.gather(
+            flights.run("a", lambda: work(1)), flights.run("b", lambda: work(2))
+        )
+
+        assert results == [1, 2]
+
+    async def test_finished_calls_are_not_cached(self):
+        flights = SingleFlight("test")
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+
+        await flights.run("key", work)
+        await flights.run("key", work)
+
+        assert calls == 2
+
+    async def test_exceptions_reach_every_caller(self):
+        flights = SingleFlight("test")
+
+        async def work():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(
+            flights.run("key", work), flights.run("key", work), return_exceptions=True
+        )
+
+        assert [type(result) for result in results] == [ValueError, ValueError]
+
+    async def test_cancelled_caller_does_not_cancel_the_call(self):
+        flights = SingleFlight("test")
+
+        async def work():
+            await asyncio.sleep(0.05)
+            return "done"
+
+        first = asyncio.ensure_future(flights.run("key", work))
+        second = asyncio.ensure_future(flights.run("key", work))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        assert await second == "done"
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+
+class TestPreviewKeys:
+    """Test the identities previews are coalesced by."""
+
+    def test_canonical_hash_ignores_key_order(self):
+        assert canonical_hash({"a": 1, "b": [1, 2]}) == canonical_hash({"b": [1, 2], "a": 1})
+
+    def test_graph_key_ignores_layout_and_export_time(self):
+        graph = exported_graph([("a", {"type": "csv_input", "id": "file-1"})], [])
+        moved = graph.model_copy(deep=True)
+        moved.nodes[0].position.x = 100
+        moved.metadata.exported_at = "2024-06-01T00:00:00Z"
+        other_file = exported_graph([("a", {"type": "csv_input", "id": "file-2"})], [])
+
+        assert graph_preview_key(graph, 20) == graph_preview_key(moved, 20)
+        assert graph_preview_key(graph, 20) != graph_preview_key(graph, 10)
+        assert graph_preview_key(graph, 20) != graph_preview_key(other_file, 20)
+
+    def test_transform_key_follows_the_source_version(self, tmp_path):
+        store = LocalObjectStore(tmp_path)
+        store.put_bytes("in/a.csv", b"name\nJohn\n")
+        config = TransformationConfig(
+            config_id="flight",
+            version="1",
+            description="flight",
+            input_file_prefix_path="in/",
+            output_file_prefix_path="out/",
+            nodes=[
+                GraphNode(
+                    id="input-1",
+                    type=NodeType.INPUT,
+                    position=Position(x=0, y=0),
+                    manual_values=InputNodeManualValues(column_names=["name"]),
+                ),
+            ],
+            edges=[],
+        )
+        moved = config.model_copy(deep=True)
+        moved.nodes[0].position = Position(x=50, y=50)
+
+        def key(config):
+            return transform_preview_key(config, "input-1", store, "in/a.csv", 10, "text/csv")
+
+        before = key(config)
+        assert key(moved) == before
+
+        store.put_bytes("in/a.csv", b"name\nJohn\nJane\n")
+        assert key(config) != before
+
+    @pytest.mark.parametrize("route", ["transform", "graph"])
+    def test_keys_are_computed_off_the_event_loop(self, route, tmp_path, monkeypatch):
+        store = LocalObjectStore(tmp_path)
+        store.put_bytes("in/a.csv", b"name\nJohn\n")
+        monkeypatch.setattr("app.services.storage._create_object_store", lambda backend: store)
+        on_event_loop = []
+        module = "app.api.routes.transform" if route == "transform" else "app.api.routes.graphs"
+        compute = transform_preview_key if route == "transform" else graph_preview_key
+
+        def preview_key(*args):
+            try:
+                asyncio.get_running_loop()
+                on_event_loop.append(True)
+            except RuntimeError:
+                on_event_loop.append(False)
+            return compute(*args)
+
+        monkeypatch.setattr(f"{module}.preview_key", preview_key)
+        client = TestClient(app)
+        if route == "transform":
+            config = TransformationConfig(
+                config_id="flight",
+                version="1",
+                description="flight",
+                input_file_prefix_path="in/",
+                output_file_prefix_path="out/",
+                nodes=[
+                    GraphNode(
+                        id="input-1",
+                        type=NodeType.INPUT,
+                        position=Position(x=0, y=0),
+                        manual_values=InputNodeManualValues(column_names=["name"]),
+                    ),
+                ],
+                edges=[],
+            )
+            response = client.post(
+                "/transform",
+                json={
+                    "config": config.model_dump(mode="json"),
+                    "evaluate_node_id": "input-1",
+                    "source_file": "in/a.csv",
+                    "storage": "local",
+                    "preview": True,
+                    "limit": 1,
+                },
+            )
+        else:
+            graph = exported_graph([("c", {"type": "constant"})], [])
+            response = client.post(
+                "/graphs/preview",
+                json={"graph": graph.model_dump(mode="json"), "preview_limit": 1},
+            )
+
+        assert response.status_code == 200
+        assert on_event_loop == [False]
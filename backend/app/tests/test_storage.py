@@ -0,0 +1,210 @@
+import pytest
+from fastapi import HTTPException
+
+from app.api.routes.transform import (
+    apply_transformation,
+    batch_output_key,
+    get_latest_file,
+    read_csv_from_store,
+    run_batch_transform,
+)
+from app.api.schemas.transform import (
+    ConnectionHandle,
+    GraphNode,
+    InputNodeManualValues,
+    NodeType,
+    OutputNodeManualValues,
+    Position,
+    TransformationConfig,
+)
+from app.services.storage import LocalObjectStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Local object store with a couple of CSV objects."""
+    store = LocalObjectStore(tmp_path)
+    store.put_bytes("in/a.csv", b"name,email\nJohn,john@example.com\n")
+    store.put_bytes("in/b.csv", b"name,email\nJane,jane@example.com\n")
+    store.put_bytes(".cache/ignored.csv", b"x\n1\n")
+    return store
+
+
+class TestLocalObjectStore:
+    """Test the local filesystem backend."""
+
+    def test_list_objects(self, store):
+        keys = [o.key for o in store.list_objects("in/")]
+        assert keys == ["in/a.csv", "in/b.csv"]
+
+    def test_internal_entries_are_hidden(self, store):
+        assert all(not o.key.startswith(".") for o in store.list_objects())
+
+    def test_open_buffer_is_memory_mapped(self, store):
+        buffer = store.open_buffer("in/a.csv")
+        assert isinstance(buffer, memoryview)
+        assert buffer.readonly
+        assert bytes(buffer).startswith(b"name,email")
+
+    def test_read_bytes_limit(self, store):
+        assert store.read_bytes("in/a.csv", max_bytes=4) == b"name"
+
+    def test_missing_object(self, store):
+        assert not store.exists("in/missing.csv")
+        with pytest.raises(HTTPException) as e:
+            store.head("in/missing.csv")
+        assert e.value.status_code == 404
+
+    def test_key_cannot_escape_root(self, store):
+        with pytest.raises(HTTPException) as e:
+            store.path_for("../outside.csv")
+        assert e.value.status_code == 400
+
+
+def test_transform_from_local_store(store):
+    """The full read + transform path runs offline against the local backend."""
+    input_node = GraphNode(
+        id="input-1",
+        type=NodeType.INPUT,
+        position=Position(x=0, y=0),
+        manual_values=InputNodeManualValues(column_names=["name", "email"]),
+        outputs=[
+            ConnectionHandle(
+                id="edge-1",
+                source_node="input-1",
+                source_handle="column-1",
+                target="output-1",
+                target_handle="user_email",
+            )
+        ],
+    )
+    output_node = GraphNode(
+        id="output-1",
+        type=NodeType.OUTPUT,
+        position=Position(x=300, y=0),
+        manual_values=OutputNodeManualValues(),
+        inputs=[
+            ConnectionHandle(
+                id="edge-1",
+                source_node="input-1",
+                source_handle="column-1",
+                target="output-1",
+                target_handle="user_email",
+            )
+        ],
+    )
+
+    source = get_latest_file("in/", store)
+    df = read_csv_from_store(source, store=store)
+    result = apply_transformation([input_node, output_node], df, "output-1")
+
+    assert list(result.columns) == ["user_email"]
+    assert len(result) == 1
+
+
+async def test_batch_transform_writes_one_output_per_input(store):
+    """Every CSV under the prefix is transformed; failures are reported per file."""
+    store.put_bytes("in/c.csv", b"other\n1\n")
+    config = TransformationConfig(
+        config_id="batch",
+        version="1",
+        description="batch",
+        input_file_prefix_path="in/",
+        output_file_prefix_path="out/",
+        nodes=[
+            GraphNode(
+                id="input-1",
+                type=NodeType.INPUT,
+                position=Position(x=0, y=0),
+                manual_values=InputNodeManualValues(column_names=["name"]),
+            ),
+        ],
+        edges=[],
+    )
+
+    results = await run_batch_transform(config, "input-1", store, "in/", 2)
+
+    assert [r.source_file for r in results] == ["in/a.csv", "in/b.csv", "in/c.csv"]
+    assert [r.status for r in results] == ["succeeded", "succeeded", "succeeded"]
+    assert store.read_bytes("out/b.csv").startswith(b"input-1-column-0,email")
+
+    missing = await run_batch_transform(config, "missing-node", store, "in/", 2)
+    assert all(r.status == "failed" and r.error for r in missing)
+
+
+async def test_batch_transform_keeps_nested_paths(store):
+    """Nested inputs with the same name write to different outputs."""
+    store.put_bytes("in/x/data.csv", b"name\nAda\n")
+    store.put_bytes("in/y/data.csv", b"name\nAlan\n")
+    config = TransformationConfig(
+        config_id="batch",
+        version="1",
+        description="batch",
+        input_file_prefix_path="in/",
+        output_file_prefix_path="out/",
+        nodes=[
+            GraphNode(
+                id="input-1",
+                type=NodeType.INPUT,
+                position=Position(x=0, y=0),
+                manual_values=InputNodeManualValues(column_names=["name"]),
+            ),
+        ],
+        edges=[],
+    )
+
+    results = await run_batch_transform(config, "input-1", store, "in/", 2)
+
+    assert [r.output_file for r in results] == [
+        "out/a.csv", "out/b.csv", "out/x/data.csv", "out/y/data.csv"
+    ]
+    assert store.read_bytes("out/x/data.csv") == b"input-1-column-0\nAda\n"
+    assert store.read_bytes("out/y/data.csv") == b"input-1-column-0\nAlan\n"
+
+
+def batch_config(output_prefix: str) -> TransformationConfig:
+    return TransformationConfig(
+        config_id="batch",
+        version="1",
+        description="batch",
+        input_file_prefix_path="in/",
+        output_file_prefix_path=output_prefix,
+        nodes=[
+            GraphNode(
+                id="input-1",
+                type=NodeType.INPUT,
+                position=Position(x=0, y=0),
+                manual_values=InputNodeManualValues(column_names=["name"]),
+            ),
+        ],
+        edges=[],
+    )
+
+
+async def test_batch_transform_with_partial_name_prefix(store):
+    """A prefix ending within a name keeps whole file names."""
+    store.put_bytes("partner/2024-01-02.csv", b"name\nAda\n")
+    store.put_bytes("partner/2024-01/03.csv", b"name\nAlan\n")
+
+    results = await run_batch_transform(
+        batch_config("out/"), "input-1", store, "partner/2024-01", 2
+    )
+
+    assert [r.output_file for r in results] == ["out/2024-01-02.csv", "out/2024-01/03.csv"]
+    assert batch_output_key("partner/2024-01", "partner/2024-01-02.csv") == "2024-01-02.csv"
+    assert batch_output_key("partner/2024-01/", "partner/2024-01/03.csv") == "03.csv"
+
+
+@pytest.mark.parametrize(
+    "input_prefix, output_prefix",
+    [("in/", "in"), ("in/", "in/out/"), ("in/", ""), ("in/x/", "in/"), ("in", "in-out/"),
+     ("in/", "blobs"), ("in/", "results/.cache/"), ("in/", "results/../in/")],
+)
+async def test_batch_transform_rejects_output_prefixes(store, input_prefix, output_prefix):
+    """Outputs may not overwrite inputs or files the service keeps in the store."""
+    with pytest.raises(HTTPException) as e:
+        await run_batch_transform(batch_config(output_prefix), "input-1", store, input_prefix, 2)
+
+    assert e.value.status_code == 400
+    assert sorted(o.key for o in store.list_objects("")) == ["in/a.csv", "in/b.csv"]
+
@@ -0,0 +1,116 @@
+import json
+
+import pytest
+import structlog
+
+from app.services import tracing
+from app.services.execution_pool import ExecutionPool
+from app.services.tracing import (
+    ChromeTraceExporter,
+    JsonlExporter,
+    SpanExporter,
+    create_exporter,
+    current_context,
+    span,
+    trace,
+)
+
+
+class ListExporter(SpanExporter):
+    def __init__(self):
+        self.spans = []
+
+    def export(self, span):
+        self.spans.append(span)
+
+
+@pytest.fixture
+def exporter(monkeypatch):
+    exporter = ListExporter()
+    monkeypatch.setattr(tracing, "_exporter", exporter)
+    return exporter
+
+
+def traced_child(name):
+    """Runs in a pool worker, within the trace of the caller."""
+    with span(name):
+        return current_context()[0]
+
+
+class TestSpans:
+    """Test building span trees."""
+
+    def test_spans_form_a_tree(self, exporter):
+        with trace("request") as trace_id:
+            with span("parse"):
+                pass
+            with span("execute"):
+                with span("node", node_id="a"):
+                    pass
+
+        spans = {s.name: s for s in exporter.spans}
+        assert {s.trace_id for s in exporter.spans} == {trace_id}
+        assert spans["request"].parent_id is None
+        assert spans["parse"].parent_id == spans["request"].span_id
+        assert spans["execute"].parent_id == spans["request"].span_id
+        assert spans["node"].parent_id == spans["execute"].span_id
+        assert spans["node"].attributes == {"node_id": "a"}
+        assert spans["request"].duration >= spans["execute"].duration
+
+    def test_spans_outside_a_trace_are_not_recorded(self, exporter):
+        with span("orphan") as current:
+            assert current is None
+
+        assert exporter.spans == []
+
+    def test_errors_are_recorded(self, exporter):
+        with pytest.raises(ValueError):
+            with trace("request"):
+                raise ValueError("boom")
+
+        assert exporter.spans[0].attributes["error"] == "ValueError"
+
+    def test_log_lines_carry_the_trace_id(self, exporter):
+        with trace("request") as trace_id:
+            assert structlog.contextvars.get_contextvars()["trace_id"] == trace_id
+        assert "trace_id" not in structlog.contextvars.get_contextvars()
+
+    async def test_worker_spans_join_the_trace(self, tmp_path, monkeypatch):
+        path = tmp_path / "spans.jsonl"
+        # Read by the spawned worker when it imports the settings
+        monkeypatch.setenv("TRACE_EXPORTER", "jsonl")
+        monkeypatch.setenv("TRACE_PATH", str(path))
+        monkeypatch.setattr(tracing, "_exporter", JsonlExporter(path))
+        pool = ExecutionPool("test", max_workers=1)
+        try:
+            with trace("request") as trace_id:
+                assert await pool.run(traced_child, "child") == trace_id
+        finally:
+            pool.shutdown()
+
+        spans = {s["name"]: s for s in map(json.loads, path.read_text().splitlines())}
+        assert spans["child"]["trace_id"] == trace_id
+        assert spans["child"]["parent_id"] == spans["pool.run"]["span_id"]
+        assert spans["child"]["pid"] != spans["request"]["pid"]
+
+
+class TestExporters:
+    """Test writing spans to files."""
+
+    def test_chrome_trace_is_an_open_json_array(self, tmp_path, monkeypatch):
+        path = tmp_path / "trace.json"
+        monkeypatch.setattr(tracing, "_exporter", ChromeTraceExporter(path))
+
+        with trace("request"):
+            with span("node"):
+                pass
+
+        events = json.loads(path.read_text().rstrip().rstrip(",") + "]")
+        assert [e["name"] for e in events] == ["node", "request"]
+        assert all(e["ph"] == "X" for e in events)
+        assert events[0]["args"]["parent_id"] == events[1]["args"]["span_id"]
+
+    def test_unknown_exporter_is_rejected(self, tmp_path):
+        assert create_exporter("none", tmp_path) is None
+        with pytest.raises(ValueError):
+            create_exporter("zipkin", tmp_path)
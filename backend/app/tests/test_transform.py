@@ -1,6 +1,5 @@
 import pytest
-import pandas as pd
-import numpy as np
+import polars as pl
 from app.api.schemas.transform import (
     GraphNode,
     NodeType,
@@ -17,7 +16,7 @@ from app.api.routes.transform import apply_transformation
 @pytest.fixture
 def sample_df():
     """Create a sample DataFrame for testing."""
-    return pd.DataFrame(
+    return pl.DataFrame(
         {
             "name": ["John Doe", "Jane Smith"],
             "email": ["john@example.com", "jane@example.com"],
@@ -209,10 +208,10 @@ class TestNodeTransformations:
 
         expected_column = f"{string_concat_node.id}-output"
         assert expected_column in result.columns
-        assert result[expected_column].iloc[0] == "John Doe-john@example.com"
+        assert result[expected_column][0] == "John Doe-john@example.com"
 
     def test_null_values(self, sample_df):
-        df_with_nulls = pd.DataFrame(
+        df_with_nulls = pl.DataFrame(
             {
                 "name": ["John Doe", None],
                 "email": ["john@example.com", "jane@example.com"],
@@ -273,7 +272,37 @@ class TestNodeTransformations:
         nodes = [input_node, string_concat_node]
         result = apply_transformation(nodes, df_with_nulls, string_concat_node.id)
 
-        assert not result.isna().all().any()  # No completely null columns
+        assert not any(result[column].is_null().all() for column in result.columns)  # No completely null columns
+
+    def test_output_node_keeps_only_mapped_columns(self, sample_df):
+        edge = ConnectionHandle(
+            id="edge-1",
+            source_node="input-1",
+            source_handle="column-1",
+            target="output-1",
+            target_handle="contact",
+        )
+        input_node = GraphNode(
+            id="input-1",
+            type=NodeType.INPUT,
+            position=Position(x=0, y=0),
+            manual_values=InputNodeManualValues(column_names=["name", "email"]),
+            outputs=[edge],
+        )
+        output_node = GraphNode(
+            id="output-1",
+            type=NodeType.OUTPUT,
+            position=Position(x=300, y=0),
+            manual_values=OutputNodeManualValues(entity_type="courses"),
+            inputs=[edge],
+        )
+
+        result = apply_transformation([input_node, output_node], sample_df, output_node.id)
+
+        assert result.columns == ["contact"]
+        assert result["contact"].to_list() == ["john@example.com", "jane@example.com"]
+        # The input frame is left as it was
+        assert sample_df.columns == ["name", "email", "id"]
 
 
 def test_cyclic_graph():
@@ -328,4 +357,4 @@ def test_cyclic_graph():
 
     with pytest.raises(ValueError, match="cycle"):
         nodes = [input_node, string_concat_node]
-        apply_transformation(nodes, pd.DataFrame(), string_concat_node.id)
+        apply_transformation(nodes, pl.DataFrame(), string_concat_node.id)
@@ -0,0 +1,203 @@
+import hashlib
+import io
+
+import pytest
+from botocore.exceptions import ClientError
+
+from app.api.routes.transform import compile_plan
+from app.api.schemas.transform import (
+    GraphNode,
+    InputNodeManualValues,
+    NodeType,
+    Position,
+    TransformationConfig,
+)
+from app.services.storage import S3ObjectStore
+from app.config import settings
+from app.services.warm_cache import LRUCache, ObjectFileCache, _create_object_cache
+
+
+class FakeS3Client:
+    """Serves objects from a dict, answering conditional GETs like S3."""
+
+    def __init__(self):
+        self.objects = {}
+        self.downloads = 0
+
+    def put(self, key, data):
+        self.objects[key] = data
+
+    def get_object(self, Bucket, Key, IfNoneMatch=None, Range=None):
+        data = self.objects[Key]
+        etag = f'"{hashlib.md5(data).hexdigest()}"'
+        if IfNoneMatch == etag:
+            raise ClientError(
+                {
+                    "Error": {"Code": "304", "Message": "Not Modified"},
+                    "ResponseMetadata": {"HTTPStatusCode": 304},
+                },
+                "GetObject",
+            )
+        self.downloads += 1
+        return {"Body": io.BytesIO(data), "ContentLength": len(data), "ETag": etag}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ObjectFileCache(tmp_path / "objects", max_bytes=1024)
+
+
+class TestLRUCache:
+    """Test the size-bounded in-memory cache."""
+
+    def test_least_recently_used_values_are_dropped(self):
+        cache = LRUCache("test", max_bytes=10)
+        cache.put("a", 1, 4)
+        cache.put("b", 2, 4)
+        assert cache.get("a") == 1
+
+        cache.put("c", 3, 4)
+
+        assert cache.get("b") is None
+        assert (cache.get("a"), cache.get("c")) == (1, 3)
+        assert cache.size_bytes == 8
+
+    def test_values_larger_than_the_cache_are_not_kept(self):
+        cache = LRUCache("test", max_bytes=10)
+        cache.put("a", 1, 11)
+
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+
+class TestObjectFileCache:
+    """Test local copies of remote objects."""
+
+    def test_copy_is_found_with_its_etag(self, cache):
+        path = cache.store("bucket", "a.csv", "abc123", io.BytesIO(b"name\n"))
+
+        assert cache.lookup("bucket", "a.csv") == (path, "abc123")
+        assert cache.lookup("other", "a.csv") is None
+        assert path.read_bytes() == b"name\n"
+
+    def test_new_version_replaces_the_old_copy(self, cache):
+        cache.store("bucket", "a.csv", "v1", io.BytesIO(b"1"))
+        path = cache.store("bucket", "a.csv", "v2", io.BytesIO(b"2"))
+
+        assert cache.lookup("bucket", "a.csv") == (path, "v2")
+        assert cache.usage() == (1, 1)
+
+    def test_least_recently_used_copies_are_evicted(self, cache):
+        first = cache.store("bucket", "a.csv", "v1", io.BytesIO(b"a" * 500))
+        cache.store("bucket", "b.csv", "v1", io.BytesIO(b"b" * 500))
+        cache.touch(first)
+
+        cache.store("bucket", "c.csv", "v1", io.BytesIO(b"c" * 500))
+
+        assert cache.lookup("bucket", "b.csv") is None
+        assert cache.lookup("bucket", "a.csv") is not None
+        assert cache.lookup("bucket", "c.csv") is not None
+
+    def test_unsafe_etags_and_large_objects_are_not_cacheable(self, cache):
+        assert cache.cacheable(10, "abc-2")
+        assert not cache.cacheable(10, None)
+        assert not cache.cacheable(10, "../x")
+        assert not cache.cacheable(2048, "abc")
+
+
+class TestCreateObjectCache:
+    """Test when the S3 object cache is enabled."""
+
+    @pytest.fixture(autouse=True)
+    def cache_dir(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "OBJECT_CACHE_DIR", str(tmp_path / "objects"))
+        monkeypatch.delenv("AWS_LAMBDA_FUNCTION_NAME", raising=False)
+
+    def test_off_by_default_outside_lambda(self, monkeypatch):
+        monkeypatch.setattr(settings, "OBJECT_CACHE_MAX_BYTES", None)
+
+        assert _create_object_cache() is None
+
+    def test_on_by_default_on_lambda(self, monkeypatch):
+        monkeypatch.setattr(settings, "OBJECT_CACHE_MAX_BYTES", None)
+        monkeypatch.setenv("AWS_LAMBDA_FUNCTION_NAME", "transformat")
+
+        assert _create_object_cache().max_bytes > 0
+
+    def test_explicit_size_enables_it_anywhere(self, monkeypatch):
+        monkeypatch.setattr(settings, "OBJECT_CACHE_MAX_BYTES", 1024)
+
+        assert _create_object_cache().max_bytes == 1024
+
+    def test_zero_turns_it_off(self, monkeypatch):
+        monkeypatch.setattr(settings, "OBJECT_CACHE_MAX_BYTES", 0)
+        monkeypatch.setenv("AWS_LAMBDA_FUNCTION_NAME", "transformat")
+
+        assert _create_object_cache() is None
+
+
+class TestS3ObjectCache:
+    """Test S3 reads through the object cache."""
+
+    def test_unchanged_object_is_downloaded_once(self, cache):
+        client = FakeS3Client()
+        client.put("in/a.csv", b"name\nJohn\n")
+        store = S3ObjectStore("bucket", client=client, cache=cache)
+
+        assert store.read_bytes("in/a.csv") == b"name\nJohn\n"
+        assert store.scan_csv("in/a.csv").collect()["name"].to_list() == ["John"]
+        assert bytes(store.open_buffer("in/a.csv")) == b"name\nJohn\n"
+        assert client.downloads == 1
+
+    def test_changed_object_is_downloaded_again(self, cache):
+        client = FakeS3Client()
+        client.put("in/a.csv", b"name\nJohn\n")
+        store = S3ObjectStore("bucket", client=client, cache=cache)
+        store.read_bytes("in/a.csv")
+
+        client.put("in/a.csv", b"name\nJane\n")
+
+        assert store.read_bytes("in/a.csv") == b"name\nJane\n"
+        assert client.downloads == 2
+        assert cache.usage()[0] == 1
+
+    def test_objects_too_large_to_cache_are_read_directly(self, cache):
+        client = FakeS3Client()
+        client.put("in/big.csv", b"x" * 2048)
+        store = S3ObjectStore("bucket", client=client, cache=cache)
+
+        assert store.csv_source("in/big.csv") == b"x" * 2048
+        assert cache.usage() == (0, 0)
+
+
+class TestCompilePlan:
+    """Test caching compiled transform plans."""
+
+    def config_json(self, description="plans"):
+        return TransformationConfig(
+            config_id="plans",
+            version="1",
+            description=description,
+            input_file_prefix_path="in/",
+            output_file_prefix_path="out/",
+            nodes=[
+                GraphNode(
+                    id="input-1",
+                    type=NodeType.INPUT,
+                    position=Position(x=0, y=0),
+                    manual_values=InputNodeManualValues(column_names=["name"]),
+                ),
+            ],
+            edges=[],
+        ).model_dump_json()
+
+    def test_plan_is_reused_for_the_same_config(self):
+        plan = compile_plan(self.config_json(), "input-1")
+
+        assert compile_plan(self.config_json(), "input-1") is plan
+        assert [node.id for node in plan.nodes] == ["input-1"]
+
+    def test_changed_config_gets_a_new_plan(self):
+        plan = compile_plan(self.config_json(), "input-1")
+
+        assert compile_plan(self.config_json("changed"), "input-1") is not plan
@@ -0,0 +1,246 @@
+"""
+Cold start benchmark for the Lambda entry point.
+
+Imports `lambda_handler` in a fresh interpreter running with
+`python -X importtime`, then handles one API Gateway request, and reports how
+long both took, the slowest imports and which heavy libraries got loaded.
+
+Two first requests are available: `transform` streams the first rows of a
+transformed local CSV file as Arrow IPC, which loads polars and pyarrow like
+real traffic does; `health` loads neither and shows the cost of the
+handler alone.
+
+Usage:
+    python -m benchmarks.cold_start [--runs 5] [--request transform] [--top 15] [--json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Libraries a cold start should only load when a request needs them
+HEAVY_MODULES = ["polars", "pandas", "numpy", "pyarrow", "boto3", "botocore"]
+
+# Source of the transform request, in the local store of the measured process
+SOURCE_CSV = "id,name,email\n" + "".join(
+    f"{i},name-{i},user{i}@example.com\n" for i in range(1000)
+)
+
+# Body of the transform request: one input node over SOURCE_CSV
+TRANSFORM_REQUEST = {
+    "config": {
+        "config_id": "cold-start",
+        "version": "1",
+        "description": "cold start benchmark",
+        "input_file_prefix_path": "in/",
+        "output_file_prefix_path": "out/",
+        "nodes": [
+            {
+                "id": "input-1",
+                "type": "input",
+                "position": {"x": 0, "y": 0},
+                "manual_values": {"column_names": ["id", "name", "email"]},
+            }
+        ],
+        "edges": [],
+    },
+    "evaluate_node_id": "input-1",
+    "source_file": "in/source.csv",
+    "storage": "local",
+    "preview": True,
+    "limit": 100,
+}
+
+# First request of each scenario: method, path, accepted media type and JSON body
+REQUESTS: Dict[str, Tuple[str, str, str, Optional[Dict[str, Any]]]] = {
+    "health": ("GET", "/health", "application/json", None),
+    "transform": (
+        "POST", "/transform/stream", "application/vnd.apache.arrow.stream", TRANSFORM_REQUEST
+    ),
+}
+
+# Runs in the measured interpreter; prints the result as the last line
+_CHILD = """
+import json
+import time
+
+import os
+
+start = time.perf_counter()
+import lambda_handler
+import_seconds = time.perf_counter() - start
+# The working directory stands in for the read-only package directory
+written_by_import = sorted(
+    os.path.join(root, name) for root, dirs, files in os.walk(".") for name in dirs + files
+)
+
+from app.core.lazy import is_loaded
+
+heavy = {heavy!r}
+loaded_after_import = [name for name in heavy if is_loaded(name)]
+
+
+class Context:
+    aws_request_id = "cold-start-benchmark"
+
+
+headers = {{"Accept": {accept!r}, "Content-Type": "application/json"}}
+event = {{
+    "resource": {path!r},
+    "path": {path!r},
+    "httpMethod": {method!r},
+    "headers": headers,
+    "multiValueHeaders": {{name: [value] for name, value in headers.items()}},
+    "queryStringParameters": None,
+    "multiValueQueryStringParameters": None,
+    "requestContext": {{
+        "resourcePath": {path!r},
+        "httpMethod": {method!r},
+        "path": {path!r},
+        "stage": "benchmark",
+        "requestId": "cold-start-benchmark",
+        "identity": {{"sourceIp": "127.0.0.1"}},
+        "apiId": "benchmark",
+    }},
+    "body": {body!r},
+    "isBase64Encoded": False,
+}}
+start = time.perf_counter()
+response = lambda_handler.lambda_handler(event, Context())
+first_request_seconds = time.perf_counter() - start
+
+print()
+print(json.dumps({{
+    "import_seconds": import_seconds,
+    "first_request_seconds": first_request_seconds,
+    "status_code": response["statusCode"],
+    "loaded_after_import": loaded_after_import,
+    "written_by_import": written_by_import,
+    "loaded_after_request": [name for name in heavy if is_loaded(name)],
+}}))
+"""
+
+
+def parse_importtime(output: str) -> Dict[str, Tuple[int, int]]:
+    """
+    Parse the report of `python -X importtime`.
+
+    Args:
+        output: Standard error of the interpreter
+
+    Returns:
+        (self, cumulative) import time in microseconds, keyed by module name
+    """
+    timings = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return timings
+
+
+def measure_cold_start(request: str = "transform") -> Dict[str, Any]:
+    """
+    Import the Lambda entry point and handle one request in a new interpreter.
+
+    The interpreter runs as on Lambda (AWS_LAMBDA_FUNCTION_NAME is set), so
+    transforms run in-process, against a local store holding SOURCE_CSV. Its
+    working directory is read-only, like the package directory on Lambda, and
+    anything written to it anyway (e.g. by root) is reported.
+
+    Args:
+        request: First request to handle, one of REQUESTS
+
+    Returns:
+        Import and first request time in seconds, the response status, the
+        heavy libraries loaded after each step, the paths the import wrote to
+        the working directory, and per-module import times
+
+    Raises:
+        subprocess.CalledProcessError: If the import or the request failed
+    """
+    method, path, accept, body = REQUESTS[request]
+    with tempfile.TemporaryDirectory() as tmp:
+        task = Path(tmp) / "task"
+        task.mkdir(mode=0o555)
+        store = Path(tmp) / "store"
+        (store / "in").mkdir(parents=True)
+        (store / "in" / "source.csv").write_text(SOURCE_CSV)
+        env = {
+            **os.environ,
+            "PYTHONPATH": str(BACKEND_DIR),
+            "AWS_LAMBDA_FUNCTION_NAME": "cold-start-benchmark",
+            "LOCAL_STORAGE_ROOT": str(store),
+            # Keep the measured process from writing next to the sources
+            "METRICS_DIR": str(Path(tmp) / "metrics"),
+            "DATASET_CACHE_DIR": str(Path(tmp) / "datasets"),
+            "TRACE_EXPORTER": "none",
+        }
+        child = _CHILD.format(
+            heavy=HEAVY_MODULES,
+            method=method,
+            path=path,
+            accept=accept,
+            body=json.dumps(body) if body is not None else None,
+        )
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", child],
+            cwd=task,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result["imports"] = parse_importtime(completed.stderr)
+    return result
+
+
+def _report(results: List[Dict[str, Any]], top: int) -> str:
+    imports = results[-1]["imports"]
+    import_ms = statistics.median(r["import_seconds"] for r in results) * 1000
+    request_ms = statistics.median(r["first_request_seconds"] for r in results) * 1000
+    rows = [
+        ("runs", len(results)),
+        ("import (median)", f"{import_ms:.1f} ms"),
+        ("first request (median)", f"{request_ms:.1f} ms"),
+        ("status", results[-1]["status_code"]),
+        ("loaded after import", ", ".join(results[-1]["loaded_after_import"]) or "-"),
+        ("loaded after request", ", ".join(results[-1]["loaded_after_request"]) or "-"),
+        ("written by import", ", ".join(results[-1]["written_by_import"]) or "-"),
+    ]
+    lines = [f"{label + ':':<24} {value}" for label, value in rows]
+    lines += ["", "slowest imports (self, cumulative; last run):"]
+    slowest = sorted(imports.items(), key=lambda item: item[1][0], reverse=True)[:top]
+    for name, (self_us, cumulative_us) in slowest:
+        lines.append(f"  {self_us / 1000:8.1f} ms  {cumulative_us / 1000:8.1f} ms  {name}")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Interpreters to measure")
+    parser.add_argument(
+        "--request", choices=sorted(REQUESTS), default="transform", help="First request"
+    )
+    parser.add_argument("--top", type=int, default=15, help="Slowest imports to list")
+    parser.add_argument("--json", action="store_true", help="Print the raw results")
+    args = parser.parse_args()
+
+    results = [measure_cold_start(args.request) for _ in range(args.runs)]
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(_report(results, args.top))
+
+
+if __name__ == "__main__":
+    main()
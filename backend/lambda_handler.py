@@ -5,6 +5,7 @@ from mangum import Mangum
 # Import the FastAPI application
 from app.main import app
 from app.logger import get_logger
+from app.services.warm_cache import object_cache, plan_cache
 
 # Set up logger
 logger = get_logger("lambda_handler")
@@ -19,6 +20,11 @@ if IS_LAMBDA and os.environ.get("ENVIRONMENT") != "development":
 # Create the handler
 handler = Mangum(app, lifespan="off")
 
+# Invocations served by this execution environment. Module state survives
+# between warm invocations, which is what the plan, operator catalog and
+# object caches rely on.
+invocations = 0
+
 # Add custom middleware for Lambda-specific handling
 def lambda_handler(event, context):
     """
@@ -41,10 +47,13 @@ def lambda_handler(event, context):
                            for k, v in headers.items()}
         sanitized_event["headers"] = headers
     
+    global invocations
+    invocations += 1
     logger.info("Lambda request received", 
                 aws_request_id=getattr(context, "aws_request_id", "unknown"),
                 path=event.get("path"),
-                http_method=event.get("httpMethod"))
+                http_method=event.get("httpMethod"),
+                cold_start=invocations == 1)
     
     # Set API Gateway compatibility flag
     is_apigateway = "requestContext" in event and "apiId" in event["requestContext"]
@@ -54,8 +63,13 @@ def lambda_handler(event, context):
     
     # Log the response (excluding the body for brevity)
     log_response = {k: v for k, v in response.items() if k != "body"}
+    cached_objects, cached_bytes = object_cache.usage() if object_cache else (0, 0)
     logger.info("Lambda response", 
                 status_code=response.get("statusCode"),
-                response_metadata=log_response)
+                response_metadata=log_response,
+                invocation=invocations,
+                cached_plans=len(plan_cache),
+                cached_objects=cached_objects,
+                cached_object_bytes=cached_bytes)
     
     return response 
\ No newline at end of file